@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行入口（不依赖 PyQt5，适合在无界面的服务器上通过 cron 定时运行）
+
+用法：
+    python -m cli summarize 文件夹 [--concurrency N] [--report | --no-report] [--no-record]
+    python -m cli record 文件夹 [--concurrency N]
+    python -m cli report 文件夹
+    python -m cli search 关键词 [--limit N]
+    python -m cli qa 文件 问题
+    python -m cli serve [--library 文件夹] [--host 地址] [--port 端口]
+
+进度以 JSON Lines 输出到标准输出（每行一个事件，包含 event 字段），日志输出到标准错误。
+退出码：0 全部成功；1 部分文件处理失败；2 配置或运行错误；130 被中断（Ctrl+C）。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import sys
+import traceback
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.library_service import LibraryService
+from core.pipeline import CancellationToken
+from core.processor import LiteratureProcessor, configure_processor
+from core.progress import ProgressTracker
+from utils.config_manager import ConfigManager
+from utils.database import DatabaseManager
+from utils.file_manifest import FileManifest
+from utils.job_queue import JobQueue
+from utils.llm_client import LLMClient
+from utils.text_cache import TextCache
+from utils.text_extractor import TextExtractor, iter_supported_files, scan_all_files
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_ERROR = 2
+EXIT_INTERRUPTED = 130
+
+
+class EventWriter:
+    """以 JSON Lines 格式输出事件（每个事件一行，写入后立即刷新）"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __call__(self, event: str, **fields):
+        fields = {'event': event, **fields}
+        self.stream.write(json.dumps(fields, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+
+def _first_line(text) -> str:
+    return text.strip().splitlines()[0] if text and text.strip() else ''
+
+
+def _result_event(result: dict, progress: ProgressTracker) -> dict:
+    """单个文件结果对应的事件字段（不含摘要内容）"""
+    event = {
+        'path': result['pdf_path'],
+        'status': result['status'],
+        'completed': progress.completed,
+        'total': progress.total,
+        'percent': progress.percent
+    }
+    for key in ('summary_path', 'title', 'retries'):
+        if result.get(key):
+            event[key] = result[key]
+    if result.get('error'):
+        event['error'] = _first_line(result['error'])
+    return event
+
+
+def _check_llm_config(config: dict):
+    if not config.get('base_url') or not config.get('api_key'):
+        raise ValueError("配置文件中缺少 base_url 或 api_key")
+
+
+async def _write_report(processor: LiteratureProcessor, summaries: list, concurrency: int, emit) -> None:
+    await processor.generate_overall_report(summaries, concurrency)
+    emit('report', path=os.path.abspath('overall_report.md'), summaries=len(summaries))
+
+
+def summarize(config: dict, args, emit, cancel_token: CancellationToken) -> int:
+    """生成文件夹中PDF文献的摘要（增量扫描，按配置同时入库），可选生成总报告"""
+    _check_llm_config(config)
+    config = dict(config, folder_path=args.folder)
+    if args.no_record:
+        config['auto_record'] = False
+    concurrency = args.concurrency or config.get('concurrency', 5)
+    generate_report = config.get('generate_overall_report', True) if args.report is None else args.report
+    processor = LiteratureProcessor()
+    configure_processor(processor, config)
+
+    async def run():
+        if args.force:
+            pdf_files, unchanged_files = processor.scan_pdfs(args.folder), []
+        else:
+            pdf_files, unchanged_files = processor.scan_pending_pdfs(args.folder)
+        emit('start', command='summarize', folder=os.path.abspath(args.folder),
+             total=len(pdf_files), unchanged=len(unchanged_files))
+        progress = ProgressTracker(len(pdf_files))
+        results = []
+        async for result in processor.iter_process_pdfs(pdf_files, concurrency, config.get('cache_text', True),
+                                                        progress=progress, cancel_token=cancel_token,
+                                                        force=args.force):
+            result.pop('summary', None)
+            results.append(result)
+            emit('result', **_result_event(result, progress))
+
+        # 未变化的文件按已跳过处理
+        results.extend({
+            'pdf_path': pdf_path,
+            'summary_path': pdf_path.replace('.pdf', '.summary.md'),
+            'status': 'skipped'
+        } for pdf_path in unchanged_files)
+
+        if generate_report and not cancel_token.cancelled:
+            summaries = []
+            for result in results:
+                # 近似重复而跳过的文献没有摘要（结果中不含 summary_path）
+                if result['status'] in ('success', 'skipped') and 'summary_path' in result:
+                    try:
+                        summaries.append(processor.load_summary(result))
+                    except OSError as e:
+                        emit('warning', message=f"无法读取摘要 {result['summary_path']}: {str(e)}")
+            if summaries:
+                await _write_report(processor, summaries, concurrency, emit)
+        return progress
+
+    try:
+        progress = asyncio.run(run())
+    finally:
+        processor.shutdown()
+    emit('done', command='summarize', success=progress.counts.get('success', 0),
+         skipped=progress.counts.get('skipped', 0), failed=progress.failed,
+         remaining=progress.total - progress.completed, cancelled=cancel_token.cancelled)
+    if cancel_token.cancelled:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILURES if progress.failed else EXIT_OK
+
+
+def record(config: dict, args, emit, cancel_token: CancellationToken) -> int:
+    """把文件夹中的文献（PDF/DOCX/MD）只入库，不生成摘要"""
+    _check_llm_config(config)
+    processor = LiteratureProcessor()
+    configure_processor(processor, dict(config, auto_record=True))
+    manifest = None
+    if config.get('incremental_scan', True):
+        manifest = FileManifest(task='record', max_failures=config.get('max_failures', 3))
+
+    async def run():
+        if manifest is not None:
+            files = [(path, file_type) for path, file_type, _ in manifest.scan(args.folder)]
+        else:
+            files = scan_all_files(args.folder)
+        emit('start', command='record', folder=os.path.abspath(args.folder), total=len(files))
+        progress = ProgressTracker(len(files))
+        async for result in processor.iter_record_files(files, args.concurrency or config.get('concurrency', 5),
+                                                        config.get('cache_text', True),
+                                                        progress=progress, cancel_token=cancel_token):
+            if manifest is not None:
+                error = result.get('error')
+                manifest.mark(result['pdf_path'], result['status'], error[:1000] if error else None,
+                              result.get('file_hash'))
+            emit('result', **_result_event(result, progress))
+        return progress
+
+    try:
+        progress = asyncio.run(run())
+    finally:
+        processor.shutdown()
+    emit('done', command='record', success=progress.counts.get('success', 0),
+         skipped=progress.counts.get('skipped', 0), failed=progress.failed,
+         remaining=progress.total - progress.completed, cancelled=cancel_token.cancelled)
+    if cancel_token.cancelled:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILURES if progress.failed else EXIT_OK
+
+
+def report(config: dict, args, emit, cancel_token: CancellationToken) -> int:
+    """根据文件夹中已生成的摘要文件（*.summary.md）生成总报告"""
+    _check_llm_config(config)
+    paths = sorted(entry.path for entry, _ in iter_supported_files(args.folder, {'.md': 'md'})
+                   if entry.name.endswith('.summary.md'))
+    emit('start', command='report', folder=os.path.abspath(args.folder), total=len(paths))
+    if not paths:
+        emit('error', message="未找到摘要文件（*.summary.md）")
+        return EXIT_ERROR
+    summaries = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            summaries.append(f.read())
+
+    processor = LiteratureProcessor()
+    configure_processor(processor, dict(config, auto_record=False))
+    try:
+        asyncio.run(_write_report(processor, summaries, args.concurrency or config.get('concurrency', 5), emit))
+    finally:
+        processor.shutdown()
+    emit('done', command='report')
+    return EXIT_OK
+
+
+def search(config: dict, args, emit, cancel_token: CancellationToken) -> int:
+    """全文检索文献记录（按相关性排序）"""
+    db_manager = DatabaseManager(config.get('db_path', 'literature_records.db'))
+    db_manager.init_db()
+    records = db_manager.search_records(args.query, args.limit)
+    for record in records:
+        # 相关性分数和 MinHash 签名（二进制）不输出
+        record.pop('rank', None)
+        record.pop('minhash', None)
+        emit('record', **record)
+    emit('done', command='search', count=len(records))
+    return EXIT_OK
+
+
+def qa(config: dict, args, emit, cancel_token: CancellationToken) -> int:
+    """针对单篇文献提问；启用流式输出时逐段输出 delta 事件"""
+    _check_llm_config(config)
+    if not os.path.isfile(args.file):
+        raise ValueError(f"文件不存在: {args.file}")
+    stream = config.get('stream_output', True) and not args.no_stream
+    llm_client = LLMClient(config['base_url'], config['api_key'], config.get('max_tokens', 2048),
+                           config.get('model', 'gpt-3.5-turbo'), stream)
+    text, _ = TextExtractor(TextCache()).extract(args.file, llm_client.qa_text_budget())
+    emit('start', command='qa', path=os.path.abspath(args.file), chars=len(text))
+    on_delta = (lambda delta: emit('delta', text=delta)) if stream else None
+    answer = asyncio.run(llm_client.ask_question(text, args.question, on_delta=on_delta))
+    emit('answer', text=answer)
+    emit('done', command='qa')
+    return EXIT_OK
+
+
+def serve(config: dict, args, emit, cancel_token: CancellationToken) -> int:
+    """启动共享文献服务（HTTP），直到 Ctrl+C"""
+    _check_llm_config(config)
+    library = args.library or config.get('folder_path')
+    if not library or not os.path.isdir(library):
+        raise ValueError("请用 --library 指定文献库文件夹（或在配置中设置 folder_path）")
+    processor = LiteratureProcessor()
+    # 共享服务处理的文献都入库，供检索接口使用
+    configure_processor(processor, dict(config, auto_record=True))
+    queue = JobQueue(config.get('db_path', 'literature_records.db'), config.get('max_failures', 3))
+    service = LibraryService(
+        processor, queue, library,
+        max_connections=config.get('server_max_connections', 64),
+        qa_concurrency=config.get('server_qa_concurrency', 4),
+        worker_concurrency=args.concurrency or config.get('concurrency', 5),
+        cache_text=config.get('cache_text', True)
+    )
+    host = args.host or config.get('server_host', '127.0.0.1')
+    port = config.get('server_port', 8765) if args.port is None else args.port
+    try:
+        asyncio.run(service.run(
+            host, port, cancel_token,
+            on_ready=lambda address, bound_port: emit('listening', host=address, port=bound_port,
+                                                      library=service.library_root)
+        ))
+    finally:
+        processor.shutdown()
+    emit('done', command='serve', workers={worker.task: worker.counts for worker in service.workers})
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m cli', description="文献总结命令行工具（无界面）")
+    parser.add_argument('--config', default='config.json', help="配置文件路径")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    summarize_parser = subparsers.add_parser('summarize', help="生成文件夹中PDF文献的摘要")
+    summarize_parser.add_argument('folder', help="文献文件夹")
+    summarize_parser.add_argument('--concurrency', type=int, default=0, help="LLM 并发数（默认取配置）")
+    summarize_parser.add_argument('--report', dest='report', action='store_true', default=None,
+                                  help="处理完成后生成总报告（默认取配置 generate_overall_report）")
+    summarize_parser.add_argument('--no-report', dest='report', action='store_false', help="不生成总报告")
+    summarize_parser.add_argument('--no-record', action='store_true', help="不自动入库（覆盖配置）")
+    summarize_parser.add_argument('--force', action='store_true',
+                                  help="强制刷新：重新生成所有摘要，不使用 LLM 结果缓存中的旧结果")
+    summarize_parser.set_defaults(func=summarize)
+
+    record_parser = subparsers.add_parser('record', help="文献只入库，不生成摘要")
+    record_parser.add_argument('folder', help="文献文件夹")
+    record_parser.add_argument('--concurrency', type=int, default=0, help="LLM 并发数（默认取配置）")
+    record_parser.set_defaults(func=record)
+
+    report_parser = subparsers.add_parser('report', help="根据已有摘要文件生成总报告")
+    report_parser.add_argument('folder', help="包含 *.summary.md 的文件夹")
+    report_parser.add_argument('--concurrency', type=int, default=0, help="LLM 并发数（默认取配置）")
+    report_parser.set_defaults(func=report)
+
+    search_parser = subparsers.add_parser('search', help="全文检索文献记录")
+    search_parser.add_argument('query', help="检索词（支持 FTS5 语法）")
+    search_parser.add_argument('--limit', type=int, default=20, help="最多输出的记录数")
+    search_parser.set_defaults(func=search)
+
+    qa_parser = subparsers.add_parser('qa', help="针对单篇文献提问")
+    qa_parser.add_argument('file', help="文献文件（PDF/DOCX/MD）")
+    qa_parser.add_argument('question', help="问题")
+    qa_parser.add_argument('--no-stream', action='store_true', help="不输出流式 delta 事件")
+    qa_parser.set_defaults(func=qa)
+
+    serve_parser = subparsers.add_parser('serve', help="启动共享文献服务（HTTP）")
+    serve_parser.add_argument('--library', default=None, help="文献库文件夹（默认取配置 folder_path）")
+    serve_parser.add_argument('--host', default=None, help="监听地址（默认取配置 server_host）")
+    serve_parser.add_argument('--port', type=int, default=None, help="监听端口（默认取配置 server_port）")
+    serve_parser.add_argument('--concurrency', type=int, default=0, help="文献处理的 LLM 并发数（默认取配置）")
+    serve_parser.set_defaults(func=serve)
+    return parser
+
+
+@contextlib.contextmanager
+def _event_stream():
+    """
+    返回写入 JSON Lines 事件的流，期间其余输出都转到标准错误
+
+    标准输出是文件描述符 1 时在描述符层面重定向：文本提取子进程继承描述符 1，
+    其中的打印信息（如损坏页面的警告）同样进入标准错误，不会混入事件；
+    否则（如调用方已替换 sys.stdout）只替换 sys.stdout。
+    """
+    try:
+        is_fd_stdout = sys.stdout.fileno() == 1
+    except (AttributeError, OSError, ValueError):
+        is_fd_stdout = False
+    if not is_fd_stdout:
+        events = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            yield events
+        return
+
+    sys.stdout.flush()
+    saved_fd = os.dup(1)
+    events = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    os.dup2(2, 1)
+    try:
+        yield events
+    finally:
+        sys.stdout.flush()
+        events.close()
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    cancel_token = CancellationToken()
+
+    def on_interrupt(*_):
+        # 第一次 Ctrl+C：不再开始新文件，进行中的文件处理完后退出；再次按下立即中断
+        if cancel_token.cancelled:
+            raise KeyboardInterrupt
+        cancel_token.cancel()
+        emit('cancelling')
+
+    # 标准输出只用于 JSON Lines 事件，处理过程中的打印信息转到标准错误
+    with _event_stream() as events:
+        emit = EventWriter(events)
+        previous_handler = signal.signal(signal.SIGINT, on_interrupt)
+        try:
+            config = ConfigManager(args.config).load_config()
+            return args.func(config, args, emit, cancel_token)
+        except KeyboardInterrupt:
+            emit('error', message="已中断")
+            return EXIT_INTERRUPTED
+        except Exception as e:
+            traceback.print_exc()
+            emit('error', message=str(e))
+            return EXIT_ERROR
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import sys
+import time
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_extractor import SUPPORTED_TYPES, iter_supported_files
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+
+# 程序自身生成的文件，监视时忽略，避免写出摘要后又被当作新文献处理
+GENERATED_SUFFIXES = ('.summary.md', '.qa.md')
+
+
+def is_generated_output(file_path: str) -> bool:
+    """判断文件是否为程序生成的摘要/问答记录"""
+    return os.path.basename(file_path).lower().endswith(GENERATED_SUFFIXES)
+
+
+def get_file_type(file_path: str) -> Optional[str]:
+    """返回支持的文件类型（pdf/docx/md），不支持或为生成文件时返回 None"""
+    if is_generated_output(file_path):
+        return None
+    return SUPPORTED_TYPES.get(os.path.splitext(file_path)[1].lower())
+
+
+class _EventHandler(FileSystemEventHandler):
+    """将 watchdog 的文件事件转发到事件循环"""
+
+    def __init__(self, watcher: 'FolderWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.dest_path)
+
+
+class FolderWatcher:
+    """
+    文件夹监视器：持续产出新放入（或被替换）的文献文件
+
+    优先使用 watchdog（Linux 下基于 inotify）接收文件事件，未安装时退回定时轮询。
+    文件在 settle_seconds 秒内大小和修改时间均不再变化才视为复制完成，
+    避免处理尚未拷贝完的文件。
+    """
+
+    def __init__(self, folder_path: str, settle_seconds: float = 2.0, poll_interval: float = 5.0,
+                 use_native: bool = True):
+        """
+        Args:
+            folder_path: 监视的文件夹
+            settle_seconds: 文件保持不变多少秒后视为写入完成
+            poll_interval: 轮询模式下的扫描间隔（秒）
+            use_native: 是否优先使用系统文件事件（需要安装 watchdog）
+        """
+        self.folder_path = folder_path
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.use_native = use_native and WATCHDOG_AVAILABLE
+        # 待确认的文件: path -> (size, mtime_ns, 最后一次变化的时间)
+        self._candidates: Dict[str, Tuple[int, int, float]] = {}
+        # 已产出的文件版本: path -> (size, mtime_ns)
+        self._emitted: Dict[str, Tuple[int, int]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._stopped = False
+
+    @property
+    def mode(self) -> str:
+        return "watchdog" if self.use_native else "polling"
+
+    def notify(self, file_path: str):
+        """记录可能发生变化的文件（可在任意线程调用）"""
+        if self._loop is not None and get_file_type(file_path):
+            self._loop.call_soon_threadsafe(self._add_candidate, os.path.abspath(file_path))
+
+    def stop(self):
+        """停止监视（可在任意线程调用）"""
+        self._stopped = True
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """轮询模式：获取当前文件夹内所有支持文件的 (size, mtime_ns)"""
+        snapshot = {}
+        for entry, _ in iter_supported_files(self.folder_path):
+            if is_generated_output(entry.path):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            snapshot[os.path.abspath(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _add_candidate(self, file_path: str):
+        if file_path not in self._candidates:
+            self._candidates[file_path] = (-1, -1, time.monotonic())
+
+    def _collect_ready(self):
+        """检查待确认文件，返回已写入完成的文件列表"""
+        ready = []
+        now = time.monotonic()
+        for file_path, (size, mtime_ns, changed_at) in list(self._candidates.items()):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                # 文件已被删除或移走
+                del self._candidates[file_path]
+                continue
+
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != (size, mtime_ns):
+                self._candidates[file_path] = (stat.st_size, stat.st_mtime_ns, now)
+                continue
+            if now - changed_at < self.settle_seconds or stat.st_size == 0:
+                continue
+
+            del self._candidates[file_path]
+            if self._emitted.get(file_path) != current:
+                self._emitted[file_path] = current
+                ready.append(file_path)
+        return ready
+
+    async def watch(self) -> AsyncIterator[Tuple[str, str]]:
+        """
+        持续监视文件夹，直到调用 stop()
+
+        Yields:
+            (file_path, file_type) 元组
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        if self._stopped:
+            return
+
+        # 启动时已存在的文件不视为新文件
+        known = await self._loop.run_in_executor(None, self._snapshot)
+        self._emitted.update(known)
+
+        observer = None
+        if self.use_native:
+            observer = Observer()
+            observer.schedule(_EventHandler(self), self.folder_path, recursive=True)
+            observer.start()
+
+        check_interval = max(0.2, min(1.0, self.settle_seconds / 2))
+        last_poll = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                if observer is None and time.monotonic() - last_poll >= self.poll_interval:
+                    last_poll = time.monotonic()
+                    snapshot = await self._loop.run_in_executor(None, self._snapshot)
+                    for file_path, version in snapshot.items():
+                        if self._emitted.get(file_path) != version:
+                            self._add_candidate(file_path)
+
+                for file_path in self._collect_ready():
+                    yield file_path, get_file_type(file_path)
+
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=check_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
@@ -0,0 +1,393 @@
+import asyncio
+import json
+import os
+import socket
+import traceback
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from core.pipeline import CancellationToken
+from core.processor import LiteratureProcessor
+from core.queue_worker import QueueWorker
+from utils.job_queue import JOB_TASKS, JobQueue
+from utils.text_extractor import SUPPORTED_TYPES, iter_supported_files
+
+MAX_BODY_BYTES = 1024 * 1024  # 请求体大小上限
+MAX_HEADER_LINES = 100
+REQUEST_TIMEOUT = 30  # 读取请求的超时（秒），防止慢速连接长期占用连接数
+MAX_SEARCH_LIMIT = 100
+
+_REASONS = {
+    200: 'OK', 202: 'Accepted', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+    405: 'Method Not Allowed', 408: 'Request Timeout', 413: 'Payload Too Large',
+    500: 'Internal Server Error', 503: 'Service Unavailable'
+}
+
+
+class ServiceError(Exception):
+    """请求处理错误，以对应的 HTTP 状态码返回给客户端"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LibraryService:
+    """
+    共享文献服务（基于 asyncio 的 HTTP 服务器）
+
+    一个服务实例供多人共用：所有请求共享同一个处理器（文本提取进程池、文本缓存、LLM 结果缓存、
+    限流器和自适应并发），提交的文献进入共享任务队列，由服务内的 worker 按需领取处理，
+    也可以由其他机器上的 worker.py 一起处理。资源占用有上限：同时处理的连接数超过
+    max_connections 时直接返回 503，同时进行的问答数不超过 qa_concurrency（其余排队等待），
+    文献处理并发由 worker 的 concurrency 决定。
+
+    接口（请求和响应均为 JSON，问答为 Server-Sent Events）：
+        GET  /health                 服务状态
+        POST /jobs                   提交文献 {"paths": [...], "folder": "...", "task": "summary", "priority": 0}
+        GET  /jobs                   任务队列统计
+        GET  /jobs/<id>              任务状态和结果
+        GET  /search?q=...&limit=20  全文检索文献记录
+        POST /qa                     针对单篇文献提问 {"path": "...", "question": "...", "history": [...]}
+    请求中的文件路径相对文献库根目录解析，不允许访问根目录以外的文件。
+    """
+
+    def __init__(self, processor: LiteratureProcessor, queue: JobQueue, library_root: str,
+                 max_connections: int = 64, qa_concurrency: int = 4, worker_concurrency: int = 5,
+                 lease_seconds: float = 300, poll_interval: float = 2, cache_text: bool = True):
+        """
+        Args:
+            processor: 已按配置初始化（并启用自动记录）的处理器
+            queue: 共享任务队列
+            library_root: 文献库根目录
+            max_connections: 同时处理的连接数上限
+            qa_concurrency: 同时进行的问答数
+            worker_concurrency: 服务内 worker 的 LLM 并发数
+            lease_seconds: 任务租约时长（秒）
+            poll_interval: 队列为空时 worker 等待新任务的轮询间隔（秒）
+            cache_text: 是否使用提取文本缓存
+        """
+        self.processor = processor
+        self.queue = queue
+        self.library_root = os.path.realpath(library_root)
+        self.max_connections = max(1, max_connections)
+        self.qa_concurrency = max(1, qa_concurrency)
+        self.poll_interval = poll_interval
+        self.cache_text = cache_text
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.workers = [
+            QueueWorker(processor, queue, task, worker_id=f"{worker_id}:{task}", concurrency=worker_concurrency,
+                        lease_seconds=lease_seconds, cache_text=cache_text)
+            for task in JOB_TASKS
+        ]
+        self.connections = 0
+        self._qa_semaphore: Optional[asyncio.Semaphore] = None
+        self._routes = {
+            '/health': {'GET': self._health},
+            '/jobs': {'GET': self._job_stats, 'POST': self._submit},
+            '/search': {'GET': self._search},
+            '/qa': {'POST': self._qa},
+        }
+
+    async def run(self, host: str = '127.0.0.1', port: int = 8765, stop_token: CancellationToken = None,
+                  on_ready: Callable[[str, int], None] = None):
+        """
+        启动服务并运行到 stop_token 被取消
+
+        停止时不再接受新连接，worker 不再领取新任务，进行中的任务处理完后返回。
+
+        Args:
+            on_ready: 开始监听后调用 on_ready(地址, 端口)（port 为 0 时可由此获得实际端口）
+        """
+        stop_token = stop_token or CancellationToken()
+        self._qa_semaphore = asyncio.Semaphore(self.qa_concurrency)
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        address = server.sockets[0].getsockname()
+        if on_ready is not None:
+            on_ready(address[0], address[1])
+        worker_tasks = [
+            asyncio.ensure_future(worker.run(follow=True, poll_interval=self.poll_interval))
+            for worker in self.workers
+        ]
+        try:
+            while not stop_token.cancelled:
+                await asyncio.sleep(0.2)
+        finally:
+            server.close()
+            for worker in self.workers:
+                worker.stop()
+            await asyncio.gather(*worker_tasks, return_exceptions=True)
+            await server.wait_closed()
+
+    # ---- HTTP 协议处理 ----
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            if self.connections >= self.max_connections:
+                # 先读取请求再拒绝，避免关闭连接时未读取的数据导致客户端收到连接重置而不是 503
+                try:
+                    await asyncio.wait_for(self._read_request(reader), 1)
+                except (ServiceError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    pass
+                await self._send_json(writer, 503, {'error': "服务繁忙，请稍后重试"})
+                return
+            self.connections += 1
+            try:
+                await self._dispatch(reader, writer)
+            finally:
+                self.connections -= 1
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT)
+            if request is None:
+                return
+            response = await self._route(request)(request, writer)
+        except ServiceError as e:
+            response = (e.status, {'error': str(e)})
+        except asyncio.TimeoutError:
+            response = (408, {'error': "读取请求超时"})
+        except asyncio.IncompleteReadError:
+            # 请求体未发送完整就断开
+            return
+        except ConnectionError:
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            response = (500, {'error': str(e)})
+        # 流式接口自行写出响应，返回 None
+        if response is not None:
+            await self._send_json(writer, *response)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Dict]:
+        """读取一个 HTTP 请求；连接未发送任何数据就关闭时返回 None"""
+        try:
+            line = await reader.readline()
+            if not line:
+                return None
+            parts = line.decode('latin-1').split()
+            if len(parts) != 3:
+                raise ServiceError(400, "无效的请求行")
+            method, target, _ = parts
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            else:
+                raise ServiceError(400, "请求头过多")
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            # 请求行或请求头超过 StreamReader 的长度上限，或 Content-Length 不是整数
+            raise ServiceError(400, "无效的请求")
+        if length > MAX_BODY_BYTES:
+            raise ServiceError(413, "请求体过大")
+        body = await reader.readexactly(length) if length > 0 else b''
+        url = urlsplit(target)
+        return {
+            'method': method.upper(),
+            'path': url.path.rstrip('/') or '/',
+            'query': {key: values[-1] for key, values in parse_qs(url.query).items()},
+            'body': body
+        }
+
+    def _route(self, request: Dict) -> Callable:
+        path = request['path']
+        if path.startswith('/jobs/'):
+            methods = {'GET': self._get_job}
+        else:
+            methods = self._routes.get(path)
+        if methods is None:
+            raise ServiceError(404, f"未知的接口: {path}")
+        handler = methods.get(request['method'])
+        if handler is None:
+            raise ServiceError(405, f"接口 {path} 不支持 {request['method']} 请求")
+        return handler
+
+    @staticmethod
+    async def _send_json(writer: asyncio.StreamWriter, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    @staticmethod
+    async def _send_event(writer: asyncio.StreamWriter, event: str, payload: Dict) -> bool:
+        """
+        写出一个 Server-Sent Event 并等待发送缓冲区排空（客户端读得慢时在此等待）
+
+        Returns:
+            客户端已断开时返回 False
+        """
+        if writer.is_closing():
+            return False
+        data = json.dumps(payload, ensure_ascii=False)
+        writer.write(f"event: {event}\ndata: {data}\n\n".encode('utf-8'))
+        try:
+            await writer.drain()
+        except ConnectionError:
+            return False
+        return not writer.is_closing()
+
+    @staticmethod
+    def _json_body(request: Dict) -> Dict:
+        try:
+            body = json.loads(request['body'].decode('utf-8') or '{}')
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ServiceError(400, "请求体不是有效的 JSON")
+        if not isinstance(body, dict):
+            raise ServiceError(400, "请求体必须是 JSON 对象")
+        return body
+
+    def _resolve_path(self, path) -> str:
+        """把请求中的路径（相对文献库根目录）解析为真实路径，不允许离开文献库根目录"""
+        if not isinstance(path, str) or not path:
+            raise ServiceError(400, "路径不能为空")
+        full_path = os.path.realpath(os.path.join(self.library_root, path))
+        if os.path.commonpath([full_path, self.library_root]) != self.library_root:
+            raise ServiceError(403, f"路径不在文献库内: {path}")
+        return full_path
+
+    # ---- 接口 ----
+
+    async def _health(self, request: Dict, writer: asyncio.StreamWriter) -> Tuple[int, Dict]:
+        return 200, {
+            'status': 'ok',
+            'connections': self.connections,
+            'workers': {worker.task: worker.counts for worker in self.workers},
+            'llm_concurrency': self.processor.concurrency_snapshot()
+        }
+
+    async def _submit(self, request: Dict, writer: asyncio.StreamWriter) -> Tuple[int, Dict]:
+        """提交文献到共享任务队列"""
+        body = self._json_body(request)
+        task = body.get('task', 'summary')
+        if task not in JOB_TASKS:
+            raise ServiceError(400, f"未知的任务类型: {task}")
+        try:
+            priority = int(body.get('priority', 0))
+        except (TypeError, ValueError):
+            raise ServiceError(400, "priority 必须是整数")
+        paths = body.get('paths') or []
+        if not isinstance(paths, list):
+            raise ServiceError(400, "paths 必须是列表")
+
+        supported = {'.pdf': 'pdf'} if task == 'summary' else SUPPORTED_TYPES
+        files = []
+        for path in paths:
+            full_path = self._resolve_path(path)
+            file_type = supported.get(os.path.splitext(full_path)[1].lower())
+            if file_type is None or not os.path.isfile(full_path):
+                raise ServiceError(400, f"文件不存在或类型不支持: {path}")
+            files.append((full_path, file_type))
+
+        loop = asyncio.get_running_loop()
+        if body.get('folder'):
+            folder = self._resolve_path(body['folder'])
+            if not os.path.isdir(folder):
+                raise ServiceError(400, f"文件夹不存在: {body['folder']}")
+            files.extend(await loop.run_in_executor(
+                None, lambda: [(entry.path, file_type) for entry, file_type in iter_supported_files(folder, supported)]
+            ))
+        if not files:
+            raise ServiceError(400, "没有可处理的文件")
+
+        count = await loop.run_in_executor(None, self.queue.enqueue, files, task, priority, bool(body.get('requeue')))
+        jobs = await loop.run_in_executor(None, lambda: [self.queue.get_by_path(path, task) for path, _ in files])
+        return 202, {
+            'enqueued': count,
+            'jobs': [{'id': job['id'], 'file_path': job['file_path'], 'status': job['status']} for job in jobs]
+        }
+
+    async def _job_stats(self, request: Dict, writer: asyncio.StreamWriter) -> Tuple[int, Dict]:
+        loop = asyncio.get_running_loop()
+        stats = await loop.run_in_executor(None, lambda: {task: self.queue.stats(task) for task in JOB_TASKS})
+        return 200, stats
+
+    async def _get_job(self, request: Dict, writer: asyncio.StreamWriter) -> Tuple[int, Dict]:
+        try:
+            job_id = int(request['path'][len('/jobs/'):])
+        except ValueError:
+            raise ServiceError(404, "任务不存在")
+        job = await asyncio.get_running_loop().run_in_executor(None, self.queue.get, job_id)
+        if job is None:
+            raise ServiceError(404, "任务不存在")
+        return 200, job
+
+    async def _search(self, request: Dict, writer: asyncio.StreamWriter) -> Tuple[int, Dict]:
+        """全文检索文献记录（DatabaseManager.search_records，按相关性排序）"""
+        query = request['query'].get('q', '').strip()
+        if not query:
+            raise ServiceError(400, "缺少检索词 q")
+        try:
+            limit = min(max(1, int(request['query'].get('limit', 20))), MAX_SEARCH_LIMIT)
+        except ValueError:
+            raise ServiceError(400, "limit 必须是整数")
+        records = await asyncio.get_running_loop().run_in_executor(
+            None, self.processor.db_manager.search_records, query, limit
+        )
+        for record in records:
+            # 相关性分数和 MinHash 签名（二进制）不返回
+            record.pop('rank', None)
+            record.pop('minhash', None)
+        return 200, {'count': len(records), 'records': records}
+
+    @staticmethod
+    def _validate_history(history) -> List[Dict]:
+        if history is None:
+            return []
+        if not isinstance(history, list) or not all(
+            isinstance(message, dict) and message.get('role') in ('user', 'assistant')
+            and isinstance(message.get('content'), str)
+            for message in history
+        ):
+            raise ServiceError(400, "history 必须是 {role, content} 对象列表（role 为 user 或 assistant）")
+        return [{'role': message['role'], 'content': message['content']} for message in history]
+
+    async def _qa(self, request: Dict, writer: asyncio.StreamWriter) -> None:
+        """
+        针对单篇文献提问，以 Server-Sent Events 返回：
+        delta（回答片段，启用流式输出时）、answer（完整回答）或 error
+        """
+        body = self._json_body(request)
+        path = self._resolve_path(body.get('path'))
+        if not os.path.isfile(path) or os.path.splitext(path)[1].lower() not in SUPPORTED_TYPES:
+            raise ServiceError(400, f"文件不存在或类型不支持: {body.get('path')}")
+        question = body.get('question')
+        if not isinstance(question, str) or not question.strip():
+            raise ServiceError(400, "问题不能为空")
+        history = self._validate_history(body.get('history'))
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        await writer.drain()
+        llm_client = self.processor.llm_client
+        async with self._qa_semaphore:
+            try:
+                text, _ = await self.processor.extraction_pool.extract(
+                    path, self.cache_text, llm_client.qa_text_budget()
+                )
+                # 每段回答发送完才读取下一段；客户端断开后停止生成
+                answer = await llm_client.ask_question(
+                    text, question, history,
+                    on_delta=lambda delta: self._send_event(writer, 'delta', {'text': delta})
+                )
+                await self._send_event(writer, 'answer', {'text': answer})
+            except Exception as e:
+                message = str(e).strip()
+                await self._send_event(writer, 'error', {'error': message.splitlines()[0] if message else "回答失败"})
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Union
+
+# 阶段处理函数：接收上一阶段的产物，返回交给下一阶段的产物（或最终结果）
+StageHandler = Callable[[Any], Awaitable[Any]]
+
+_END = object()
+
+
+class CancellationToken:
+    """
+    协作式取消标记（可在任意线程设置）
+
+    流水线在取消后不再接收新任务，各阶段不再开始处理排队中的任务（直接丢弃），
+    正在执行的处理照常完成；保存已付费结果的阶段（finish_on_cancel）仍处理排队任务，
+    已付费的 LLM 调用结果不会丢失。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class Stage:
+    """流水线中的一个阶段"""
+
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1, finish_on_cancel: bool = False):
+        """
+        Args:
+            name: 阶段名称
+            handler: 异步处理函数
+            workers: 并行执行该阶段的协程数
+            finish_on_cancel: 取消后是否仍处理排队中的任务（用于保存已付费结果等无额外开销的阶段）
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.finish_on_cancel = finish_on_cancel
+
+
+class Pipeline:
+    """
+    基于有界 asyncio 队列的分阶段流水线
+
+    各阶段之间用有界队列连接，每个阶段按 workers 数量并行消费；
+    队列满时上游自动等待，因此同时在内存中的任务数量有上限，与输入规模无关。
+    任一阶段返回的产物满足 is_done 时（如跳过或失败）直接作为最终结果输出，不再经过后续阶段；
+    处理函数抛出的异常交给 on_error 转换为最终结果，单个任务出错不影响其他任务。
+    结果按完成顺序逐个产出。
+    """
+
+    def __init__(self, stages: List[Stage], is_done: Callable[[Any], bool] = None,
+                 on_error: Callable[[Any, Exception], Any] = None, queue_size: int = 0):
+        """
+        Args:
+            stages: 阶段列表
+            is_done: 判断产物是否已是最终结果
+            on_error: 将 (输入产物, 异常) 转换为最终结果；为 None 时异常向调用方抛出
+            queue_size: 阶段间队列容量，<= 0 表示取下游阶段 workers 的两倍
+        """
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.stages = stages
+        self.is_done = is_done or (lambda item: False)
+        self.on_error = on_error
+        self.queue_size = queue_size
+
+    def _queue_size(self, stage: Optional[Stage]) -> int:
+        if self.queue_size > 0:
+            return self.queue_size
+        return 2 * stage.workers if stage is not None else 2
+
+    async def run(self, items: Union[Iterable, AsyncIterable], cancel_token: CancellationToken = None) -> AsyncIterator:
+        """
+        运行流水线
+
+        Args:
+            items: 输入产物（可以是生成器或异步生成器，按需逐个读取）
+            cancel_token: 取消标记，取消后停止读取新的输入，并丢弃各阶段排队中的任务
+                （finish_on_cancel 的阶段除外），正在执行的处理完成后结束
+
+        Yields:
+            按完成顺序产出的最终结果
+        """
+        queues = [asyncio.Queue(self._queue_size(stage)) for stage in self.stages]
+        output = asyncio.Queue(self._queue_size(None))
+
+        async def produce():
+            if hasattr(items, '__aiter__'):
+                async for item in items:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        break
+                    await queues[0].put(item)
+            else:
+                for item in items:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        break
+                    await queues[0].put(item)
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(_END)
+
+        async def work(index: int):
+            stage = self.stages[index]
+            last = index == len(self.stages) - 1
+            while True:
+                item = await queues[index].get()
+                if item is _END:
+                    return
+                if cancel_token is not None and cancel_token.cancelled and not stage.finish_on_cancel:
+                    # 已取消：丢弃排队中的任务，不再开始新的处理
+                    continue
+                try:
+                    result = await stage.handler(item)
+                except Exception as e:
+                    if self.on_error is None:
+                        raise
+                    await output.put((self.on_error(item, e), None))
+                    continue
+                if last or self.is_done(result):
+                    await output.put((result, None))
+                else:
+                    await queues[index + 1].put(result)
+
+        async def run_stage(index: int):
+            workers = [asyncio.ensure_future(work(index)) for _ in range(self.stages[index].workers)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    await queues[index + 1].put(_END)
+
+        async def supervise():
+            children = [asyncio.ensure_future(produce())]
+            children += [asyncio.ensure_future(run_stage(i)) for i in range(len(self.stages))]
+            try:
+                await asyncio.gather(*children)
+            except Exception as e:
+                await output.put((_END, e))
+            else:
+                await output.put((_END, None))
+            finally:
+                for child in children:
+                    child.cancel()
+
+        supervisor = asyncio.ensure_future(supervise())
+        try:
+            while True:
+                result, error = await output.get()
+                if result is _END:
+                    if error is not None:
+                        raise error
+                    return
+                yield result
+        finally:
+            supervisor.cancel()
+            await asyncio.gather(supervisor, return_exceptions=True)
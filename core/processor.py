@@ -3,33 +3,134 @@ import sys
 import asyncio
 import traceback
 import json
-from typing import List, Dict
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Tuple, Union
 import time
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from core.pipeline import CancellationToken, Pipeline, Stage
+from core.progress import ProgressTracker
+from core.report_reducer import ReportReducer
+from core.scheduler import JobScheduler
+from core.task_graph import TaskGraph
 from utils.pdf_reader import PDFReader
 from utils.llm_client import LLMClient
-from utils.text_extractor import compute_content_hash
+from utils.extraction_pool import ExtractionPool
+from utils.text_extractor import ExtractionError, compute_content_hash, compute_file_hash, iter_supported_files
 from utils.database import DatabaseManager
+from utils.file_manifest import FileManifest
+from utils.minhash import NUMPY_AVAILABLE, NearDuplicateIndex
+from utils.job_journal import JobJournal, atomic_write_text
+from utils.retry_policy import track_retries
+from utils.structured_output import StructuredOutputError
+from utils.llm_result_cache import LLMResultCache, bypass_result_cache
+from utils.report_store import ReportStore
 
 
 class LiteratureProcessor:
-    def __init__(self):
+    def __init__(self, extraction_pool: ExtractionPool = None):
+        """
+        Args:
+            extraction_pool: 与其他处理器共用的文本提取进程池（默认新建）
+        """
         self.pdf_reader = PDFReader()
+        self.extraction_pool = extraction_pool or ExtractionPool()
         self.llm_client = None
         self.api_request_delay = 0  # API请求间隔（秒）
+        self.requests_per_minute = 0  # 每分钟最大请求数（0 表示不限制）
+        self.tokens_per_minute = 0  # 每分钟最大 token 数（0 表示不限制）
+        self.llm_max_retries = 3  # 暂时性错误的最大重试次数
+        self.llm_retry_max_delay = 60  # 单次重试等待上限（秒）
+        self.adaptive_concurrency = False  # 是否根据 429/5xx 和延迟自动调整 LLM 并发
+        self.max_concurrency = 32  # 自适应并发的上限
+        self.context_window = 16000  # 模型上下文窗口（token 数），总报告超过时分层归并
+        self.chunk_concurrency = 2  # 单篇超长文献分块摘要时同时进行的调用数上限
         self.db_manager = None
         self.auto_record_enabled = False
+        self.manifest = None  # 增量扫描清单
+        self.near_duplicate_index = None  # 近似重复检测（MinHash/LSH）
+        self.journal = None  # 摘要任务日志（停止或崩溃后续跑）
+        self.combined_analysis = False  # 自动记录时用一次结构化调用同时生成摘要和入库字段
+        self.result_cache = None  # LLM 结果缓存（摘要流程与批量入库共用）
+        self.report_store = None  # 总报告归并树节点（增量生成总报告）
+        self._pending_hashes = set()  # 正在入库的内容哈希（同一批次内容相同的文件只入库一次）
+        self.schedule_policy = 'fifo'  # 文件处理顺序的调度策略
+        self._priorities = {}  # 显式优先级：文件或文件夹路径 -> 优先级
+        self._scheduler = None  # 当前运行的任务队列
         
     def initialize_llm_client(self, base_url: str, api_key: str, max_tokens: int, model: str = "gpt-3.5-turbo"):
         """初始化LLM客户端"""
         self.llm_client = LLMClient(base_url, api_key, max_tokens, model)
+        self.llm_client.set_retry_policy(self.llm_max_retries, self.llm_retry_max_delay)
+        self.llm_client.set_result_cache(self.result_cache)
+        self.llm_client.set_context_window(self.context_window)
+        self.llm_client.set_chunk_concurrency(self.chunk_concurrency)
+        self._apply_rate_limits()
         
     def set_api_request_delay(self, delay: int):
-        """设置API请求间隔"""
+        """设置API请求间隔（由共享限流器统一调度，等待时不占用并发槽）"""
         self.api_request_delay = delay
+        self._apply_rate_limits()
+
+    def set_rate_limits(self, requests_per_minute: float, tokens_per_minute: float):
+        """设置每分钟请求数和 token 数上限（0 表示不限制）"""
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._apply_rate_limits()
+
+    def set_retry_policy(self, max_retries: int, max_delay: float = 60):
+        """设置 LLM 暂时性错误（429、5xx、连接失败、超时）的最大重试次数和单次等待上限（秒）"""
+        self.llm_max_retries = max_retries
+        self.llm_retry_max_delay = max_delay
+        if self.llm_client:
+            self.llm_client.set_retry_policy(max_retries, max_delay)
+
+    def set_context_window(self, tokens: int):
+        """设置模型上下文窗口的 token 数（总报告超过时分组归并）"""
+        self.context_window = tokens
+        if self.llm_client:
+            self.llm_client.set_context_window(tokens)
+
+    def set_chunk_concurrency(self, concurrency: int):
+        """设置单篇超长文献分块摘要时同时进行的调用数上限（避免长文献占满 LLM 并发）"""
+        self.chunk_concurrency = concurrency
+        if self.llm_client:
+            self.llm_client.set_chunk_concurrency(concurrency)
+
+    def set_adaptive_concurrency(self, enabled: bool, max_concurrency: int = 32):
+        """
+        启用自适应并发：以 concurrency 为初始值，在 1 到 max_concurrency 之间按 AIMD 自动调整
+        """
+        self.adaptive_concurrency = enabled
+        self.max_concurrency = max_concurrency
+
+    def concurrency_snapshot(self) -> Dict:
+        """返回自适应并发控制器的当前指标（未启用时返回 None）"""
+        if self.llm_client is None or getattr(self.llm_client, 'concurrency', None) is None:
+            return None
+        return self.llm_client.concurrency.snapshot()
+
+    def _apply_rate_limits(self):
+        if self.llm_client:
+            self.llm_client.set_rate_limits(self.requests_per_minute, self.tokens_per_minute,
+                                            self.api_request_delay)
+
+    def set_extract_workers(self, workers: int):
+        """设置文本提取进程数（<= 0 表示使用CPU核数）"""
+        self.extraction_pool.set_max_workers(workers)
+
+    def set_text_cache_limit(self, max_size_mb: int):
+        """设置文本缓存容量上限（MB）"""
+        self.extraction_pool.set_text_cache(max_size_mb)
+
+    def set_extract_limits(self, timeout: float, memory_limit_mb: int):
+        """设置单个文件提取的超时（秒）和内存上限（MB），0 表示不限制"""
+        self.extraction_pool.set_isolation(timeout, memory_limit_mb)
+
+    def shutdown(self):
+        """释放文本提取进程池"""
+        self.extraction_pool.shutdown()
 
     def initialize_database(self, db_path: str = "literature_records.db"):
         """初始化数据库管理器"""
@@ -40,143 +141,586 @@ class LiteratureProcessor:
         """启用或禁用自动记录"""
         self.auto_record_enabled = enabled
         
+    def enable_near_duplicate_detection(self, threshold: float = 0.9, action: str = 'link'):
+        """启用自动记录时的近似重复检测（threshold <= 0 表示关闭，需要 numpy）"""
+        self.near_duplicate_index = None
+        if threshold <= 0 or self.db_manager is None:
+            return
+        if not NUMPY_AVAILABLE:
+            print("未安装 numpy，近似重复检测已关闭")
+            return
+        self.near_duplicate_index = NearDuplicateIndex(self.db_manager, threshold, action)
+
+    def enable_combined_analysis(self, enabled: bool = True):
+        """
+        启用合并调用：需要入库的文献用一次 JSON 结构化请求同时生成摘要、元数据和入库概要，
+        结果不符合约定时自动改为分步调用
+        """
+        self.combined_analysis = enabled
+
+    def enable_result_cache(self, enabled: bool = True, max_size_mb: int = 256):
+        """
+        启用或禁用 LLM 结果缓存：同一文档的相同请求（无论来自摘要流程还是批量入库）只付费一次，
+        总大小超过 max_size_mb 时按 LRU 淘汰
+        """
+        self.result_cache = LLMResultCache(max_size_mb=max_size_mb) if enabled else None
+        if self.llm_client:
+            self.llm_client.set_result_cache(self.result_cache)
+
+    def enable_incremental_report(self, enabled: bool = True, max_size_mb: int = 64):
+        """
+        启用或禁用增量总报告：保存归并树各节点，再次生成时只重新生成受新增或修改文献影响的分支，
+        节点总大小超过 max_size_mb 时按 LRU 淘汰
+        """
+        self.report_store = ReportStore(max_size_mb=max_size_mb) if enabled else None
+
+    def enable_job_journal(self, enabled: bool = True):
+        """启用或禁用摘要任务日志"""
+        self.journal = JobJournal() if enabled else None
+
+    def enable_incremental_scan(self, enabled: bool = True, max_failures: int = 3):
+        """启用或禁用基于文件清单的增量扫描"""
+        self.manifest = FileManifest(task='summary', max_failures=max_failures) if enabled else None
+
+    def set_schedule_policy(self, policy: str):
+        """设置同一优先级内的处理顺序：fifo 按扫描顺序，shortest_first 短文献优先，recent_first 最近修改优先"""
+        JobScheduler(policy)  # 校验策略名
+        self.schedule_policy = policy
+
+    def prioritize(self, path: str, priority: int = 10) -> int:
+        """
+        提高文件或文件夹（含子文件夹）下文件的处理优先级（越大越先处理），可在任意线程调用
+
+        运行中调用时立即调整尚未开始的文件，提高优先级的文件在下一个空位开始处理；
+        优先级在之后的运行中同样生效。
+
+        Returns:
+            当前运行中被调整的待处理文件数
+        """
+        self._priorities[path] = priority
+        scheduler = self._scheduler
+        if scheduler is None:
+            return 0
+        if os.path.isdir(path):
+            return scheduler.prioritize_folder(path, priority)
+        return 1 if scheduler.set_priority(path, priority) else 0
+
+    def _schedule(self, items: Iterable[Dict]) -> JobScheduler:
+        """
+        按调度策略和显式优先级建立本次运行的任务队列
+
+        任务惰性读取：默认的 fifo 策略下流水线取一个读一个，不必先遍历整个扫描结果；
+        其他策略或设置了显式优先级时需要比较全部文件，才会读取全部任务（并读取文件信息）。
+        """
+        scheduler = JobScheduler(self.schedule_policy)
+        scheduler.extend((item['pdf_path'], item) for item in items)
+        for path, priority in list(self._priorities.items()):
+            if os.path.isdir(path):
+                scheduler.prioritize_folder(path, priority)
+            else:
+                scheduler.set_priority(path, priority)
+        self._scheduler = scheduler
+        return scheduler
+
     def scan_pdfs(self, folder_path: str) -> List[str]:
         """扫描文件夹中的所有PDF文件"""
-        pdf_files = []
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                if file.lower().endswith('.pdf'):
-                    pdf_files.append(os.path.join(root, file))
-        return pdf_files
+        return [entry.path for entry, _ in iter_supported_files(folder_path, {'.pdf': 'pdf'})]
+
+    def scan_pending_pdfs(self, folder_path: str) -> Tuple[List[str], List[str]]:
+        """
+        增量扫描文件夹中的PDF文件
+
+        Returns:
+            (待处理的PDF列表, 未变化且已处理完成的PDF列表)；
+            未启用增量扫描时所有PDF均为待处理，摘要文件被删除的PDF重新处理
+        """
+        if self.manifest is None:
+            return self.scan_pdfs(folder_path), []
+
+        # 任务日志中仍有未完成阶段（如入库失败）的文件即使未变化也需继续处理
+        journal_pending = self.journal.pending_paths() if self.journal is not None else set()
+        pending, unchanged = [], []
+        for pdf_path, _, state in self.manifest.scan(folder_path, {'.pdf': 'pdf'}, include_unchanged=True):
+            if state == 'unchanged' and pdf_path not in journal_pending and not self._summary_deleted(pdf_path):
+                unchanged.append(pdf_path)
+            else:
+                pending.append(pdf_path)
+        return pending, unchanged
+
+    def load_summary(self, result: Dict) -> str:
+        """获取结果对应的摘要内容（未加载时从摘要文件读取）"""
+        if 'summary' not in result:
+            with open(result['summary_path'], 'r', encoding='utf-8') as f:
+                result['summary'] = f.read()
+        return result['summary']
+
+    def _record_manifest(self, result: Dict):
+        """将处理结果写入增量扫描清单"""
+        if self.manifest is None:
+            return
+        error = result.get('error')
+        self.manifest.mark(result['pdf_path'], result['status'], error[:1000] if error else None,
+                           result.get('file_hash'))
+
+    async def _find_recorded_file(self, file_path: str):
+        """
+        在提取文本前按文件原始字节哈希检查是否已入库
+
+        Returns:
+            (file_hash, 已有记录或 None) 元组
+        """
+        loop = asyncio.get_running_loop()
+        file_hash = await loop.run_in_executor(None, compute_file_hash, file_path)
+        return file_hash, self.db_manager.check_file_duplicate(file_hash)
     
-    async def process_single_pdf(self, pdf_path: str, cache_text: bool = True) -> Dict:
-        """处理单个PDF文件"""
-        try:
-            # 生成摘要文件路径
-            summary_path = pdf_path.replace('.pdf', '.summary.md')
-            
-            # 检查是否已存在摘要
-            if os.path.exists(summary_path):
-                with open(summary_path, 'r', encoding='utf-8') as f:
-                    summary = f.read()
-                return {
-                    'pdf_path': pdf_path,
-                    'summary_path': summary_path,
-                    'summary': summary,
-                    'status': 'skipped'
-                }
-            
-            # 提取文本
-            text = self.pdf_reader.extract_text(pdf_path)
-            
-            # 检查文本是否为空
-            if not text.strip():
-                return {
-                    'pdf_path': pdf_path,
-                    'error': '提取的文本为空',
-                    'status': 'failed'
-                }
-            
-            # 检查文本长度
-            if len(text.strip()) < 100:
-                return {
-                    'pdf_path': pdf_path,
-                    'error': f'提取的文本过短，可能不是有效的学术文献，文本长度: {len(text.strip())}',
-                    'status': 'failed'
-                }
-            
-            # 缓存原始文本
-            if cache_text:
-                # 确保缓存目录存在
-                os.makedirs('cache/texts', exist_ok=True)
-                text_cache_path = os.path.join('cache', 'texts', os.path.basename(pdf_path).replace('.pdf', '.txt'))
-                with open(text_cache_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
-            
-            # 生成摘要
-            if not self.llm_client:
-                raise ValueError("LLM客户端未初始化")
-                
-            # 如果设置了API请求间隔，则等待
-            if self.api_request_delay > 0:
-                await asyncio.sleep(self.api_request_delay)
-                
-            summary = await self.llm_client.generate_summary(text)
-            
-            # 检查生成的摘要是否为空
-            if not summary or not summary.strip():
+    def _stage_error(self, item: Dict, error: Exception) -> Dict:
+        """将处理阶段抛出的异常转换为失败结果"""
+        if isinstance(error, ExtractionError):
+            # 提取超时/内存超限/已隔离，文件已加入隔离名单
+            return {
+                'pdf_path': item['pdf_path'],
+                'error': str(error),
+                'status': error.status,
+                'file_hash': item.get('file_hash')
+            }
+        # 记录详细的错误信息
+        error_details = f"{str(error)}\n{traceback.format_exc()}"
+        return {
+            'pdf_path': item['pdf_path'],
+            'error': error_details,
+            'status': 'failed',
+            'file_hash': item.get('file_hash'),
+            'retries': item.get('retries', 0)
+        }
+
+    def _summary_deleted(self, pdf_path: str) -> bool:
+        """
+        增量扫描清单记录该文件已有摘要（生成成功或因摘要已存在而跳过），但摘要文件已不存在，
+        即用户删除摘要要求重新生成；因近似重复等原因跳过（未生成摘要）的文件不算
+        """
+        if self.manifest is None or os.path.exists(pdf_path.replace('.pdf', '.summary.md')):
+            return False
+        entry = self.manifest.get_entry(pdf_path)
+        return entry is not None and (
+            entry['status'] == 'success' or (entry['status'] == 'skipped' and not entry['last_error'])
+        )
+
+    async def _extract_stage(self, item: Dict) -> Dict:
+        """
+        提取阶段：跳过已有摘要的文件，自动记录时先按字节哈希去重，然后提取文本，
+        启用近似重复检测时在生成摘要前检查，与已有记录高度相似的文献直接跳过（不调用 LLM）
+
+        任务日志中有上次停止前已生成的摘要时直接恢复，不再重复调用 LLM；
+        摘要已写出但尚未入库的文档只补做入库。
+        强制刷新（item['force']）或删除摘要文件后重新处理时标记 refresh，
+        摘要阶段不读取 LLM 结果缓存，重新生成摘要。
+        """
+        pdf_path = item['pdf_path']
+        # 生成摘要文件路径
+        summary_path = pdf_path.replace('.pdf', '.summary.md')
+
+        entry = self.journal.get(pdf_path) if self.journal is not None else None
+        if item.get('force'):
+            item['refresh'] = True
+        elif entry is not None and entry['stage'] == JobJournal.STAGE_SUMMARIZED:
+            item['summary'] = entry['summary']
+            item['analysis'] = entry['analysis']
+        elif entry is not None and entry['stage'] == JobJournal.STAGE_WRITTEN and os.path.exists(summary_path):
+            item['summary_written'] = True
+            item['analysis'] = entry['analysis']
+        elif os.path.exists(summary_path) and os.path.getsize(summary_path) > 0:
+            # 检查是否已存在摘要（摘要内容在需要时通过 load_summary 读取）
+            return {
+                'pdf_path': pdf_path,
+                'summary_path': summary_path,
+                'status': 'skipped'
+            }
+        elif entry is None and await asyncio.get_running_loop().run_in_executor(
+                None, self._summary_deleted, pdf_path):
+            item['refresh'] = True
+
+        if not self.llm_client:
+            raise ValueError("LLM客户端未初始化")
+
+        # 自动记录时先按文件字节哈希去重，已入库的文件无需为计算内容哈希解析全文
+        need_record = self.auto_record_enabled and self.db_manager is not None
+        file_hash = None
+        if need_record:
+            file_hash, existing = await self._find_recorded_file(pdf_path)
+            need_record = existing is None
+
+        item.update(summary_path=summary_path, file_hash=file_hash, need_record=need_record, text=None)
+        if item.get('summary_written') and not need_record:
+            # 上次已写出摘要，入库也已完成（或未启用）
+            if self.journal is not None:
+                self.journal.finish(pdf_path)
+            return {
+                'pdf_path': pdf_path,
+                'summary_path': summary_path,
+                'status': 'skipped',
+                'file_hash': file_hash
+            }
+        if 'summary' in item or item.get('summary_written'):
+            if not need_record:
+                return item
+
+        # 在进程池中提取全文（优先命中文本缓存），避免阻塞事件循环。
+        # 摘要覆盖全文（超过上下文窗口时分块摘要），自动记录也需要全文计算内容哈希
+        text, _ = await self.extraction_pool.extract(pdf_path, use_cache=item.get('cache_text', True))
+
+        # 检查文本是否为空
+        if not text.strip():
+            return {
+                'pdf_path': pdf_path,
+                'error': '提取的文本为空',
+                'status': 'failed'
+            }
+
+        # 检查文本长度
+        if len(text.strip()) < 100:
+            return {
+                'pdf_path': pdf_path,
+                'error': f'提取的文本过短，可能不是有效的学术文献，文本长度: {len(text.strip())}',
+                'status': 'failed'
+            }
+
+        item['text'] = text
+        if need_record and self.near_duplicate_index is not None and 'summary' not in item \
+                and not item.get('summary_written'):
+            # 签名计算放到线程池避免阻塞事件循环；入库阶段用同一签名复查（同一批次中的其他版本可能已先入库）
+            signature = await asyncio.get_running_loop().run_in_executor(
+                None, self.near_duplicate_index.signature, text
+            )
+            similar = await self._find_near_duplicate(signature, pdf_path, file_hash)
+            if similar is not None:
+                # 没有生成摘要，结果中不含 summary_path
                 return {
                     'pdf_path': pdf_path,
-                    'error': '生成的摘要为空',
-                    'status': 'failed'
+                    'error': self._near_duplicate_message(similar, pdf_path),
+                    'status': 'skipped',
+                    'file_hash': file_hash
                 }
-            
-            # 保存摘要
-            with open(summary_path, 'w', encoding='utf-8') as f:
-                f.write(summary)
+            item['minhash_signature'] = signature
+        return item
+
+    async def _summarize_stage(self, item: Dict) -> Dict:
+        """LLM 阶段：生成摘要，返回后立即写入任务日志"""
+        if 'summary' in item or item.get('summary_written'):
+            # 从任务日志恢复，无需再次调用 LLM
+            return item
+
+        with track_retries() as retries, bypass_result_cache(item.get('refresh', False)):
+            try:
+                summary = await self._generate_summary(item)
+            finally:
+                item['retries'] = item.get('retries', 0) + retries.count
+
+        # 检查生成的摘要是否为空
+        if not summary or not summary.strip():
+            return {
+                'pdf_path': item['pdf_path'],
+                'error': '生成的摘要为空',
+                'status': 'failed',
+                'retries': item['retries']
+            }
+        if self.journal is not None:
+            self.journal.save_summary(item['pdf_path'], summary, item.get('analysis'))
+        item['summary'] = summary
+        return item
+
+    async def _generate_summary(self, item: Dict) -> str:
+        """生成摘要；启用合并调用时同时得到入库字段（保存在 item['analysis']）"""
+        # 无需入库时，批量入库已生成过合并结果（在结果缓存中）也直接复用其中的摘要；
+        # 全文放不进一次合并调用的文献改为分步调用（超过上下文窗口时分块摘要），摘要覆盖全文
+        if self.combined_analysis and self.llm_client.fits_combined_analysis(item['text']) and (
+                item['need_record'] or await self.llm_client.has_cached_combined_analysis(item['text'])):
+            try:
+                analysis = await self.llm_client.generate_combined_analysis(item['text'])
+            except StructuredOutputError as e:
+                print(f"合并调用结果无效，改为分步调用: {str(e)}")
+            else:
+                item['analysis'] = analysis
+                return analysis['summary']
+        return await self.llm_client.generate_summary(item['text'])
+
+    async def _write_stage(self, item: Dict) -> Dict:
+        """写出阶段：原子地保存摘要文件"""
+        if not item.get('summary_written'):
+            atomic_write_text(item['summary_path'], item['summary'])
+            if self.journal is not None and item['need_record']:
+                self.journal.mark_written(item['pdf_path'], item.get('analysis'))
+        return item
 
-            # 自动记录到数据库
-            if self.auto_record_enabled and self.db_manager:
+    async def _record_stage(self, item: Dict, cancel_token: CancellationToken = None) -> Dict:
+        """
+        入库阶段：自动记录到数据库，返回最终结果
+
+        取消后不再发起入库的 LLM 调用，只返回已写出的摘要；任务日志保留该文件，下次运行只补做入库。
+        """
+        recorded = True
+        if item['need_record'] and cancel_token is not None and cancel_token.cancelled:
+            recorded = False
+        elif item['need_record']:
+            with track_retries() as retries:
                 try:
-                    await self._auto_record(pdf_path, text, 'pdf')
+                    await self._auto_record(item['pdf_path'], item['text'], 'pdf', item['file_hash'],
+                                            item.get('analysis'), try_combined=False,
+                                            minhash_signature=item.get('minhash_signature'))
                 except Exception as e:
+                    recorded = False
                     print(f"自动记录失败: {str(e)}")
-                
+            item['retries'] = item.get('retries', 0) + retries.count
+
+        # 入库失败时保留日志记录，下次运行只补做入库
+        if self.journal is not None and recorded:
+            self.journal.finish(item['pdf_path'])
+
+        return {
+            'pdf_path': item['pdf_path'],
+            'summary_path': item['summary_path'],
+            'summary': item.get('summary'),
+            'status': 'success',
+            'file_hash': item['file_hash'],
+            'retries': item.get('retries', 0)
+        }
+
+    def _llm_workers(self, concurrency: int) -> int:
+        """LLM 阶段的协程数：启用自适应并发时实际并发由控制器限制，协程数按上限准备"""
+        if self.adaptive_concurrency and self.llm_client is not None:
+            self.llm_client.set_adaptive_concurrency(True, concurrency, self.max_concurrency)
+            return max(concurrency, self.max_concurrency)
+        return concurrency
+
+    def _build_pipeline(self, concurrency: int, stage_workers: Dict[str, int] = None,
+                        cancel_token: CancellationToken = None) -> Pipeline:
+        """
+        构建摘要流水线：提取 → LLM → 写出 → 入库
+
+        取消后提取和 LLM 阶段丢弃排队中的文件；写出和入库阶段仍处理已生成摘要的文件（不再发起新的 LLM 调用），
+        已付费的摘要都会写出并作为结果产出。
+
+        Args:
+            concurrency: LLM 阶段（以及入库阶段）的并行数；启用自适应并发时为初始并发上限
+            stage_workers: 按阶段名覆盖并行数，如 {'extract': 4}
+            cancel_token: 与 Pipeline.run 使用的取消标记相同
+        """
+        concurrency = self._llm_workers(concurrency)
+        workers = {
+            'extract': self.extraction_pool.max_workers,
+            'summarize': concurrency,
+            'write': 1,
+            'record': concurrency if self.auto_record_enabled and self.db_manager else 1,
+        }
+        workers.update(stage_workers or {})
+        stages = [
+            Stage('extract', self._extract_stage, workers['extract']),
+            Stage('summarize', self._summarize_stage, workers['summarize']),
+            Stage('write', self._write_stage, workers['write'], finish_on_cancel=True),
+            Stage('record', lambda item: self._record_stage(item, cancel_token), workers['record'],
+                  finish_on_cancel=True),
+        ]
+        return Pipeline(stages, is_done=lambda item: 'status' in item, on_error=self._stage_error)
+
+    async def process_single_pdf(self, pdf_path: str, cache_text: bool = True) -> Dict:
+        """处理单个PDF文件（依次执行流水线各阶段）"""
+        item = {'pdf_path': pdf_path, 'cache_text': cache_text}
+        try:
+            for stage in (self._extract_stage, self._summarize_stage, self._write_stage, self._record_stage):
+                item = await stage(item)
+                if 'status' in item:
+                    break
+            return item
+        except Exception as e:
+            return self._stage_error(item, e)
+
+    async def iter_process_pdfs(self, pdf_paths: Iterable[str], concurrency: int = 5,
+                                cache_text: bool = True,
+                                stage_workers: Dict[str, int] = None,
+                                progress: ProgressTracker = None,
+                                cancel_token: CancellationToken = None,
+                                force: bool = False) -> AsyncIterator[Dict]:
+        """
+        通过分阶段流水线处理多个PDF文件，按完成顺序逐个产出结果
+
+        各阶段之间用有界队列连接，同时在处理中的文件数量有上限（任务队列中只保存路径）；
+        pdf_paths 可以是生成器（如增量扫描结果）。
+        传入 progress 时，每产出一个结果前先更新进度统计。
+        cancel_token 被取消后不再开始新的 LLM 调用：进行中的调用完成并写出摘要，排队中的文件不再处理。
+        文件按调度策略和显式优先级（见 prioritize）出队，流水线有空位时才取下一个文件。
+        force 为 True 时（强制刷新）已有摘要的文件也重新生成，且不使用 LLM 结果缓存中的旧结果。
+        """
+        pipeline = self._build_pipeline(concurrency, stage_workers, cancel_token)
+        scheduler = self._schedule({'pdf_path': pdf_path, 'cache_text': cache_text, 'force': force}
+                                   for pdf_path in pdf_paths)
+        try:
+            async for result in pipeline.run(scheduler, cancel_token):
+                self._record_manifest(result)
+                if progress is not None:
+                    progress.update(result)
+                yield result
+        finally:
+            self._scheduler = None
+
+    async def run_items(self, items: Union[Iterable[Dict], AsyncIterable[Dict]], task: str = 'summary', concurrency: int = 5,
+                        cancel_token: CancellationToken = None) -> AsyncIterator[Dict]:
+        """
+        按读取顺序处理任务（不经过调度队列），按完成顺序逐个产出结果
+
+        用于任务来源自行决定顺序的场合（如共享任务队列的 worker 按需领取任务）：
+        流水线有空位时才读取下一个任务，items 可以是异步生成器。
+
+        Args:
+            items: 任务字典序列，包含 pdf_path、cache_text，入库任务（task='record'）还需 file_type
+            task: 'summary' 生成摘要（并按设置入库），'record' 只入库
+        """
+        if task == 'record':
+            pipeline = self._build_record_pipeline(concurrency)
+        else:
+            pipeline = self._build_pipeline(concurrency, cancel_token=cancel_token)
+        async for result in pipeline.run(items, cancel_token):
+            if task != 'record':
+                self._record_manifest(result)
+            yield result
+
+    async def process_pdfs(self, pdf_paths: List[str], concurrency: int = 5,
+                          cache_text: bool = True,
+                          progress_callback: Callable[[Dict, ProgressTracker], None] = None,
+                          cancel_token: CancellationToken = None) -> List[Dict]:
+        """
+        并行处理多个PDF文件，返回全部结果（按完成顺序）
+
+        Args:
+            progress_callback: 每完成一个文件时调用 callback(result, progress)
+            cancel_token: 取消标记，取消后只返回取消前已在处理中的文件的结果
+        """
+        progress = ProgressTracker(len(pdf_paths))
+        results = []
+        async for result in self.iter_process_pdfs(pdf_paths, concurrency, cache_text, progress=progress,
+                                                   cancel_token=cancel_token):
+            if progress_callback is not None:
+                progress_callback(result, progress)
+            results.append(result)
+        return results
+
+    async def _record_extract_stage(self, item: Dict) -> Dict:
+        """入库提取阶段：先按文件原始字节哈希去重（已入库的文件无需提取文本），再提取全文"""
+        file_path = item['pdf_path']
+        file_hash, existing = await self._find_recorded_file(file_path)
+        item['file_hash'] = file_hash
+        if existing:
             return {
-                'pdf_path': pdf_path,
-                'summary_path': summary_path,
-                'summary': summary,
-                'status': 'success'
+                'pdf_path': file_path,
+                'error': f"已存在于数据库中: {existing.get('title', file_path)}",
+                'status': 'skipped',
+                'file_hash': file_hash
             }
-        except Exception as e:
-            # 记录详细的错误信息
-            error_details = f"{str(e)}\n{traceback.format_exc()}"
+
+        text, _ = await self.extraction_pool.extract(file_path, use_cache=item.get('cache_text', True))
+        if len(text.strip()) < 100:
             return {
-                'pdf_path': pdf_path,
-                'error': error_details,
-                'status': 'failed'
+                'pdf_path': file_path,
+                'error': f'提取的文本过短，文本长度: {len(text.strip())}',
+                'status': 'skipped',
+                'file_hash': file_hash
             }
-    
-    async def process_pdfs(self, pdf_paths: List[str], concurrency: int = 5, 
-                          cache_text: bool = True) -> List[Dict]:
-        """并行处理多个PDF文件"""
-        # 创建任务列表
-        semaphore = asyncio.Semaphore(concurrency)
-        
-        async def process_with_semaphore(pdf_path):
-            async with semaphore:
-                return await self.process_single_pdf(pdf_path, cache_text)
-        
-        # 并行执行任务
-        tasks = [process_with_semaphore(pdf_path) for pdf_path in pdf_paths]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # 处理结果
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                # 记录详细的异常信息
-                error_details = f"{str(result)}\n{traceback.format_exc()}"
-                processed_results.append({
-                    'pdf_path': pdf_paths[i],
-                    'error': error_details,
-                    'status': 'failed'
-                })
-            else:
-                processed_results.append(result)
-                
-        return processed_results
-    
-    async def generate_overall_report(self, summaries: List[str]) -> str:
-        """生成总体报告"""
+        item['text'] = text
+        return item
+
+    async def _record_file_stage(self, item: Dict) -> Dict:
+        """入库阶段：去重后生成入库字段（启用合并调用时优先一次生成）并写入数据库"""
+        with track_retries() as retries:
+            try:
+                result = await self._auto_record(item['pdf_path'], item['text'], item['file_type'],
+                                                 item['file_hash'], try_combined=self.combined_analysis)
+            finally:
+                item['retries'] = retries.count
+        result.update(pdf_path=item['pdf_path'], file_hash=item['file_hash'], retries=item['retries'])
+        return result
+
+    def _build_record_pipeline(self, concurrency: int) -> Pipeline:
+        """构建入库流水线：提取 → 入库"""
+        if not (self.auto_record_enabled and self.db_manager):
+            raise ValueError("未启用自动记录")
+        if not self.llm_client:
+            raise ValueError("LLM客户端未初始化")
+        return Pipeline(
+            [
+                Stage('extract', self._record_extract_stage, self.extraction_pool.max_workers),
+                Stage('record', self._record_file_stage, self._llm_workers(concurrency)),
+            ],
+            is_done=lambda item: 'status' in item,
+            on_error=self._stage_error
+        )
+
+    async def iter_record_files(self, files: Iterable[Tuple[str, str]], concurrency: int = 5,
+                                cache_text: bool = True,
+                                progress: ProgressTracker = None,
+                                cancel_token: CancellationToken = None) -> AsyncIterator[Dict]:
+        """
+        只入库不生成摘要（批量入库），按完成顺序逐个产出结果
+
+        与摘要流水线共用提取进程池、文本缓存、LLM 结果缓存、去重逻辑和调度策略：
+        提取阶段按提取进程数并行，LLM 入库阶段按 concurrency 并行。
+
+        Args:
+            files: (文件路径, 文件类型) 序列
+        """
+        pipeline = self._build_record_pipeline(concurrency)
+        scheduler = self._schedule({'pdf_path': file_path, 'file_type': file_type, 'cache_text': cache_text}
+                                   for file_path, file_type in files)
+        try:
+            async for result in pipeline.run(scheduler, cancel_token):
+                if progress is not None:
+                    progress.update(result)
+                yield result
+        finally:
+            self._scheduler = None
+
+    async def record_single_file(self, file_path: str, file_type: str, cache_text: bool = True) -> Dict:
+        """提取文件全文并自动记录到数据库（用于不生成摘要的 Word/Markdown 文件）"""
+        if not (self.auto_record_enabled and self.db_manager):
+            return {
+                'pdf_path': file_path,
+                'error': '未启用自动记录',
+                'status': 'skipped'
+            }
+        item = {'pdf_path': file_path, 'file_type': file_type, 'cache_text': cache_text}
+        try:
+            if not self.llm_client:
+                raise ValueError("LLM客户端未初始化")
+            for stage in (self._record_extract_stage, self._record_file_stage):
+                item = await stage(item)
+                if 'status' in item:
+                    break
+            return item
+        except Exception as e:
+            return self._stage_error(item, e)
+
+    async def process_new_file(self, file_path: str, file_type: str, cache_text: bool = True) -> Dict:
+        """
+        处理监视模式下新放入的文件
+
+        PDF 生成摘要（并按设置自动记录），Word/Markdown 只自动记录到数据库。
+        """
+        if file_type == 'pdf':
+            result = await self.process_single_pdf(file_path, cache_text)
+            self._record_manifest(result)
+        else:
+            result = await self.record_single_file(file_path, file_type, cache_text)
+        result['file_type'] = file_type
+        return result
+
+    async def generate_overall_report(self, summaries: List[str], concurrency: int = 5) -> str:
+        """
+        生成总体报告
+
+        摘要总量超过上下文窗口时分组并发归并（见 ReportReducer），concurrency 为同一层的并发调用数；
+        启用增量总报告时未变化的分组直接复用上次的结果。
+        """
         if not self.llm_client:
             raise ValueError("LLM客户端未初始化")
             
-        # 如果设置了API请求间隔，则等待
-        if self.api_request_delay > 0:
-            await asyncio.sleep(self.api_request_delay)
-            
-        report = await self.llm_client.generate_overall_report(summaries)
+        report = await ReportReducer(self.llm_client, concurrency, self.report_store).generate(summaries)
         
         # 在总体报告后追加各个文献的摘要
         report_with_summaries = report + "\n\n---\n\n# 附录：各文献摘要详情\n\n"
@@ -186,55 +730,127 @@ class LiteratureProcessor:
         
         # 保存总报告
         report_path = 'overall_report.md'
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_with_summaries)
+        atomic_write_text(report_path, report_with_summaries)
             
         return report_with_summaries
 
-    async def _auto_record(self, file_path: str, text: str, file_type: str):
-        """自动记录文献到数据库"""
-        # 计算内容哈希并检查重复
+    async def _auto_record(self, file_path: str, text: str, file_type: str, file_hash: str = None,
+                           analysis: Dict = None, try_combined: bool = False, minhash_signature=None) -> Dict:
+        """
+        自动记录文献到数据库（file_hash 为文件原始字节哈希，调用方已确认其未入库）
+
+        analysis 为合并调用已生成的入库字段，提供时不再单独调用 LLM 提取元数据和生成概要；
+        try_combined 为 True 时先尝试一次合并调用（结果同时写入 LLM 结果缓存，之后生成摘要可直接复用）。
+        minhash_signature 为提取阶段已计算的 MinHash 签名，提供时不再重新计算。
+
+        Returns:
+            {'status': 'success', 'title': 标题} 或 {'status': 'skipped', 'error': 跳过原因}
+        """
+        # 计算内容哈希并检查重复（字节不同但文本相同，如重新导出的副本）
         content_hash = compute_content_hash(text)
         existing = self.db_manager.check_duplicate(content_hash)
         if existing:
+            if file_hash:
+                self.db_manager.set_file_hash(existing['id'], file_hash)
             print(f"文献已存在于数据库中: {existing.get('title', file_path)}")
-            return
+            return {'status': 'skipped', 'error': f"已存在于数据库中: {existing.get('title', file_path)}"}
+        # 同一批次中内容相同、尚未入库的文件只处理一次
+        if content_hash in self._pending_hashes:
+            return {'status': 'skipped', 'error': '与正在入库的文件内容相同'}
+        self._pending_hashes.add(content_hash)
+        try:
+            return await self._record_new_document(file_path, text, file_type, file_hash, content_hash,
+                                                   analysis, try_combined, minhash_signature)
+        finally:
+            self._pending_hashes.discard(content_hash)
 
-        # LLM 提取元数据
-        raw_json = await self.llm_client.call_with_prompt_type("extract_metadata", text)
-        # 解析 JSON 响应（尝试提取 JSON 部分）
-        metadata = self._parse_metadata_json(raw_json)
+    async def _find_near_duplicate(self, signature, file_path: str, file_hash: str = None):
+        """按 MinHash 签名查找高度相似的已有记录（处理方式为 link 时同时关联文件），没有时返回 None"""
+        similar, _ = await asyncio.get_running_loop().run_in_executor(
+            None, self.near_duplicate_index.check_signature, signature, file_path, file_hash
+        )
+        if similar is not None:
+            print(f"文献{self._near_duplicate_message(similar, file_path)}")
+        return similar
 
-        title = metadata.get('title', os.path.basename(file_path))
-        keywords = metadata.get('keywords', '')
-        abstract = metadata.get('abstract', '')
-        is_english = metadata.get('is_english', False)
+    @staticmethod
+    def _near_duplicate_message(similar: Dict, file_path: str) -> str:
+        return f"与已有记录高度相似（{similar['similarity']:.0%}）: {similar.get('title', file_path)}"
+
+    async def _record_new_document(self, file_path: str, text: str, file_type: str, file_hash: str,
+                                   content_hash: str, analysis: Dict, try_combined: bool,
+                                   minhash_signature=None) -> Dict:
+        """近似重复检测后生成入库字段并写入数据库"""
+        # 近似重复检测（同一文献的不同版本），签名计算放到线程池避免阻塞事件循环
+        minhash_fields = {}
+        if self.near_duplicate_index is not None:
+            if minhash_signature is None:
+                minhash_signature = await asyncio.get_running_loop().run_in_executor(
+                    None, self.near_duplicate_index.signature, text
+                )
+            similar = await self._find_near_duplicate(minhash_signature, file_path, file_hash)
+            if similar is not None:
+                return {'status': 'skipped', 'error': self._near_duplicate_message(similar, file_path)}
+            minhash_fields = self.near_duplicate_index.record_fields(minhash_signature)
+
+        if analysis is None and try_combined:
+            try:
+                analysis = await self.llm_client.generate_combined_analysis(text)
+            except StructuredOutputError as e:
+                print(f"合并调用结果无效，改为分步调用: {str(e)}")
+
+        # 入库字段的依赖关系：翻译摘要依赖元数据中的摘要，生成概要只依赖全文，
+        # 因此"生成概要"与"提取元数据 → 翻译摘要"并发执行（均经过共享限流器）
+        async def extract_metadata(_):
+            if analysis:
+                return analysis
+            # LLM 提取元数据，解析 JSON 响应（尝试提取 JSON 部分）
+            raw_json = await self.llm_client.call_with_prompt_type("extract_metadata", text)
+            return self._parse_metadata_json(raw_json)
 
-        # 如果是英文文献，翻译摘要
-        abstract_cn = ''
-        if is_english and abstract:
-            if self.api_request_delay > 0:
-                await asyncio.sleep(self.api_request_delay)
-            abstract_cn = await self.llm_client.call_with_prompt_type("translate_abstract", abstract)
+        async def translate_abstract(deps):
+            # 如果是英文文献，翻译摘要
+            metadata = deps['metadata']
+            abstract_cn = metadata.get('abstract_cn', '') if analysis else ''
+            if metadata.get('is_english', False) and metadata.get('abstract', '') and not abstract_cn:
+                abstract_cn = await self.llm_client.call_with_prompt_type("translate_abstract", metadata['abstract'])
+            return abstract_cn
 
-        # 生成中文概要
-        if self.api_request_delay > 0:
-            await asyncio.sleep(self.api_request_delay)
-        summary = await self.llm_client.call_with_prompt_type("generate_record_summary", text)
+        async def generate_record_summary(_):
+            # 生成中文概要
+            if analysis:
+                return analysis['record_summary']
+            return await self.llm_client.call_with_prompt_type("generate_record_summary", text)
+
+        graph = TaskGraph()
+        graph.add('metadata', extract_metadata)
+        graph.add('abstract_cn', translate_abstract, deps=['metadata'])
+        graph.add('summary', generate_record_summary)
+        fields = await graph.run()
+
+        metadata = fields['metadata']
+        title = metadata.get('title') or os.path.basename(file_path)
+        keywords = metadata.get('keywords', '')
+        abstract = metadata.get('abstract', '')
+        abstract_cn = fields['abstract_cn']
+        summary = fields['summary']
 
         # 插入数据库
         record = {
             'file_path': file_path,
             'file_type': file_type,
             'content_hash': content_hash,
+            'file_hash': file_hash,
             'title': title,
             'keywords': keywords,
             'abstract': abstract,
             'abstract_cn': abstract_cn,
             'summary': summary,
         }
+        record.update(minhash_fields)
         self.db_manager.insert_record(record)
         print(f"已记录到数据库: {title}")
+        return {'status': 'success', 'title': title}
 
     def _parse_metadata_json(self, raw: str) -> Dict:
         """解析 LLM 返回的 JSON 元数据"""
@@ -263,4 +879,54 @@ class LiteratureProcessor:
 
         # 解析失败，返回空字典
         print(f"警告: 无法解析元数据JSON: {raw[:200]}")
-        return {}
\ No newline at end of file
+        return {}
+
+
+def configure_processor(processor: LiteratureProcessor, config: Dict):
+    """按配置初始化处理器（LLM客户端、提取进程池、数据库和增量扫描），摘要、监视和批量入库共用"""
+    # 初始化LLM客户端
+    processor.initialize_llm_client(
+        config['base_url'],
+        config['api_key'],
+        config['max_tokens'],
+        config['model']
+    )
+
+    # 设置API请求间隔和每分钟请求数/token数上限（进程内所有LLM调用共享）
+    if 'api_request_delay' in config:
+        processor.set_api_request_delay(config['api_request_delay'])
+    processor.set_rate_limits(config.get('rate_limit_rpm', 0), config.get('rate_limit_tpm', 0))
+    processor.set_retry_policy(config.get('llm_max_retries', 3), config.get('llm_retry_max_delay', 60))
+    processor.set_adaptive_concurrency(
+        config.get('adaptive_concurrency', False),
+        config.get('max_concurrency', 32)
+    )
+    processor.enable_result_cache(config.get('cache_llm_results', True), config.get('llm_cache_max_mb', 256))
+    processor.set_context_window(config.get('context_window', 16000))
+    processor.set_chunk_concurrency(config.get('chunk_concurrency', 2))
+    processor.enable_incremental_report(config.get('incremental_report', True), config.get('report_cache_max_mb', 64))
+    processor.set_schedule_policy(config.get('schedule_policy', 'fifo'))
+
+    # 设置文本提取进程数和文本缓存容量
+    processor.set_extract_workers(config.get('extract_workers', 0))
+    processor.set_text_cache_limit(config.get('text_cache_max_mb', 1024))
+    processor.set_extract_limits(
+        config.get('extract_timeout', 300),
+        config.get('extract_memory_limit_mb', 2048)
+    )
+
+    # 初始化数据库并启用自动记录
+    if config.get('auto_record', False):
+        processor.initialize_database(config.get('db_path', 'literature_records.db'))
+        processor.enable_auto_record(True)
+        processor.enable_near_duplicate_detection(
+            config.get('near_duplicate_threshold', 0.9),
+            config.get('near_duplicate_action', 'link')
+        )
+        processor.enable_combined_analysis(config.get('combined_analysis', False))
+
+    processor.enable_incremental_scan(
+        config.get('incremental_scan', True),
+        config.get('max_failures', 3)
+    )
+    processor.enable_job_journal(True)
@@ -0,0 +1,80 @@
+import time
+from typing import Dict, Optional
+
+
+class ProgressTracker:
+    """
+    批处理进度统计
+
+    按状态计数已完成的文件，并根据实际处理（不含跳过）的文件计算吞吐量和预计剩余时间。
+    """
+
+    def __init__(self, total: int):
+        """
+        Args:
+            total: 待处理文件总数
+        """
+        self.total = total
+        self.counts: Dict[str, int] = {}
+        self.completed = 0
+        self.retries = 0  # LLM 请求累计重试次数
+        self.start_time = time.monotonic()
+
+    def update(self, result: Dict):
+        """记录一个已完成的结果"""
+        status = result.get('status', 'failed')
+        self.counts[status] = self.counts.get(status, 0) + 1
+        self.completed += 1
+        self.retries += result.get('retries', 0)
+
+    @property
+    def percent(self) -> int:
+        if self.total <= 0:
+            return 100
+        return int(self.completed * 100 / self.total)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start_time
+
+    @property
+    def failed(self) -> int:
+        return self.completed - self.counts.get('success', 0) - self.counts.get('skipped', 0)
+
+    @property
+    def rate(self) -> float:
+        """每分钟实际处理的文件数（跳过的文件不计入）"""
+        processed = self.completed - self.counts.get('skipped', 0)
+        elapsed = self.elapsed
+        if processed <= 0 or elapsed <= 0:
+            return 0.0
+        return processed * 60 / elapsed
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """预计剩余时间（秒），尚无法估计时返回 None"""
+        remaining = self.total - self.completed
+        if remaining <= 0:
+            return 0.0
+        rate = self.rate
+        if rate <= 0:
+            return None
+        return remaining * 60 / rate
+
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        seconds = int(seconds)
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+    def format_status(self) -> str:
+        """返回一行进度描述"""
+        eta = self.eta_seconds
+        eta_text = self._format_duration(eta) if eta is not None else "估算中"
+        status = (
+            f"已完成 {self.completed}/{self.total} ({self.percent}%)，"
+            f"成功 {self.counts.get('success', 0)}，跳过 {self.counts.get('skipped', 0)}，失败 {self.failed}，"
+            f"速度 {self.rate:.1f} 篇/分钟，已用时 {self._format_duration(self.elapsed)}，预计剩余 {eta_text}"
+        )
+        if self.retries:
+            status += f"，LLM重试 {self.retries} 次"
+        return status
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import socket
+from typing import AsyncIterator, Callable, Dict
+
+from core.pipeline import CancellationToken
+from core.processor import LiteratureProcessor
+from utils.job_queue import JobQueue
+
+# 视为处理成功的结果状态（其余状态提交为失败，未用完领取次数时会被重新领取）
+_DONE_STATUSES = ('success', 'skipped')
+
+
+class QueueWorker:
+    """
+    共享任务队列的 worker
+
+    持有的任务数少于 concurrency（能立即开始处理）时才从 JobQueue 领取下一个任务，
+    不会提前囤积租约，多个 worker 之间的任务分配均匀；处理期间按租约时长的三分之一定期续约，
+    完成后提交结果。领取、续约和提交都是带锁等待的 SQLite 事务，在线程池中执行，不阻塞事件循环中的 LLM 请求。任意数量的进程或机器可同时运行 worker（数据库文件和文献放在共享存储上，
+    各机器上的路径需相同），吞吐量随 worker 数增加，直到 LLM 服务达到上限。
+    """
+
+    def __init__(self, processor: LiteratureProcessor, queue: JobQueue, task: str = 'summary',
+                 worker_id: str = None, concurrency: int = 5, lease_seconds: float = 300,
+                 cache_text: bool = True):
+        """
+        Args:
+            processor: 已按配置初始化的处理器
+            queue: 共享任务队列
+            task: 领取的任务类型（'summary' 或 'record'）
+            worker_id: worker 标识，默认为"主机名:进程号"
+            concurrency: LLM 并发数
+            lease_seconds: 租约时长（秒），worker 失联超过该时间后任务可被其他 worker 领取
+            cache_text: 是否使用提取文本缓存
+        """
+        self.processor = processor
+        self.queue = queue
+        self.task = task
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.cache_text = cache_text
+        self.cancel_token = CancellationToken()
+        self.counts: Dict[str, int] = {}  # 本 worker 处理结果按状态计数
+        self._active: Dict[str, int] = {}  # 已领取、尚未提交的任务：文件路径 -> 任务 ID
+        self._slot_freed: asyncio.Event = None  # 有任务处理完成（持有的任务数减少）
+
+    def stop(self):
+        """请求停止：不再领取新任务，进行中的任务处理完后结束（可在任意线程调用）"""
+        self.cancel_token.cancel()
+
+    async def _claim_items(self) -> AsyncIterator[Dict]:
+        """按需领取任务，队列中没有可领取的任务或已停止时结束"""
+        loop = asyncio.get_event_loop()
+        while not self.cancel_token.cancelled:
+            # 只领取能立即开始处理的任务
+            while len(self._active) >= self.concurrency:
+                self._slot_freed.clear()
+                await self._slot_freed.wait()
+            if self.cancel_token.cancelled:
+                return
+            jobs = await loop.run_in_executor(None, self.queue.claim, self.worker_id, self.task, self.lease_seconds)
+            if not jobs:
+                return
+            job = jobs[0]
+            self._active[job['file_path']] = job['id']
+            yield {'pdf_path': job['file_path'], 'file_type': job['file_type'], 'cache_text': self.cache_text}
+
+    async def _heartbeat(self):
+        """定期为进行中的任务续约"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            job_ids = list(self._active.values())
+            if job_ids:
+                await loop.run_in_executor(None, self.queue.heartbeat, self.worker_id, job_ids, self.lease_seconds)
+
+    async def _submit(self, result: Dict) -> bool:
+        job_id = self._active.get(result['pdf_path'])
+        if job_id is None:
+            return False
+        status = result['status']
+        self.counts[status] = self.counts.get(status, 0) + 1
+        summary = {key: result.get(key) for key in ('status', 'summary_path', 'title', 'file_hash', 'retries')
+                   if result.get(key) is not None}
+        error = None if status in _DONE_STATUSES else (result.get('error') or status)
+        if status == 'skipped' and result.get('error'):
+            summary['error'] = result['error']
+        submitted = await asyncio.get_event_loop().run_in_executor(
+            None, self.queue.complete, job_id, self.worker_id, summary, error
+        )
+        # 结果提交后才释放名额、领取下一个任务
+        del self._active[result['pdf_path']]
+        self._slot_freed.set()
+        return submitted
+
+    async def run_once(self, on_result: Callable[[Dict, bool], None] = None) -> int:
+        """
+        处理队列中当前可领取的所有任务
+
+        Args:
+            on_result: 每完成一个任务时调用 on_result(结果, 是否提交成功)
+
+        Returns:
+            本轮处理的任务数
+        """
+        self._slot_freed = asyncio.Event()
+        heartbeat = asyncio.ensure_future(self._heartbeat())
+        count = 0
+        try:
+            async for result in self.processor.run_items(self._claim_items(), self.task, self.concurrency,
+                                                         self.cancel_token):
+                submitted = await self._submit(result)
+                count += 1
+                if on_result is not None:
+                    on_result(result, submitted)
+        finally:
+            heartbeat.cancel()
+            # 已领取但未开始处理的任务（停止时）归还队列
+            if self._active:
+                await asyncio.get_event_loop().run_in_executor(
+                    None, self.queue.release, self.worker_id, list(self._active.values())
+                )
+                self._active.clear()
+        return count
+
+    async def run(self, follow: bool = False, poll_interval: float = 10,
+                  on_result: Callable[[Dict, bool], None] = None):
+        """
+        运行 worker
+
+        Args:
+            follow: 队列为空后是否继续等待新任务（直到 stop）
+            poll_interval: 等待新任务时的轮询间隔（秒）
+        """
+        while not self.cancel_token.cancelled:
+            await self.run_once(on_result)
+            if not follow:
+                return
+            waited = 0.0
+            while waited < poll_interval and not self.cancel_token.cancelled:
+                await asyncio.sleep(min(1.0, poll_interval))
+                waited += 1.0
@@ -2,154 +2,81 @@ import os
 import sys
 import asyncio
 import traceback
-import json
-import re
-from typing import List
+from typing import List, Tuple
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from PyQt5.QtCore import QThread, pyqtSignal
-from utils.text_extractor import TextExtractor, compute_content_hash, scan_all_files
-from utils.database import DatabaseManager
-from utils.llm_client import LLMClient
+
+from core.pipeline import CancellationToken
+from core.processor import LiteratureProcessor, configure_processor
+from core.progress import ProgressTracker
+from utils.text_extractor import scan_all_files
+from utils.extraction_pool import ExtractionPool
+from utils.file_manifest import FileManifest
 
 
 class RecordWorker(QThread):
-    """批量入库工作线程"""
+    """
+    批量入库工作线程
+
+    入库流程由 LiteratureProcessor 统一实现（与摘要流程共用提取进程池、文本缓存、
+    LLM 结果缓存和去重逻辑），本线程只负责扫描文件、记录增量清单和通知界面。
+    """
     log_signal = pyqtSignal(str)
     progress_signal = pyqtSignal(int)
     finished_signal = pyqtSignal(int)  # 处理的记录数量
     error_signal = pyqtSignal(str)
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, extraction_pool: ExtractionPool = None):
         super().__init__()
         self.config = config
-        self.text_extractor = TextExtractor()
-        self.db_manager = DatabaseManager(config.get('db_path', 'literature_records.db'))
-        self.llm_client = None
-        self._stop_flag = False
+        # 与摘要流程共用同一个提取进程池
+        self.processor = LiteratureProcessor(extraction_pool)
+        self.manifest = None
+        if config.get('incremental_scan', True):
+            self.manifest = FileManifest(task='record', max_failures=config.get('max_failures', 3))
+        self.cancel_token = CancellationToken()
 
     def stop(self):
-        """请求停止处理"""
-        self._stop_flag = True
+        """请求停止处理：不再开始新文件，进行中的文件处理完后结束"""
+        self.cancel_token.cancel()
 
     def run(self):
         try:
-            # 初始化 LLM 客户端
-            self.llm_client = LLMClient(
-                self.config['base_url'],
-                self.config['api_key'],
-                self.config.get('max_tokens', 2048),
-                self.config.get('model', 'gpt-3.5-turbo')
-            )
+            # 初始化 LLM 客户端、数据库和去重（与摘要流程使用相同配置）
+            configure_processor(self.processor, dict(self.config, auto_record=True))
 
-            # 初始化数据库
-            self.db_manager.init_db()
-
-            # 扫描所有支持的文件
+            # 扫描所有支持的文件（增量扫描时只包含新增、已变化或上次失败的文件）
             folder_path = self.config['folder_path']
             self.log_signal.emit(f"正在扫描文件夹: {folder_path}")
-            all_files = scan_all_files(folder_path)
+            if self.manifest is not None:
+                all_files = [(path, file_type) for path, file_type, _ in self.manifest.scan(folder_path)]
+            else:
+                all_files = scan_all_files(folder_path)
 
             if not all_files:
-                self.log_signal.emit("未找到支持的文件（PDF/DOCX/MD）")
+                self.log_signal.emit("未找到需要入库的文件（PDF/DOCX/MD）")
                 self.finished_signal.emit(0)
                 return
 
             self.log_signal.emit(f"找到 {len(all_files)} 个文件")
 
-            # 创建事件循环处理异步任务
+            # 在同一个事件循环中通过分阶段流水线并发处理：提取阶段按提取进程数并行，
+            # LLM 入库阶段按并发数并行，停止后不再开始新文件
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
+            try:
+                progress = loop.run_until_complete(self._run_pipeline(all_files))
+            finally:
+                loop.close()
 
-            success_count = 0
-            skip_count = 0
-            fail_count = 0
-
-            for i, (file_path, file_type) in enumerate(all_files):
-                if self._stop_flag:
-                    self.log_signal.emit("批量入库已停止")
-                    break
-
-                try:
-                    filename = os.path.basename(file_path)
-                    self.log_signal.emit(f"正在处理 [{i+1}/{len(all_files)}]: {filename}")
-
-                    # 提取文本
-                    text, _ = self.text_extractor.extract(file_path)
-
-                    if not text.strip() or len(text.strip()) < 100:
-                        self.log_signal.emit(f"  跳过: 文本过短或为空")
-                        skip_count += 1
-                        continue
-
-                    # 去重检查
-                    content_hash = compute_content_hash(text)
-                    existing = self.db_manager.check_duplicate(content_hash)
-                    if existing:
-                        self.log_signal.emit(f"  跳过: 已存在于数据库中 ({existing.get('title', filename)})")
-                        skip_count += 1
-                        continue
-
-                    # LLM 提取元数据
-                    api_delay = self.config.get('api_request_delay', 0)
-                    if api_delay > 0:
-                        loop.run_until_complete(asyncio.sleep(api_delay))
-
-                    raw_json = loop.run_until_complete(
-                        self.llm_client.call_with_prompt_type("extract_metadata", text)
-                    )
-                    metadata = self._parse_metadata_json(raw_json)
-
-                    title = metadata.get('title', filename)
-                    keywords = metadata.get('keywords', '')
-                    abstract = metadata.get('abstract', '')
-                    is_english = metadata.get('is_english', False)
-
-                    # 英文文献翻译摘要
-                    abstract_cn = ''
-                    if is_english and abstract:
-                        if api_delay > 0:
-                            loop.run_until_complete(asyncio.sleep(api_delay))
-                        abstract_cn = loop.run_until_complete(
-                            self.llm_client.call_with_prompt_type("translate_abstract", abstract)
-                        )
-
-                    # 生成中文概要
-                    if api_delay > 0:
-                        loop.run_until_complete(asyncio.sleep(api_delay))
-                    summary = loop.run_until_complete(
-                        self.llm_client.call_with_prompt_type("generate_record_summary", text)
-                    )
-
-                    # 插入数据库
-                    record = {
-                        'file_path': file_path,
-                        'file_type': file_type,
-                        'content_hash': content_hash,
-                        'title': title,
-                        'keywords': keywords,
-                        'abstract': abstract,
-                        'abstract_cn': abstract_cn,
-                        'summary': summary,
-                    }
-                    self.db_manager.insert_record(record)
-                    self.log_signal.emit(f"  已入库: {title}")
-                    success_count += 1
-
-                except Exception as e:
-                    error_details = f"{str(e)}"
-                    self.log_signal.emit(f"  处理失败: {error_details}")
-                    fail_count += 1
-
-                # 更新进度
-                progress = int((i + 1) / len(all_files) * 100)
-                self.progress_signal.emit(progress)
-
-            loop.close()
-
+            if self.cancel_token.cancelled:
+                self.log_signal.emit("批量入库已停止")
+            success_count = progress.counts.get('success', 0)
             self.log_signal.emit(
-                f"批量入库完成: 成功 {success_count}, 跳过 {skip_count}, 失败 {fail_count}"
+                f"批量入库完成: 成功 {success_count}, 跳过 {progress.counts.get('skipped', 0)}, "
+                f"失败 {progress.failed}"
             )
             self.finished_signal.emit(success_count)
 
@@ -157,26 +84,31 @@ class RecordWorker(QThread):
             error_details = f"{str(e)}\n{traceback.format_exc()}"
             self.error_signal.emit(error_details)
 
-    def _parse_metadata_json(self, raw: str) -> dict:
-        """解析 LLM 返回的 JSON 元数据"""
-        try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            pass
-
-        json_match = re.search(r'```(?:json)?\s*(.*?)```', raw, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1).strip())
-            except json.JSONDecodeError:
-                pass
-
-        brace_match = re.search(r'\{.*\}', raw, re.DOTALL)
-        if brace_match:
-            try:
-                return json.loads(brace_match.group(0))
-            except json.JSONDecodeError:
-                pass
-
-        self.log_signal.emit(f"警告: 无法解析元数据JSON")
-        return {}
+    async def _run_pipeline(self, all_files: List[Tuple[str, str]]) -> ProgressTracker:
+        """运行入库流水线，每完成一个文件记录清单、输出日志并更新进度"""
+        progress = ProgressTracker(len(all_files))
+        async for result in self.processor.iter_record_files(
+            all_files,
+            self.config.get('concurrency', 5),
+            self.config.get('cache_text', True),
+            progress=progress,
+            cancel_token=self.cancel_token
+        ):
+            self._mark(result['pdf_path'], result['status'], result.get('error'), result.get('file_hash'))
+
+            filename = os.path.basename(result['pdf_path'])
+            prefix = f"[{progress.completed}/{progress.total}] {filename}"
+            retry_note = f"（LLM重试 {result['retries']} 次）" if result.get('retries') else ""
+            if result['status'] == 'success':
+                self.log_signal.emit(f"{prefix} 已入库: {result['title']}{retry_note}")
+            elif result['status'] == 'skipped':
+                self.log_signal.emit(f"{prefix} 跳过: {result['error']}")
+            else:
+                self.log_signal.emit(f"{prefix} 处理失败 [{result['status']}]: {result['error']}{retry_note}")
+            self.progress_signal.emit(progress.percent)
+        return progress
+
+    def _mark(self, file_path: str, status: str, error: str = None, file_hash: str = None):
+        """将处理结果写入增量扫描清单"""
+        if self.manifest is not None:
+            self.manifest.mark(file_path, status, error[:1000] if error else None, file_hash)
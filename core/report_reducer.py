@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+from typing import List
+
+from utils.llm_client import LLMClient, REPORT_SEPARATOR
+from utils.report_store import ReportStore
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class _Node:
+    """归并树中的节点：摘要或阶段性综合分析的文本，以及它覆盖的摘要哈希（有序）"""
+
+    __slots__ = ('text', 'covers')
+
+    def __init__(self, text: str, covers: List[str]):
+        self.text = text
+        self.covers = covers
+
+    @property
+    def anchor(self) -> str:
+        return self.covers[0]
+
+
+class ReportReducer:
+    """
+    总报告的分层归并（map-reduce）
+
+    所有摘要能放入一次调用时直接生成总报告；否则按摘要哈希排序后分组，各组并发归并为阶段性综合分析，
+    再对综合分析继续分组归并，直到能放入一次调用，最后由总报告提示词生成报告，调用层数随文献数对数增长。
+
+    分组边界由节点覆盖的第一篇摘要的哈希决定（内容定义的分组），与其他文献无关：
+    新增或修改少量文献只改变其所在分组及上层节点。配合 ReportStore 保存各节点的结果和覆盖的摘要哈希，
+    再次生成时未变化的分组直接复用，只重新生成受影响的分支；文献没有变化时不调用 LLM。
+    """
+
+    def __init__(self, llm_client: LLMClient, concurrency: int = 5, store: ReportStore = None):
+        """
+        Args:
+            llm_client: LLM 客户端
+            concurrency: 同一层内同时进行的归并调用数
+            store: 归并树节点存储（None 表示每次重新生成）
+        """
+        self.llm_client = llm_client
+        self.concurrency = max(1, concurrency)
+        self.store = store
+        self.budget = llm_client.report_input_budget()
+        # 每篇摘要和综合分析都不超过一次输出的 token 数，平均每组按预算可容纳的篇数分组
+        self.fan_in = max(2, self.budget // max(1, llm_client.max_tokens))
+        self._separator_tokens = llm_client._estimate_tokens_from_text(REPORT_SEPARATOR)
+        self.levels = 0  # 最近一次生成时的归并层数（0 表示单次调用）
+        self.calls = 0  # 最近一次生成时实际调用 LLM 的次数
+        self.reused = 0  # 最近一次生成时从 store 复用的节点数
+
+    def _tokens(self, text: str) -> int:
+        return self.llm_client._estimate_tokens_from_text(text) + self._separator_tokens
+
+    def _truncate(self, text: str, limit: int) -> str:
+        """将单篇内容截断到 limit 个 token 以内"""
+        tokens = self._tokens(text)
+        while tokens > limit and text:
+            text = text[:max(0, len(text) * limit // tokens - 1)]
+            tokens = self._tokens(text)
+        return text
+
+    def _is_boundary(self, node: _Node, level: int) -> bool:
+        """节点之后是否为分组边界（只取决于节点覆盖的第一篇摘要和层级）"""
+        return int(_sha256(f"{level}:{node.anchor}")[:8], 16) % self.fan_in == 0
+
+    def _pack(self, nodes: List[_Node], level: int, stable: bool = True) -> List[List[_Node]]:
+        """
+        按顺序把节点装入分组，每组合计不超过 token 预算
+
+        stable 为 True 时在内容定义的边界处分组，否则尽量装满每组。
+        单篇内容先截断到预算的一半，保证按预算装填时每组至少容纳两篇。
+        """
+        limit = self.budget // 2
+        batches, batch, used = [], [], 0
+        for node in nodes:
+            node.text = self._truncate(node.text, limit)
+            tokens = self._tokens(node.text)
+            if batch and used + tokens > self.budget:
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append(node)
+            used += tokens
+            if stable and self._is_boundary(node, level):
+                batches.append(batch)
+                batch, used = [], 0
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def pack_batches(self, summaries: List[str], level: int = 0) -> List[List[str]]:
+        """按第 level 层的分组规则对摘要分组（摘要顺序不变）"""
+        nodes = [_Node(text, [_sha256(text)]) for text in summaries]
+        return [[node.text for node in batch] for batch in self._pack(nodes, level)]
+
+    def _fits(self, nodes: List[_Node]) -> bool:
+        """所有节点是否能放入一次调用"""
+        return sum(self._tokens(node.text) for node in nodes) <= self.budget
+
+    async def _generate(self, prompt_type: str, nodes: List[_Node], level: int,
+                        semaphore: asyncio.Semaphore = None) -> _Node:
+        """生成（或从 store 复用）一个节点"""
+        texts = [node.text for node in nodes]
+        covers = [digest for node in nodes for digest in node.covers]
+        key = None
+        loop = asyncio.get_running_loop()
+        if self.store is not None:
+            key = self.llm_client.report_request_key(prompt_type, texts)
+            # SQLite 读写在线程池中执行，不阻塞同一事件循环中的其他归并调用
+            stored = await loop.run_in_executor(None, self.store.get, key)
+            if stored is not None:
+                self.reused += 1
+                return _Node(stored['content'], covers)
+
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(1)
+        async with semaphore:
+            if prompt_type == "overall_report":
+                content = await self.llm_client.generate_overall_report(texts)
+            else:
+                content = await self.llm_client.generate_report_partial(texts)
+        self.calls += 1
+        if key is not None:
+            await loop.run_in_executor(None, self.store.put, key, level, covers, content)
+        return _Node(content, covers)
+
+    async def _merge_level(self, batches: List[List[_Node]], level: int) -> List[_Node]:
+        """并发归并同一层的所有分组，任一分组失败时取消其余分组"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def merge(batch: List[_Node]) -> _Node:
+            # 分组只有一篇时直接进入上一层
+            if len(batch) == 1:
+                return batch[0]
+            return await self._generate("overall_report_merge", batch, level, semaphore)
+
+        tasks = [asyncio.ensure_future(merge(batch)) for batch in batches]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _reduce(self, summaries: List[str]) -> List[_Node]:
+        """逐层归并，返回能放入一次总报告调用的节点"""
+        nodes = [_Node(text, [_sha256(text)]) for text in summaries]
+        self.levels = 0
+        if len(nodes) > 1 and not self._fits(nodes):
+            # 按摘要哈希排序，分组与文献的扫描顺序无关
+            nodes.sort(key=lambda node: node.anchor)
+        while len(nodes) > 1 and not self._fits(nodes):
+            batches = self._pack(nodes, self.levels)
+            if len(batches) == len(nodes):
+                # 本层恰好每篇都是边界（极少见），改为按预算装填以保证数量减少
+                batches = self._pack(nodes, self.levels, stable=False)
+            print(f"总报告归并第 {self.levels + 1} 层: {len(nodes)} 份 → {len(batches)} 组")
+            nodes = await self._merge_level(batches, self.levels + 1)
+            self.levels += 1
+        if nodes and not self._fits(nodes):
+            nodes[0].text = self._truncate(nodes[0].text, self.budget)
+        return nodes
+
+    async def reduce(self, summaries: List[str]) -> List[str]:
+        """逐层归并，返回能放入一次总报告调用的内容列表"""
+        self.calls = self.reused = 0
+        return [node.text for node in await self._reduce(summaries)]
+
+    async def generate(self, summaries: List[str]) -> str:
+        """生成总体报告（Markdown）"""
+        self.calls = self.reused = 0
+        nodes = await self._reduce(summaries)
+        report = await self._generate("overall_report", nodes, self.levels + 1)
+        if self.store is not None:
+            print(f"总报告: 复用 {self.reused} 个已生成的节点，调用 LLM {self.calls} 次")
+        return report.text
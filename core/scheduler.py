@@ -0,0 +1,144 @@
+import heapq
+import itertools
+import os
+import threading
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+# 调度策略：fifo 按扫描顺序；shortest_first 文件小的优先（短文献先完成）；recent_first 最近修改的优先
+SCHEDULE_POLICIES = ('fifo', 'shortest_first', 'recent_first')
+
+_REMOVED = object()
+
+
+def _normalize(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class JobScheduler:
+    """
+    文档处理任务的优先队列（heapq）
+
+    出队顺序：显式优先级高的优先，相同优先级按调度策略，再按加入顺序。
+    流水线按需从队列取任务（取出后才开始处理），运行过程中可随时在任意线程调整尚未开始的文件的优先级，
+    被提高优先级的文件会在下一个空位立即开始处理。
+    用 extend 加入的任务序列惰性读取：fifo 策略下出队时才逐个读取（也不读取文件信息），
+    第一个文件无需等待整个文件夹扫描完成。
+    """
+
+    def __init__(self, policy: str = 'fifo'):
+        """
+        Args:
+            policy: 调度策略，见 SCHEDULE_POLICIES
+        """
+        if policy not in SCHEDULE_POLICIES:
+            raise ValueError(f"未知的调度策略: {policy}")
+        self.policy = policy
+        self._heap = []
+        self._entries = {}  # 规范化路径 -> 队列中的条目
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._sources = []  # 尚未读取完的任务序列
+        self._source_lock = threading.Lock()
+
+    def _policy_key(self, path: str) -> float:
+        """同一优先级内的排序键（越小越先处理）"""
+        if self.policy == 'fifo':
+            return 0
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return 0
+        if self.policy == 'shortest_first':
+            # 处理前无法得知 token 数，以文件大小估计文献长度
+            return stat.st_size
+        return -stat.st_mtime
+
+    def add(self, path: str, payload: Any = None, priority: int = 0):
+        """
+        加入任务（同一文件重复加入时替换原任务）
+
+        Args:
+            path: 文件路径
+            payload: 出队时返回的任务数据（默认为路径本身）
+            priority: 显式优先级，越大越先处理
+        """
+        policy_key = self._policy_key(path)
+        with self._lock:
+            self._push(_normalize(path), policy_key, path if payload is None else payload, priority)
+
+    def extend(self, items: Iterable[Tuple[str, Any]]):
+        """
+        惰性加入任务序列 (文件路径, 任务数据)
+
+        fifo 策略下每次出队时读取一个；其他策略需要比较所有文件，第一次出队时读取全部。
+        调整优先级前先读取剩余的全部任务，尚未读取的文件也能被提前（此时在调用方线程中读取序列）。
+        """
+        with self._source_lock:
+            self._sources.append(iter(items))
+
+    def _read(self, limit: int = None):
+        """从尚未读取完的任务序列中读取最多 limit 个任务（None 表示全部）"""
+        with self._source_lock:
+            count = 0
+            while self._sources and (limit is None or count < limit):
+                try:
+                    path, payload = next(self._sources[0])
+                except StopIteration:
+                    self._sources.pop(0)
+                    continue
+                self.add(path, payload)
+                count += 1
+
+    def _push(self, key: str, policy_key: float, payload: Any, priority: int):
+        old = self._entries.get(key)
+        if old is not None:
+            old[-1] = _REMOVED
+        entry = [-priority, policy_key, next(self._counter), key, payload]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+    def set_priority(self, path: str, priority: int) -> bool:
+        """调整尚未开始的文件的优先级，文件不在队列中（未加入或已开始处理）时返回 False"""
+        self._read()
+        key = _normalize(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            self._push(key, entry[1], entry[-1], priority)
+            return True
+
+    def prioritize_folder(self, folder: str, priority: int) -> int:
+        """调整文件夹（含子文件夹）下所有尚未开始的文件的优先级，返回调整的文件数"""
+        self._read()
+        prefix = os.path.join(_normalize(folder), '')
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                entry = self._entries[key]
+                self._push(key, entry[1], entry[-1], priority)
+            return len(keys)
+
+    def pop(self) -> Optional[Any]:
+        """取出下一个任务，队列为空时返回 None"""
+        self._read(1 if self.policy == 'fifo' else None)
+        with self._lock:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                if entry[-1] is not _REMOVED:
+                    del self._entries[entry[3]]
+                    return entry[-1]
+            return None
+
+    def __len__(self) -> int:
+        """已读取、尚未出队的任务数"""
+        with self._lock:
+            return len(self._entries)
+
+    def __iter__(self) -> Iterator[Any]:
+        """按需逐个取出任务（可直接作为流水线的输入）"""
+        while True:
+            payload = self.pop()
+            if payload is None:
+                return
+            yield payload
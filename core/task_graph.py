@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+# 任务函数：接收已完成的依赖任务结果 {任务名: 结果}，返回任务结果
+TaskFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class TaskGraph:
+    """
+    单个文档内的小型任务依赖图（DAG）
+
+    每个任务在其依赖全部完成后立即开始，互不依赖的任务并发执行
+    （如入库时的"生成概要"与"提取元数据 → 翻译摘要"）。
+    任一任务出错时取消其余任务，并向调用方抛出该异常。
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, tuple] = {}
+
+    def add(self, name: str, func: TaskFunc, deps: Iterable[str] = ()) -> 'TaskGraph':
+        """
+        添加任务
+
+        Args:
+            name: 任务名
+            func: 异步任务函数，参数为依赖任务的结果字典
+            deps: 依赖的任务名（必须已添加）
+        """
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._tasks:
+                raise ValueError(f"任务 {name} 依赖的任务 {dep} 不存在")
+        self._tasks[name] = (func, deps)
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """并发执行所有任务，返回 {任务名: 结果}"""
+        futures: Dict[str, asyncio.Future] = {}
+
+        async def run_task(func: TaskFunc, deps: tuple):
+            results = {}
+            for dep in deps:
+                results[dep] = await futures[dep]
+            return await func(results)
+
+        # 依赖只能指向已添加的任务，按添加顺序创建即可保证依赖的 future 已存在
+        for name, (func, deps) in self._tasks.items():
+            futures[name] = asyncio.ensure_future(run_task(func, deps))
+        try:
+            await asyncio.gather(*futures.values())
+        finally:
+            for future in futures.values():
+                future.cancel()
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.adaptive_concurrency import AdaptiveConcurrency, is_overload_error
+from utils.llm_client import LLMClient
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_aimd_adjustment():
+    """测试加性增、过载时乘性减以及同一次降低不重复触发"""
+    assert is_overload_error(_StatusError(429))
+    assert is_overload_error(_StatusError(503))
+    assert not is_overload_error(_StatusError(400))
+    assert is_overload_error(asyncio.TimeoutError())
+
+    controller = AdaptiveConcurrency(initial=4, max_limit=8, window=4)
+
+    async def run():
+        # 并发用满且延迟稳定时，上限逐步增加
+        for _ in range(20):
+            starts = [await controller.acquire() for _ in range(controller.limit)]
+            for started in starts:
+                controller.release(started)
+        grown = controller.limit
+        assert grown > 4, grown
+
+        # 同一批请求连续返回429只减半一次
+        starts = [await controller.acquire() for _ in range(controller.limit)]
+        for started in starts:
+            controller.release(started, _StatusError(429))
+        assert controller.limit == grown // 2, (grown, controller.limit)
+        assert controller.snapshot()['overload_errors'] == len(starts)
+        assert controller.snapshot()['in_flight'] == 0
+
+    asyncio.run(run())
+    print("✓ AIMD 并发上限调整正确")
+
+
+def test_limit_gates_requests():
+    """测试同时进行的请求数不超过当前上限"""
+    controller = AdaptiveConcurrency(initial=2, max_limit=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        started = await controller.acquire()
+        peak = max(peak, controller.in_flight)
+        await asyncio.sleep(0.01)
+        controller.release(started)
+
+    async def run():
+        await asyncio.gather(*[request() for _ in range(10)])
+
+    asyncio.run(run())
+    assert peak == 2, peak
+    assert controller.in_flight == 0
+    print("✓ 并发上限限制生效")
+
+
+def test_rate_limit_wait_holds_no_slot():
+    """测试等待限流期间不占用并发槽：请求发出时进行中的只有它自己"""
+    client = LLMClient("http://localhost:1/v1", "test-slot-order", max_tokens=16)
+    client.set_rate_limits(min_interval=0.1)
+    client.set_adaptive_concurrency(True, initial=4, max_limit=4)
+    seen = []
+
+    async def create(**kwargs):
+        seen.append(client.concurrency.in_flight)
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(choices=[], usage=None)
+
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def run():
+        messages = [{"role": "user", "content": "hi"}]
+        await asyncio.gather(*[client._chat_completion_once(messages, 0.0) for _ in range(4)])
+
+    asyncio.run(run())
+    assert seen == [1, 1, 1, 1], seen
+    assert client.concurrency.in_flight == 0
+    print("✓ 限流等待期间不占用并发槽")
+
+
+if __name__ == "__main__":
+    test_aimd_adjustment()
+    test_limit_gates_requests()
+    test_rate_limit_wait_holds_no_slot()
+    print("所有测试通过")
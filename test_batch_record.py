@@ -0,0 +1,127 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.pipeline import CancellationToken
+from core.processor import LiteratureProcessor
+from utils.extraction_pool import ExtractionPool
+from utils.llm_client import LLMClient
+from utils.quarantine import QuarantineList
+
+_COMBINED = ('{"summary": "# 合并摘要", "title": "T", "keywords": "k", "abstract": "a", '
+             '"is_english": false, "abstract_cn": "", "record_summary": "R"}')
+
+
+class _SlowLLM:
+    """模拟 LLM：每次调用耗时 0.1 秒，记录同时进行的调用数"""
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.1)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=_COMBINED), finish_reason='stop')],
+            usage=None
+        )
+
+
+def _make_processor(tmp, llm):
+    processor = LiteratureProcessor(ExtractionPool(
+        2, cache_dir=os.path.join(tmp, 'texts'), timeout=0, memory_limit_mb=0,
+        quarantine=QuarantineList(os.path.join(tmp, 'quarantine.json'))
+    ))
+    processor.llm_client = LLMClient("http://localhost:1/v1", "test-record", max_tokens=256)
+    processor.llm_client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=llm.create)))
+    processor.initialize_database(os.path.join(tmp, 'records.db'))
+    processor.enable_auto_record(True)
+    processor.enable_combined_analysis(True)
+    return processor
+
+
+def _write_docs(folder, count):
+    files = []
+    for i in range(count):
+        path = os.path.join(folder, f'{i}.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# 文献 {i}\n\n" + f"第 {i} 篇文献的正文。" * 20)
+        files.append((path, 'md'))
+    return files
+
+
+def test_concurrent_batch_record():
+    """测试批量入库并行调用 LLM（不超过并发数），内容相同的文件只入库一次"""
+    with tempfile.TemporaryDirectory() as tmp:
+        llm = _SlowLLM()
+        processor = _make_processor(tmp, llm)
+        files = _write_docs(tmp, 12)
+        # 内容相同、文件名不同的副本
+        copy_path = os.path.join(tmp, 'copy.md')
+        with open(files[0][0], 'r', encoding='utf-8') as src, open(copy_path, 'w', encoding='utf-8') as dst:
+            dst.write(src.read() + "\n")
+        files.append((copy_path, 'md'))
+
+        async def run():
+            return [result async for result in processor.iter_record_files(files, concurrency=4)]
+
+        start = time.monotonic()
+        try:
+            results = asyncio.run(run())
+        finally:
+            processor.shutdown()
+        elapsed = time.monotonic() - start
+
+        statuses = sorted(result['status'] for result in results)
+        assert len(results) == 13
+        assert statuses == ['skipped'] + ['success'] * 12, statuses
+        assert len(processor.db_manager.get_all_records()) == 12
+        assert llm.calls == 12
+        assert 1 < llm.max_active <= 4, llm.max_active
+        # 串行至少需要 1.2 秒
+        assert elapsed < 1.0, elapsed
+    print(f"✓ 批量入库并行处理（最多 {llm.max_active} 个并发调用，耗时 {elapsed:.2f} 秒）")
+
+
+def test_batch_record_stops_on_cancel():
+    """测试取消后不再开始新文件，已开始的文件完成入库"""
+    with tempfile.TemporaryDirectory() as tmp:
+        llm = _SlowLLM()
+        processor = _make_processor(tmp, llm)
+        files = _write_docs(tmp, 20)
+        cancel_token = CancellationToken()
+
+        async def run():
+            results = []
+            async for result in processor.iter_record_files(files, concurrency=2, cancel_token=cancel_token):
+                results.append(result)
+                cancel_token.cancel()
+            return results
+
+        try:
+            results = asyncio.run(run())
+        finally:
+            processor.shutdown()
+        assert 0 < len(results) < 20
+        assert all(result['status'] == 'success' for result in results)
+        assert len(processor.db_manager.get_all_records()) == len(results) == llm.calls
+    print("✓ 取消批量入库后已开始的文件完成入库")
+
+
+if __name__ == "__main__":
+    test_concurrent_batch_record()
+    test_batch_record_stops_on_cancel()
+    print("所有批量入库测试通过")
@@ -0,0 +1,120 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cli
+from utils.database import DatabaseManager
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _run(argv):
+    """运行命令行入口，返回 (退出码, JSON Lines 事件列表)"""
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        code = cli.main(argv)
+    return code, [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+def _write_broken_pdf(path):
+    """写入第二页资源字典损坏的 PDF（提取该页时 pdf_reader 打印警告）"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 5 0 R "
+        b"/Resources << /Font << /F1 6 0 R >> >> >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 5 0 R /Resources 7 >>",
+        b"<< /Length 42 >>\nstream\nBT /F1 12 Tf 72 720 Td (Hello world) Tj ET\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_no_qt_import():
+    """测试命令行入口不导入 PyQt5"""
+    output = subprocess.run(
+        [sys.executable, '-c', "import sys, cli; print('PyQt5' in sys.modules)"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == 'False', output
+    print("✓ 命令行入口不依赖 PyQt5")
+
+
+def test_search_outputs_json_lines():
+    """测试检索结果按 JSON Lines 输出，--limit 生效"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'records.db')
+        config_path = os.path.join(tmp, 'config.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump({'db_path': db_path}, f)
+        db = DatabaseManager(db_path)
+        db.init_db()
+        for i in range(3):
+            db.insert_record({'file_path': f'{i}.pdf', 'file_type': 'pdf', 'content_hash': f'c{i}',
+                              'title': f'Graph networks {i}', 'keywords': 'graph', 'minhash': b'\x00\x01'})
+
+        code, events = _run(['--config', config_path, 'search', 'graph', '--limit', '2'])
+        assert code == cli.EXIT_OK
+        assert [event['event'] for event in events] == ['record', 'record', 'done']
+        assert events[0]['title'].startswith('Graph networks') and 'minhash' not in events[0]
+        assert events[-1]['count'] == 2
+        print("✓ 检索结果 JSON Lines 输出正确")
+
+
+def test_missing_api_key_exit_code():
+    """测试缺少 API 配置时输出 error 事件并返回错误退出码"""
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump({'api_key': ''}, f)
+        code, events = _run(['--config', config_path, 'summarize', tmp])
+        assert code == cli.EXIT_ERROR
+        assert events[-1]['event'] == 'error' and 'api_key' in events[-1]['message']
+        print("✓ 配置错误时退出码正确")
+
+
+def test_child_output_stays_off_stdout():
+    """测试提取子进程打印的警告不会混入标准输出的 JSON Lines"""
+    with tempfile.TemporaryDirectory() as tmp:
+        papers = os.path.join(tmp, 'papers')
+        os.makedirs(papers)
+        _write_broken_pdf(os.path.join(papers, 'broken.pdf'))
+        config_path = os.path.join(tmp, 'config.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            # LLM 服务不可用：提取完成后摘要失败，不重试
+            json.dump({'base_url': 'http://127.0.0.1:9/v1', 'api_key': 'test', 'auto_record': False,
+                       'llm_max_retries': 0, 'adaptive_concurrency': False, 'extract_workers': 1}, f)
+        process = subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'cli.py'), '--config', config_path, 'summarize', papers, '--no-report'],
+            cwd=tmp, capture_output=True, text=True, timeout=120
+        )
+        events = [json.loads(line) for line in process.stdout.splitlines()]
+        assert '警告' in process.stderr, process.stderr
+        assert [event['event'] for event in events] == ['start', 'result', 'done'], process.stdout
+        assert process.returncode == cli.EXIT_FAILURES
+        print("✓ 子进程输出不混入 JSON Lines")
+
+
+if __name__ == "__main__":
+    test_no_qt_import()
+    test_search_outputs_json_lines()
+    test_missing_api_key_exit_code()
+    test_child_output_stays_off_stdout()
+    print("所有命令行测试通过")
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.database import DatabaseManager
+
+
+def test_file_hash_migration_and_lookup():
+    """测试旧数据库自动增加 file_hash 列，并可按文件哈希去重"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'records.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE literature_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, file_path TEXT NOT NULL, file_type TEXT NOT NULL,
+                content_hash TEXT NOT NULL UNIQUE, title TEXT, keywords TEXT, abstract TEXT,
+                abstract_cn TEXT, summary TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("INSERT INTO literature_records (file_path, file_type, content_hash, title) "
+                     "VALUES ('old.pdf', 'pdf', 'c-old', '旧记录')")
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(db_path)
+        db.init_db()
+        db.insert_record({'file_path': 'new.pdf', 'file_type': 'pdf', 'content_hash': 'c-new',
+                          'file_hash': 'f-new', 'title': '新记录'})
+        assert db.check_file_duplicate('f-new')['title'] == '新记录'
+        assert db.check_file_duplicate('f-old') is None
+
+        # 内容哈希命中旧记录时补充文件哈希，下次无需提取文本
+        old = db.check_duplicate('c-old')
+        db.set_file_hash(old['id'], 'f-old')
+        db.set_file_hash(old['id'], 'f-other')
+        assert db.check_file_duplicate('f-old')['title'] == '旧记录'
+        # 同一记录的每个文件哈希都能命中
+        assert db.check_file_duplicate('f-other')['title'] == '旧记录'
+        print("✓ 文件哈希迁移和去重正确")
+
+
+def test_file_hashes_table_migration():
+    """测试已有 file_hash 列和关联文件的数据库升级后可按任一文件哈希命中，删除记录后映射一并删除"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'records.db')
+        db = DatabaseManager(db_path)
+        db.init_db()
+        record_id = db.insert_record({'file_path': 'a.pdf', 'file_type': 'pdf', 'content_hash': 'c-a',
+                                      'file_hash': 'f-a', 'title': 'A'})
+        db.link_file(record_id, 'a-v2.pdf', 'f-a-v2', 0.95)
+        # 模拟升级前的数据库：删除映射表
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE file_hashes")
+        conn.commit()
+        conn.close()
+
+        db.init_db()
+        assert db.check_file_duplicate('f-a')['id'] == record_id
+        assert db.check_file_duplicate('f-a-v2')['id'] == record_id
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM literature_records WHERE id = ?", (record_id,))
+        conn.commit()
+        remaining = conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0]
+        conn.close()
+        assert remaining == 0
+        assert db.check_file_duplicate('f-a') is None
+        print("✓ 文件哈希映射表升级和清理正确")
+
+
+def test_search_limit():
+    """测试检索结果数量在 SQL 中受 limit 限制（全文检索、回退检索和空查询）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'records.db'))
+        db.init_db()
+        for i in range(5):
+            db.insert_record({'file_path': f'{i}.pdf', 'file_type': 'pdf', 'content_hash': f'c{i}',
+                              'title': f'Graph networks {i}', 'keywords': 'graph'})
+        assert len(db.search_records('graph')) == 5
+        assert len(db.search_records('graph', 2)) == 2
+        assert len(db._fallback_search('graph', 3)) == 3
+        assert len(db.search_records('', 4)) == 4
+        print("✓ 检索数量限制正确")
+
+
+if __name__ == "__main__":
+    test_file_hash_migration_and_lookup()
+    test_file_hashes_table_migration()
+    test_search_limit()
+    print("\n所有测试通过!")
@@ -0,0 +1,283 @@
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.processor import LiteratureProcessor
+from utils.extraction_pool import ExtractionPool
+from utils.llm_client import LLMClient
+from utils.quarantine import QuarantineList
+from utils import text_extractor
+from utils.text_extractor import ExtractionError, TextExtractor
+
+_COMBINED = ('{"summary": "# 合并摘要", "title": "T", "keywords": "k", "abstract": "a", '
+             '"is_english": false, "abstract_cn": "", "record_summary": "R"}')
+
+
+def _stub_extract_pdf(self, file_path, max_chars=None):
+    """
+    测试用的 PDF 提取器：把"提取进程 pid"追加到 <文件>.calls，返回包含 pid 的文本
+
+    提取在子进程中执行，调用记录写到文件中以便测试进程读取。
+    """
+    with open(file_path + '.calls', 'a', encoding='utf-8') as f:
+        f.write(f"{os.getpid()}\n")
+    return f"pid={os.getpid()} " + "正文内容 " * 100
+
+
+def _misbehaving_extract_pdf(self, file_path, max_chars=None):
+    """测试用的 PDF 提取器：按文件内容模拟卡死、内存暴涨和崩溃，其余文件正常返回"""
+    with open(file_path + '.calls', 'a', encoding='utf-8') as f:
+        f.write(f"{os.getpid()}\n")
+    with open(file_path, 'rb') as f:
+        behaviour = f.read()
+    if behaviour == b'hang':
+        time.sleep(600)
+    elif behaviour == b'oom':
+        hog = bytearray(400 * 1024 * 1024)
+        for i in range(0, len(hog), 4096):
+            hog[i] = 1
+        time.sleep(600)
+    elif behaviour == b'crash':
+        os._exit(3)
+    return "正文内容 " * 100
+
+
+class _IsolatedStub:
+    """
+    在受监管子进程中使用测试提取器
+
+    子进程默认由 forkserver 启动，不继承测试进程中替换的方法，测试期间改用 fork。
+    """
+
+    def __enter__(self):
+        self._extract_pdf = TextExtractor._extract_pdf
+        self._get_mp_context = text_extractor._get_mp_context
+        TextExtractor._extract_pdf = _misbehaving_extract_pdf
+        text_extractor._get_mp_context = lambda: multiprocessing.get_context('fork')
+        return self
+
+    def __exit__(self, *exc):
+        TextExtractor._extract_pdf = self._extract_pdf
+        text_extractor._get_mp_context = self._get_mp_context
+
+
+def _write(folder, name, content):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+def _calls(file_path):
+    """返回提取过该文件的进程 pid 列表"""
+    try:
+        with open(file_path + '.calls', 'r', encoding='utf-8') as f:
+            return [int(line) for line in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def _write_pdfs(folder, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f'{i}.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-fake ' + str(i).encode())
+        paths.append(path)
+    return paths
+
+
+def _make_pool(tmp, max_workers=2, timeout=0, memory_limit_mb=0):
+    return ExtractionPool(max_workers, cache_dir=os.path.join(tmp, 'texts'), timeout=timeout,
+                          memory_limit_mb=memory_limit_mb,
+                          quarantine=QuarantineList(os.path.join(tmp, 'quarantine.json')))
+
+
+def _make_client(calls):
+    client = LLMClient("http://localhost:1/v1", "test-pool", max_tokens=256)
+
+    async def create(**kwargs):
+        calls.append(kwargs['messages'][-1]['content'])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=_COMBINED), finish_reason='stop')],
+            usage=None
+        )
+
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return client
+
+
+def test_extraction_runs_in_worker_processes():
+    """测试 PDF 在进程池的工作进程中并行提取，不在事件循环所在进程中解析"""
+    original = TextExtractor._extract_pdf
+    TextExtractor._extract_pdf = _stub_extract_pdf
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = _make_pool(tmp)
+            paths = _write_pdfs(tmp, 6)
+
+            async def run():
+                return await asyncio.gather(*(pool.extract(path, use_cache=False) for path in paths))
+
+            try:
+                results = asyncio.run(run())
+                workers = set(pool._executor._processes)
+            finally:
+                pool.shutdown()
+            pids = {pid for path in paths for pid in _calls(path)}
+            assert all(text.startswith('pid=') and file_type == 'pdf' for text, file_type in results)
+            assert os.getpid() not in pids
+            assert pids <= workers and len(workers) == 2
+    finally:
+        TextExtractor._extract_pdf = original
+    print("✓ 文本在进程池的工作进程中提取")
+
+
+def test_summarize_and_record_share_pool():
+    """测试批量入库和摘要流程共用同一个进程池和文本缓存：同一文件只解析一次"""
+    original = TextExtractor._extract_pdf
+    TextExtractor._extract_pdf = _stub_extract_pdf
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            calls = []
+            processor = LiteratureProcessor()
+            processor.extraction_pool = _make_pool(tmp)
+            processor.llm_client = _make_client(calls)
+            processor.initialize_database(os.path.join(tmp, 'records.db'))
+            processor.enable_auto_record(True)
+            pdf_path, other_path = _write_pdfs(tmp, 2)
+
+            try:
+                result = asyncio.run(processor.record_single_file(pdf_path, 'pdf'))
+                assert result['status'] == 'success', result
+                executor = processor.extraction_pool._executor
+
+                result = asyncio.run(processor.process_single_pdf(pdf_path))
+                assert result['status'] == 'success', result
+                result = asyncio.run(processor.process_single_pdf(other_path))
+                assert result['status'] == 'success', result
+                assert processor.extraction_pool._executor is executor
+                workers = set(executor._processes)
+            finally:
+                processor.shutdown()
+
+            # 摘要流程命中批量入库写入的文本缓存，同一文件只解析一次
+            assert len(_calls(pdf_path)) == 1
+            assert set(_calls(pdf_path) + _calls(other_path)) <= workers
+            assert calls and all('pid=' in content for content in calls)
+    finally:
+        TextExtractor._extract_pdf = original
+    print("✓ 摘要流程与批量入库共用提取进程池和文本缓存")
+
+
+def test_hanging_extraction_is_killed():
+    """测试卡死的提取在超时后被终止，并加入隔离名单"""
+    with tempfile.TemporaryDirectory() as tmp, _IsolatedStub():
+        pool = _make_pool(tmp, timeout=1)
+        path = _write(tmp, 'hang.pdf', b'hang')
+        start = time.monotonic()
+        try:
+            asyncio.run(pool.extract(path, use_cache=False))
+            assert False, "应当超时"
+        except ExtractionError as e:
+            assert e.status == 'timeout', e
+        finally:
+            pool.shutdown()
+        assert time.monotonic() - start < 10
+        assert not os.path.exists(f"/proc/{_calls(path)[0]}")  # 子进程已终止并回收
+        assert pool.quarantine.get(path)['status'] == 'timeout'
+    print("✓ 卡死的提取在超时后被终止")
+
+
+def test_memory_hog_is_killed():
+    """测试常驻内存超过上限的提取子进程被终止"""
+    if not os.path.exists('/proc/self/statm'):
+        print("- 当前平台无法读取子进程内存，跳过")
+        return
+    with tempfile.TemporaryDirectory() as tmp, _IsolatedStub():
+        pool = _make_pool(tmp, timeout=60, memory_limit_mb=200)
+        path = _write(tmp, 'oom.pdf', b'oom')
+        start = time.monotonic()
+        try:
+            asyncio.run(pool.extract(path, use_cache=False))
+            assert False, "应当因内存超限被终止"
+        except ExtractionError as e:
+            assert e.status == 'oom', e
+        finally:
+            pool.shutdown()
+        assert time.monotonic() - start < 30
+        assert pool.quarantine.get(path)['status'] == 'oom'
+    print("✓ 内存超限的提取子进程被终止")
+
+
+def test_crash_does_not_break_pool():
+    """测试提取子进程崩溃只影响该文件，同一批次的其他文件照常提取"""
+    with tempfile.TemporaryDirectory() as tmp, _IsolatedStub():
+        pool = _make_pool(tmp, max_workers=2, timeout=60)
+        crash_path = _write(tmp, 'crash.pdf', b'crash')
+        good_paths = [_write(tmp, f'good{i}.pdf', b'good %d' % i) for i in range(4)]
+
+        async def run():
+            return await asyncio.gather(*(pool.extract(path, use_cache=False)
+                                          for path in [crash_path] + good_paths), return_exceptions=True)
+
+        try:
+            results = asyncio.run(run())
+            later = asyncio.run(pool.extract(good_paths[0], use_cache=False))
+        finally:
+            pool.shutdown()
+        assert isinstance(results[0], ExtractionError) and results[0].status == 'crashed', results[0]
+        assert all(text.startswith('正文内容') for text, _ in results[1:])
+        assert later[0].startswith('正文内容')
+        assert pool.quarantine.get(crash_path)['status'] == 'crashed'
+    print("✓ 子进程崩溃不影响其他文件")
+
+
+def test_quarantined_file_is_skipped_next_run():
+    """测试被隔离的文件下次运行时直接跳过（不再启动子进程），文件被替换后重新提取"""
+    with tempfile.TemporaryDirectory() as tmp, _IsolatedStub():
+        path = _write(tmp, 'paper.pdf', b'crash')
+        pool = _make_pool(tmp, timeout=60)
+        try:
+            asyncio.run(pool.extract(path, use_cache=False))
+            assert False, "应当崩溃"
+        except ExtractionError as e:
+            assert e.status == 'crashed'
+        finally:
+            pool.shutdown()
+        assert len(_calls(path)) == 1
+
+        # 下次运行：从隔离名单文件加载，处理结果为 quarantined，不再尝试提取
+        processor = LiteratureProcessor()
+        processor.extraction_pool = _make_pool(tmp, timeout=60)
+        processor.llm_client = _make_client([])
+        try:
+            result = asyncio.run(processor.process_single_pdf(path))
+            assert result['status'] == 'quarantined', result
+            assert len(_calls(path)) == 1
+
+            # 文件被替换为修复后的版本，解除隔离
+            _write(tmp, 'paper.pdf', b'fixed version')
+            result = asyncio.run(processor.process_single_pdf(path))
+            assert result['status'] == 'success', result
+            assert len(_calls(path)) == 2
+        finally:
+            processor.shutdown()
+    print("✓ 被隔离的文件下次运行时跳过")
+
+
+if __name__ == "__main__":
+    test_extraction_runs_in_worker_processes()
+    test_summarize_and_record_share_pool()
+    test_hanging_extraction_is_killed()
+    test_memory_hog_is_killed()
+    test_crash_does_not_break_pool()
+    test_quarantined_file_is_skipped_next_run()
+    print("所有文本提取进程池测试通过")
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.file_manifest import FileManifest
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def _scan(manifest, folder):
+    return {os.path.basename(path): state for path, _, state in manifest.scan(folder, include_unchanged=True)}
+
+
+def test_incremental_scan_states():
+    """测试增量扫描只产出新增、变化和失败的文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'docs')
+        manifest = FileManifest(os.path.join(tmp, 'manifest.db'), max_failures=2)
+        _write(os.path.join(folder, 'a.md'), 'aaa')
+        _write(os.path.join(folder, 'sub', 'b.md'), 'bbb')
+        _write(os.path.join(folder, 'ignored.txt'), 'ccc')
+
+        assert _scan(manifest, folder) == {'a.md': 'new', 'b.md': 'new'}
+
+        manifest.mark(os.path.join(folder, 'a.md'), 'success')
+        manifest.mark(os.path.join(folder, 'sub', 'b.md'), 'failed', 'error')
+        assert _scan(manifest, folder) == {'a.md': 'unchanged', 'b.md': 'failed'}
+
+        _write(os.path.join(folder, 'a.md'), 'changed')
+        assert _scan(manifest, folder)['a.md'] == 'changed'
+        print("✓ 增量扫描状态正确")
+
+
+def test_repeated_failures_are_quarantined():
+    """测试连续失败达到上限的文件被隔离，文件变化后解除"""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'docs')
+        path = os.path.join(folder, 'bad.md')
+        manifest = FileManifest(os.path.join(tmp, 'manifest.db'), max_failures=2)
+        _write(path, 'bad')
+
+        manifest.mark(path, 'failed', 'error')
+        assert _scan(manifest, folder) == {'bad.md': 'failed'}
+        manifest.mark(path, 'failed', 'error')
+        assert _scan(manifest, folder) == {}
+        assert manifest.get_entry(path)['fail_count'] == 2
+
+        _write(path, 'fixed content')
+        assert _scan(manifest, folder) == {'bad.md': 'changed'}
+        print("✓ 失败文件隔离正确")
+
+
+if __name__ == "__main__":
+    test_incremental_scan_states()
+    test_repeated_failures_are_quarantined()
+    print("\n所有测试通过!")
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.folder_watcher import FolderWatcher, get_file_type
+
+
+def _write(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+async def _collect(watcher, actions, duration):
+    """启动监视，依次执行文件操作，收集 duration 秒内产出的文件"""
+    found = []
+
+    async def consume():
+        async for file_path, file_type in watcher.watch():
+            found.append((os.path.basename(file_path), file_type))
+
+    task = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.3)
+    for action in actions:
+        action()
+        await asyncio.sleep(0.2)
+    await asyncio.sleep(duration)
+    watcher.stop()
+    await task
+    return found
+
+
+def test_file_type_filter():
+    """测试生成文件和不支持的文件被忽略"""
+    assert get_file_type('a/paper.pdf') == 'pdf'
+    assert get_file_type('a/notes.md') == 'md'
+    assert get_file_type('a/paper.summary.md') is None
+    assert get_file_type('a/paper.qa.md') is None
+    assert get_file_type('a/data.txt') is None
+    print("✓ 文件类型过滤正确")
+
+
+def test_polling_detects_settled_files():
+    """测试轮询模式只产出新文件，且等待文件写入稳定"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(os.path.join(tmp, 'old.md'), 'existing')
+        watcher = FolderWatcher(tmp, settle_seconds=0.5, poll_interval=0.2, use_native=False)
+        path = os.path.join(tmp, 'new.md')
+
+        def start_copy():
+            _write(path, 'part')
+
+        def finish_copy():
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(' rest')
+
+        actions = [
+            start_copy,
+            finish_copy,
+            lambda: _write(os.path.join(tmp, 'new.summary.md'), 'generated'),
+        ]
+        found = asyncio.run(_collect(watcher, actions, 1.5))
+        assert found == [('new.md', 'md')], found
+        print("✓ 轮询模式检测新文件正确")
+
+
+if __name__ == "__main__":
+    test_file_type_filter()
+    test_polling_detects_settled_files()
+    print("\n所有测试通过!")
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.pipeline import CancellationToken
+from core.processor import LiteratureProcessor
+from utils.job_journal import JobJournal, atomic_write_text
+
+
+class _FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def summary_text_budget(self):
+        return 10000
+
+    async def generate_summary(self, text):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return "摘要内容"
+
+
+def _make_processor(tmp):
+    processor = LiteratureProcessor()
+    processor.llm_client = _FakeLLM()
+    processor.journal = JobJournal(os.path.join(tmp, 'jobs.db'))
+
+    async def fake_extract(file_path, use_cache=True, max_chars=None):
+        return "正文内容 " * 50, 'pdf'
+
+    processor.extraction_pool.extract = fake_extract
+    return processor
+
+
+def _make_pdfs(tmp, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(tmp, f'paper{i}.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-fake' + bytes([i]))
+        paths.append(path)
+    return paths
+
+
+def test_resume_from_journal_without_llm_call():
+    """测试任务日志中已生成的摘要在续跑时直接写出，不再调用 LLM"""
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = _make_processor(tmp)
+        pdf_path = _make_pdfs(tmp, 1)[0]
+        processor.journal.save_summary(pdf_path, "上次已生成的摘要")
+
+        result = asyncio.run(processor.process_single_pdf(pdf_path))
+        assert result['status'] == 'success'
+        assert processor.llm_client.calls == 0
+        with open(result['summary_path'], 'r', encoding='utf-8') as f:
+            assert f.read() == "上次已生成的摘要"
+        assert processor.journal.get(pdf_path) is None
+        assert not [name for name in os.listdir(tmp) if name.endswith('.tmp')]
+        print("✓ 从任务日志续跑正确")
+
+
+def test_concurrent_atomic_writes():
+    """测试多个写入方同时原子写同一文件时互不覆盖临时文件，结果总是某一次完整的内容"""
+    from concurrent.futures import ThreadPoolExecutor
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'paper.summary.md')
+        contents = [f"第 {i} 次写入\n" * 20000 for i in range(16)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda text: atomic_write_text(path, text), contents))
+        with open(path, 'r', encoding='utf-8') as f:
+            assert f.read() in contents
+        assert os.listdir(tmp) == ['paper.summary.md']
+        # 临时文件的私有权限不会带到目标文件上
+        umask = os.umask(0)
+        os.umask(umask)
+        assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+        print("✓ 并发原子写入正常")
+
+
+def test_cancel_stops_admitting_new_files():
+    """测试取消后不再开始新文件，已开始的文件正常完成"""
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = _make_processor(tmp)
+        pdf_paths = _make_pdfs(tmp, 20)
+        token = CancellationToken()
+
+        async def main():
+            results = []
+            async for result in processor.iter_process_pdfs(pdf_paths, concurrency=2, cancel_token=token,
+                                                            stage_workers={'extract': 1}):
+                results.append(result)
+                token.cancel()
+            return results
+
+        results = asyncio.run(main())
+        assert 0 < len(results) < len(pdf_paths)
+        assert all(r['status'] == 'success' for r in results)
+        assert processor.llm_client.calls == len(results)
+        assert processor.journal.pending_paths() == set()
+        print("✓ 协作式取消正确")
+
+
+def test_cancel_stops_llm_spending():
+    """测试取消后不再发起新的 LLM 调用：排队中的文件被丢弃，已付费的摘要都写出并产出结果"""
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = _make_processor(tmp)
+        pdf_paths = _make_pdfs(tmp, 40)
+        token = CancellationToken()
+        calls_after_cancel = []
+        generate_summary = processor.llm_client.generate_summary
+
+        async def counting_generate_summary(text):
+            if token.cancelled:
+                calls_after_cancel.append(text)
+            return await generate_summary(text)
+
+        processor.llm_client.generate_summary = counting_generate_summary
+
+        async def main():
+            results = []
+            async for result in processor.iter_process_pdfs(pdf_paths, concurrency=2, cancel_token=token,
+                                                            stage_workers={'extract': 8}):
+                results.append(result)
+                token.cancel()
+            return results
+
+        results = asyncio.run(main())
+        assert calls_after_cancel == []
+        # 只有取消前发起的调用：两个 LLM 协程最多各两次（第一个结果产出前后各一批）
+        assert processor.llm_client.calls <= 4, processor.llm_client.calls
+        assert len(results) == processor.llm_client.calls
+        assert all(os.path.exists(r['summary_path']) for r in results)
+        print(f"✓ 取消后不再发起 LLM 调用（共 {processor.llm_client.calls} 次）")
+
+
+if __name__ == "__main__":
+    test_resume_from_journal_without_llm_call()
+    test_concurrent_atomic_writes()
+    test_cancel_stops_admitting_new_files()
+    test_cancel_stops_llm_spending()
+    print("\n所有测试通过!")
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.pipeline import Pipeline, Stage
+from core.queue_worker import QueueWorker
+from utils.job_queue import JobQueue
+
+
+def _files(tmp, n):
+    return [(os.path.join(tmp, f'{i}.pdf'), 'pdf') for i in range(n)]
+
+
+def test_enqueue_and_claim_order():
+    """测试加入任务去重、按优先级领取"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, 'records.db'))
+        assert queue.enqueue(_files(tmp, 3)) == 3
+        assert queue.enqueue(_files(tmp, 3)) == 0
+        assert queue.enqueue([(os.path.join(tmp, 'urgent.pdf'), 'pdf')], priority=5) == 1
+
+        jobs = queue.claim('w1', limit=2)
+        assert [os.path.basename(job['file_path']) for job in jobs] == ['urgent.pdf', '0.pdf']
+        assert queue.stats('summary') == {'pending': 2, 'running': 2, 'done': 0, 'failed': 0}
+        print("✓ 任务加入和领取顺序正确")
+
+
+def test_concurrent_claims_are_exclusive():
+    """测试多个 worker 并发领取不会拿到同一个任务"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'records.db')
+        JobQueue(db_path).enqueue(_files(tmp, 60))
+        claimed = []
+        lock = threading.Lock()
+
+        def claim_all(worker_id):
+            queue = JobQueue(db_path)
+            while True:
+                jobs = queue.claim(worker_id)
+                if not jobs:
+                    return
+                with lock:
+                    claimed.extend(job['id'] for job in jobs)
+
+        threads = [threading.Thread(target=claim_all, args=(f'w{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(claimed) == 60 and len(set(claimed)) == 60
+        print("✓ 并发领取互斥")
+
+
+def test_lease_expiry_and_fencing():
+    """测试租约过期后任务被重新领取，原 worker 的结果不再提交；失败次数用完后标记失败"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, 'records.db'), max_attempts=2)
+        queue.enqueue(_files(tmp, 1))
+        job = queue.claim('w1', lease_seconds=0.05)[0]
+        assert queue.claim('w2') == []
+        assert queue.heartbeat('w1', [job['id']], lease_seconds=0.05) == 1
+        time.sleep(0.1)
+
+        reclaimed = queue.claim('w2', lease_seconds=60)[0]
+        assert reclaimed['id'] == job['id'] and reclaimed['attempts'] == 2
+        assert not queue.complete(job['id'], 'w1', {'status': 'success'})
+        assert queue.complete(job['id'], 'w2', error='提取失败')
+        assert queue.get(job['id'])['status'] == 'failed'
+
+        queue.enqueue(_files(tmp, 1), requeue=True)
+        job = queue.claim('w3')[0]
+        assert queue.release('w3', [job['id']]) == 1
+        job = queue.claim('w3')[0]
+        assert job['attempts'] == 1
+        assert queue.complete(job['id'], 'w3', {'status': 'success', 'summary_path': 'x.summary.md'})
+        assert queue.get(job['id'])['result']['summary_path'] == 'x.summary.md'
+        print("✓ 租约过期、结果提交校验和重新入队正确")
+
+
+class _FakeProcessor:
+    """模拟处理器：按需读取任务，每个任务耗时 delay 秒，记录处理时队列中处理中的任务数"""
+
+    def __init__(self, processed, queue=None, delay=0.01):
+        self.processed = processed
+        self.queue = queue
+        self.delay = delay
+        self.running = []
+
+    async def run_items(self, items, task='summary', concurrency=5, cancel_token=None):
+        async def handle(item):
+            if self.queue is not None:
+                self.running.append(self.queue.stats(task)['running'])
+            await asyncio.sleep(self.delay)
+            self.processed.append(item['pdf_path'])
+            status = 'failed' if item['pdf_path'].endswith('3.pdf') else 'success'
+            return {'pdf_path': item['pdf_path'], 'status': status, 'error': 'x' if status == 'failed' else None}
+
+        async for result in Pipeline([Stage('work', handle, concurrency)]).run(items, cancel_token):
+            yield result
+
+
+def test_workers_share_queue():
+    """测试多个 worker 共同处理队列，每个任务只处理一次"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'records.db')
+        JobQueue(db_path, max_attempts=1).enqueue(_files(tmp, 40))
+        processed = []
+        # 每个任务耗时足够长，任一 worker 第一次领取稍有延迟时队列也不会已被其他 worker 领空
+        workers = [QueueWorker(_FakeProcessor(processed, delay=0.05), JobQueue(db_path, max_attempts=1),
+                               worker_id=f'w{i}', concurrency=4, lease_seconds=30) for i in range(3)]
+
+        async def run():
+            await asyncio.gather(*(worker.run() for worker in workers))
+
+        started = time.time()
+        asyncio.run(run())
+        assert sorted(processed) == sorted(path for path, _ in _files(tmp, 40))
+        stats = JobQueue(db_path).stats('summary')
+        assert stats == {'pending': 0, 'running': 0, 'done': 36, 'failed': 4}, stats
+        assert all(worker.counts for worker in workers)
+        print(f"✓ 3 个 worker 共同处理 40 个任务，用时 {time.time() - started:.2f} 秒")
+
+
+def test_worker_claims_only_what_it_can_start():
+    """测试 worker 持有的任务数不超过并发数（不提前囤积租约）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'records.db')
+        queue = JobQueue(db_path)
+        queue.enqueue(_files(tmp, 20))
+        processor = _FakeProcessor([], queue)
+        # 模拟的处理器可同时处理 8 个任务，worker 并发数为 2
+        worker = QueueWorker(processor, queue, worker_id='w1', concurrency=2)
+
+        async def run():
+            async for result in processor.run_items(worker._claim_items(), concurrency=8):
+                await worker._submit(result)
+
+        worker._slot_freed = asyncio.Event()
+        asyncio.run(run())
+        assert len(set(processor.processed)) == 20
+        assert max(processor.running) <= 2, processor.running
+        print("✓ worker 只领取能立即处理的任务")
+
+
+if __name__ == "__main__":
+    test_enqueue_and_claim_order()
+    test_concurrent_claims_are_exclusive()
+    test_lease_expiry_and_fencing()
+    test_workers_share_queue()
+    test_worker_claims_only_what_it_can_start()
+    print("所有任务队列测试通过")
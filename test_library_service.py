@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.library_service import LibraryService
+from core.pipeline import CancellationToken
+from utils.database import DatabaseManager
+from utils.job_queue import JobQueue
+
+
+class _FakeLLM:
+    """模拟 LLM：回答分段流式返回（默认三段），记录同时进行的问答数和实际生成的段数"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.parts = None
+        self.generated = 0
+
+    def qa_text_budget(self):
+        return 1000
+
+    async def ask_question(self, text, question, history=None, on_delta=None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            answer = ''
+            for part in self.parts or ('答', '：', text):
+                await asyncio.sleep(0.01)
+                self.generated += 1
+                answer += part
+                if on_delta is not None and await on_delta(part) is False:
+                    break
+            return answer
+        finally:
+            self.active -= 1
+
+
+class _FakeExtractionPool:
+    async def extract(self, file_path, use_cache=True, max_chars=None):
+        return os.path.basename(file_path), 'pdf'
+
+
+class _FakeProcessor:
+    def __init__(self, db_manager):
+        self.llm_client = _FakeLLM()
+        self.extraction_pool = _FakeExtractionPool()
+        self.db_manager = db_manager
+
+    def concurrency_snapshot(self):
+        return None
+
+    async def run_items(self, items, task='summary', concurrency=5, cancel_token=None):
+        async for item in items:
+            await asyncio.sleep(0.01)
+            yield {'pdf_path': item['pdf_path'], 'status': 'success', 'summary_path': item['pdf_path'] + '.md'}
+
+
+async def _request(port, method, path, payload=None):
+    """发送请求，返回 (状态码, 响应体)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), content.decode('utf-8')
+
+
+def _sse_events(content):
+    events = []
+    for block in content.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def _run_service(tmp, scenario, **kwargs):
+    """在临时文献库上启动服务，运行 scenario(服务, 端口) 后停止"""
+    library = os.path.join(tmp, 'library')
+    os.makedirs(library, exist_ok=True)
+    for i in range(3):
+        with open(os.path.join(library, f'{i}.pdf'), 'wb') as f:
+            f.write(b'%PDF')
+    db_path = os.path.join(tmp, 'records.db')
+    db_manager = DatabaseManager(db_path)
+    db_manager.init_db()
+    service = LibraryService(_FakeProcessor(db_manager), JobQueue(db_path), library, poll_interval=0.1, **kwargs)
+    stop_token = CancellationToken()
+    ready = {}
+
+    async def main():
+        server = asyncio.ensure_future(service.run('127.0.0.1', 0, stop_token, on_ready=lambda h, p: ready.update(port=p)))
+        while 'port' not in ready:
+            await asyncio.sleep(0.01)
+        try:
+            return await scenario(service, ready['port'])
+        finally:
+            stop_token.cancel()
+            await server
+
+    return asyncio.run(main())
+
+
+def test_submit_and_job_status():
+    """测试提交文献、查询任务状态，以及文献库以外的路径被拒绝"""
+    async def scenario(service, port):
+        status, body = await _request(port, 'POST', '/jobs', {'folder': '.'})
+        assert status == 202, body
+        jobs = json.loads(body)['jobs']
+        assert json.loads(body)['enqueued'] == 3 and len(jobs) == 3
+
+        for _ in range(100):
+            status, body = await _request(port, 'GET', '/jobs')
+            if json.loads(body)['summary']['done'] == 3:
+                break
+            await asyncio.sleep(0.05)
+        assert json.loads(body)['summary']['done'] == 3
+        status, body = await _request(port, 'GET', f"/jobs/{jobs[0]['id']}")
+        assert status == 200 and json.loads(body)['result']['status'] == 'success'
+
+        assert (await _request(port, 'POST', '/jobs', {'paths': ['../records.db']}))[0] == 403
+        assert (await _request(port, 'GET', '/jobs/999'))[0] == 404
+        assert (await _request(port, 'DELETE', '/jobs'))[0] == 405
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _run_service(tmp, scenario)
+    print("✓ 提交文献和任务状态查询正确")
+
+
+def test_search():
+    """测试全文检索接口"""
+    async def scenario(service, port):
+        service.processor.db_manager.insert_record({
+            'file_path': '0.pdf', 'file_type': 'pdf', 'content_hash': 'c0',
+            'title': 'Graph networks', 'keywords': 'graph', 'minhash': b'\x00'
+        })
+        status, body = await _request(port, 'GET', '/search?q=graph&limit=5')
+        result = json.loads(body)
+        assert status == 200 and result['count'] == 1
+        assert result['records'][0]['title'] == 'Graph networks' and 'minhash' not in result['records'][0]
+        assert (await _request(port, 'GET', '/search'))[0] == 400
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _run_service(tmp, scenario)
+    print("✓ 全文检索接口正确")
+
+
+def test_concurrent_streaming_qa():
+    """测试多人同时提问：回答以 SSE 流式返回，同时进行的问答数不超过上限"""
+    async def scenario(service, port):
+        responses = await asyncio.gather(*(
+            _request(port, 'POST', '/qa', {'path': f'{i % 3}.pdf', 'question': '贡献是什么？'})
+            for i in range(40)
+        ))
+        for i, (status, content) in enumerate(responses):
+            events = _sse_events(content)
+            assert status == 200
+            assert [event for event, _ in events] == ['delta', 'delta', 'delta', 'answer']
+            assert events[-1][1]['text'] == f'答：{i % 3}.pdf'
+        assert service.processor.llm_client.max_active == 3
+        assert service.connections == 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _run_service(tmp, scenario, qa_concurrency=3)
+    print("✓ 40 个并发问答全部完成，同时进行的问答数不超过 3")
+
+
+def test_qa_stops_when_client_disconnects():
+    """测试问答客户端断开后停止生成回答"""
+    async def scenario(service, port):
+        llm = service.processor.llm_client
+        llm.parts = ['x' * 1024] * 1000
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        body = json.dumps({'path': '0.pdf', 'question': '贡献是什么？'}).encode('utf-8')
+        writer.write(f"POST /qa HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        await reader.readuntil(b'event: delta')
+        writer.close()
+        for _ in range(100):
+            if llm.active == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert llm.active == 0 and llm.generated < 100, llm.generated
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _run_service(tmp, scenario)
+    print("✓ 客户端断开后停止生成回答")
+
+
+def test_connection_limit():
+    """测试连接数达到上限时返回 503"""
+    async def scenario(service, port):
+        # 两个连接只发送部分请求，占满连接数
+        held = [await asyncio.open_connection('127.0.0.1', port) for _ in range(2)]
+        for _, writer in held:
+            writer.write(b"GET /health HTTP/1.1\r\n")
+        await asyncio.sleep(0.05)
+        status, _ = await _request(port, 'GET', '/health')
+        assert status == 503
+        for _, writer in held:
+            writer.write(b"\r\n")
+        for reader, writer in held:
+            assert (await reader.read()).startswith(b'HTTP/1.1 200')
+            writer.close()
+        assert (await _request(port, 'GET', '/health'))[0] == 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _run_service(tmp, scenario, max_connections=2)
+    print("✓ 超过连接数上限时返回 503")
+
+
+if __name__ == "__main__":
+    test_submit_and_job_status()
+    test_search()
+    test_concurrent_streaming_qa()
+    test_qa_stops_when_client_disconnects()
+    test_connection_limit()
+    print("所有共享服务测试通过")
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.processor import LiteratureProcessor
+from utils.file_manifest import FileManifest
+from utils.llm_client import LLMClient
+from utils.llm_result_cache import LLMResultCache, bypass_result_cache
+
+_COMBINED = ('{"summary": "# 合并摘要", "title": "T", "keywords": "k", "abstract": "a", '
+             '"is_english": false, "abstract_cn": "", "record_summary": "R"}')
+
+
+def _make_client(tmp, calls):
+    client = LLMClient("http://localhost:1/v1", "test-cache", max_tokens=256)
+
+    async def create(**kwargs):
+        calls.append(kwargs['messages'][0]['content'])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=_COMBINED), finish_reason='stop')],
+            usage=None
+        )
+
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    client.set_result_cache(LLMResultCache(os.path.join(tmp, 'llm_results.db')))
+    return client
+
+
+def test_result_cache_hits():
+    """测试相同的文档分析请求只调用一次 LLM，问答等非缓存请求不受影响"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        client = _make_client(tmp, calls)
+
+        async def run():
+            first = await client.call_with_prompt_type("extract_metadata", "同一篇文献")
+            second = await client.call_with_prompt_type("extract_metadata", "同一篇文献")
+            await client.call_with_prompt_type("extract_metadata", "另一篇文献")
+            client.stream_output = False
+            await client.ask_question("同一篇文献", "问题")
+            await client.ask_question("同一篇文献", "问题")
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first == second
+        assert len(calls) == 4
+        print("✓ LLM 结果缓存命中正确")
+
+
+def test_summary_reuses_batch_record_result():
+    """测试批量入库（合并调用）后再生成摘要不再调用 LLM"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        processor = LiteratureProcessor()
+        processor.llm_client = _make_client(tmp, calls)
+        processor.initialize_database(os.path.join(tmp, 'records.db'))
+        processor.enable_auto_record(True)
+        processor.enable_combined_analysis(True)
+
+        async def fake_extract(file_path, use_cache=True, max_chars=None):
+            return "正文内容 " * 100, 'pdf'
+
+        processor.extraction_pool.extract = fake_extract
+        pdf_path = os.path.join(tmp, 'paper.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(b'%PDF-fake')
+
+        result = asyncio.run(processor.record_single_file(pdf_path, 'pdf'))
+        assert result['status'] == 'success', result
+        assert len(calls) == 1
+
+        result = asyncio.run(processor.process_single_pdf(pdf_path))
+        assert result['status'] == 'success', result
+        assert len(calls) == 1
+        with open(result['summary_path'], 'r', encoding='utf-8') as f:
+            assert f.read() == "# 合并摘要"
+        print("✓ 摘要流程复用批量入库的合并调用结果")
+
+
+def test_lru_eviction():
+    """测试超过容量上限时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResultCache(os.path.join(tmp, 'llm_results.db'))
+        cache.max_size_bytes = 2500
+        cache.put('a', 'summary', 'x' * 1000)
+        cache.put('b', 'summary', 'y' * 1000)
+        assert cache.get('a') == 'x' * 1000  # a 最近被使用，淘汰 b
+        cache.put('c', 'summary', 'z' * 1000)
+        assert cache.get('b') is None
+        assert cache.get('a') is not None and cache.get('c') is not None
+        assert cache.total_size() == 2000
+        print("✓ LLM 结果缓存容量淘汰正常")
+
+
+def test_bypass_regenerates():
+    """测试强制刷新时不读取缓存，新结果覆盖旧缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        client = _make_client(tmp, calls)
+
+        async def run():
+            await client.call_with_prompt_type("extract_metadata", "同一篇文献")
+            with bypass_result_cache():
+                await client.call_with_prompt_type("extract_metadata", "同一篇文献")
+            await client.call_with_prompt_type("extract_metadata", "同一篇文献")
+
+        asyncio.run(run())
+        assert len(calls) == 2
+        print("✓ 强制刷新跳过 LLM 结果缓存")
+
+
+def test_deleted_summary_is_regenerated():
+    """测试删除已生成的摘要文件后再次处理会重新调用 LLM，而不是复用缓存的旧摘要"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        processor = LiteratureProcessor()
+        processor.llm_client = _make_client(tmp, calls)
+        processor.manifest = FileManifest(os.path.join(tmp, 'manifest.db'))
+
+        async def fake_extract(file_path, use_cache=True, max_chars=None):
+            return "正文内容 " * 100, 'pdf'
+
+        processor.extraction_pool.extract = fake_extract
+        pdf_path = os.path.join(tmp, 'paper.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(b'%PDF-fake')
+
+        async def run(force=False):
+            return [result async for result in processor.iter_process_pdfs([pdf_path], 1, force=force)][0]
+
+        assert asyncio.run(run())['status'] == 'success'
+        assert len(calls) == 1
+        assert asyncio.run(run())['status'] == 'skipped'
+        assert len(calls) == 1
+
+        os.remove(pdf_path.replace('.pdf', '.summary.md'))
+        assert processor.scan_pending_pdfs(tmp)[0] == [pdf_path]
+        assert asyncio.run(run())['status'] == 'success'
+        assert len(calls) == 2
+
+        assert asyncio.run(run(force=True))['status'] == 'success'
+        assert len(calls) == 3
+        print("✓ 删除摘要或强制刷新时重新生成")
+
+
+if __name__ == "__main__":
+    test_result_cache_hits()
+    test_summary_reuses_batch_record_result()
+    test_lru_eviction()
+    test_bypass_regenerates()
+    test_deleted_summary_is_regenerated()
+    print("所有测试通过")
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.processor import LiteratureProcessor
+from utils.database import DatabaseManager
+from utils.llm_client import LLMClient
+from utils.minhash import MinHasher, NearDuplicateIndex
+
+
+def _make_text(seed, length=3000):
+    rng = random.Random(seed)
+    return ' '.join(f"word{rng.randint(0, 5000)}" for _ in range(length))
+
+
+def test_signature_similarity():
+    """测试签名相似度接近真实 Jaccard 相似度"""
+    hasher = MinHasher()
+    text = _make_text(1)
+    revised = text + ' ' + ' '.join(f"extra{i}" for i in range(50))
+    same = hasher.similarity(hasher.signature(text), hasher.signature(revised))
+    different = hasher.similarity(hasher.signature(text), hasher.signature(_make_text(2)))
+    assert same > 0.9, same
+    assert different < 0.1, different
+    print("✓ MinHash 签名相似度正确")
+
+
+def test_near_duplicate_link():
+    """测试入库后可通过 LSH 找到近似重复文献并关联文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'records.db'))
+        db.init_db()
+        index = NearDuplicateIndex(db, threshold=0.9, action='link')
+
+        text = _make_text(1)
+        similar, fields = index.check(text, 'v1.pdf', 'hash-v1')
+        assert similar is None
+        record = {'file_path': 'v1.pdf', 'file_type': 'pdf', 'content_hash': 'c1', 'title': 'v1'}
+        record.update(fields)
+        record_id = db.insert_record(record)
+
+        similar, _ = index.check(text + ' revised version', 'v2.pdf', 'hash-v2')
+        assert similar['id'] == record_id
+        assert [link['file_path'] for link in db.get_linked_files(record_id)] == ['v2.pdf']
+        assert db.check_file_duplicate('hash-v2')['id'] == record_id
+
+        similar, _ = index.check(_make_text(3), 'other.pdf', 'hash-other')
+        assert similar is None
+        print("✓ 近似重复检测和关联正确")
+
+
+def test_near_duplicate_skipped_before_summary():
+    """测试摘要流程在调用 LLM 生成摘要前检测近似重复，高度相似的版本直接跳过"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        processor = LiteratureProcessor()
+        processor.llm_client = LLMClient("http://localhost:1/v1", "test-minhash", max_tokens=256)
+
+        async def create(**kwargs):
+            calls.append(kwargs['messages'][0]['content'])
+            content = '{"title": "v1", "keywords": "k", "abstract": "", "is_english": false}'
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')],
+                usage=None
+            )
+
+        processor.llm_client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        processor.initialize_database(os.path.join(tmp, 'records.db'))
+        processor.enable_auto_record(True)
+        processor.enable_near_duplicate_detection(0.9, 'link')
+
+        text = _make_text(1)
+        texts = {'v1.pdf': text, 'v2.pdf': text + ' revised version'}
+
+        async def fake_extract(file_path, use_cache=True, max_chars=None):
+            return texts[os.path.basename(file_path)], 'pdf'
+
+        processor.extraction_pool.extract = fake_extract
+        paths = []
+        for name in texts:
+            paths.append(os.path.join(tmp, name))
+            with open(paths[-1], 'wb') as f:
+                f.write(name.encode())
+
+        result = asyncio.run(processor.process_single_pdf(paths[0]))
+        assert result['status'] == 'success', result
+        llm_calls = len(calls)
+
+        result = asyncio.run(processor.process_single_pdf(paths[1]))
+        assert result['status'] == 'skipped' and '高度相似' in result['error'], result
+        assert 'summary_path' not in result
+        assert not os.path.exists(paths[1].replace('.pdf', '.summary.md'))
+        assert len(calls) == llm_calls
+        assert len(processor.db_manager.get_all_records()) == 1
+        print("✓ 近似重复文献在生成摘要前跳过")
+
+
+if __name__ == "__main__":
+    test_signature_similarity()
+    test_near_duplicate_link()
+    test_near_duplicate_skipped_before_summary()
+    print("\n所有测试通过!")
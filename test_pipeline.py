@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.pipeline import CancellationToken, Pipeline, Stage
+from core.progress import ProgressTracker
+
+
+def test_pipeline_streams_results_with_bounded_work():
+    """测试流水线逐个产出结果，且同时在处理中的任务数有上限"""
+    in_flight = {'now': 0, 'max': 0}
+
+    async def double(x):
+        in_flight['now'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def finish(x):
+        in_flight['now'] -= 1
+        return {'value': x, 'status': 'success'}
+
+    async def main():
+        pipeline = Pipeline([Stage('double', double, 2), Stage('finish', finish, 1)],
+                            is_done=lambda item: isinstance(item, dict))
+        return [r['value'] async for r in pipeline.run(iter(range(100)))]
+
+    values = asyncio.run(main())
+    assert sorted(values) == [x * 2 for x in range(100)]
+    # 两个阶段之间的队列容量为 2，加上各阶段正在处理的任务
+    assert in_flight['max'] <= 6, in_flight
+    print("✓ 流水线有界且逐个产出结果")
+
+
+def test_pipeline_short_circuit_and_errors():
+    """测试提前完成的产物跳过后续阶段，异常转换为失败结果"""
+    seen_by_second = []
+
+    async def first(x):
+        if x == 3:
+            raise ValueError("bad")
+        if x % 2:
+            return {'value': x, 'status': 'skipped'}
+        return x
+
+    async def second(x):
+        seen_by_second.append(x)
+        return {'value': x, 'status': 'success'}
+
+    async def main():
+        pipeline = Pipeline([Stage('first', first, 3), Stage('second', second, 2)],
+                            is_done=lambda item: isinstance(item, dict),
+                            on_error=lambda x, e: {'value': x, 'status': 'failed', 'error': str(e)})
+        return {r['value']: r['status'] async for r in pipeline.run(range(6))}
+
+    statuses = asyncio.run(main())
+    assert statuses == {0: 'success', 1: 'skipped', 2: 'success', 3: 'failed', 4: 'success', 5: 'skipped'}
+    assert sorted(seen_by_second) == [0, 2, 4]
+    print("✓ 提前完成和异常处理正确")
+
+
+def test_cancel_drops_queued_items():
+    """测试取消后各阶段丢弃排队中的任务，finish_on_cancel 的阶段仍处理已交给它的任务"""
+    token = CancellationToken()
+    started = []
+    saved = []
+
+    async def work(x):
+        started.append(x)
+        if x == 1:
+            token.cancel()
+        await asyncio.sleep(0.01)
+        return x
+
+    async def save(x):
+        saved.append(x)
+        return {'value': x, 'status': 'success'}
+
+    async def main():
+        pipeline = Pipeline([Stage('work', work, 2), Stage('save', save, 1, finish_on_cancel=True)],
+                            is_done=lambda item: isinstance(item, dict))
+        return [r['value'] async for r in pipeline.run(range(100), token)]
+
+    values = asyncio.run(main())
+    # 只有取消时正在执行的任务完成，排队中的任务不再开始
+    assert len(started) == 2, started
+    assert sorted(values) == sorted(saved) == sorted(started)
+    print("✓ 取消后丢弃排队中的任务")
+
+
+def test_progress_tracker():
+    """测试进度统计按状态计数，且跳过的文件不计入吞吐量"""
+    progress = ProgressTracker(4)
+    assert progress.eta_seconds is None
+    progress.start_time -= 60
+    for status in ('skipped', 'success', 'timeout'):
+        progress.update({'status': status})
+    assert progress.percent == 75
+    assert progress.failed == 1
+    assert abs(progress.rate - 2.0) < 0.1
+    assert abs(progress.eta_seconds - 30) < 2
+    assert "已完成 3/4" in progress.format_status()
+    print("✓ 进度统计正确")
+
+
+if __name__ == "__main__":
+    test_pipeline_streams_results_with_bounded_work()
+    test_pipeline_short_circuit_and_errors()
+    test_cancel_drops_queued_items()
+    test_progress_tracker()
+    print("\n所有测试通过!")
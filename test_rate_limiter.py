@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from utils.rate_limiter import TokenBucket, RateLimiter, get_rate_limiter
+
+
+def test_token_bucket_wait():
+    """测试令牌桶的等待时间计算和退还"""
+    bucket = TokenBucket(60, capacity=2)  # 每秒补充1个
+    now = bucket.updated
+    assert bucket.reserve(1, now) == 0
+    assert bucket.reserve(1, now) == 0
+    # 余额耗尽，下一个预约需要等待1秒，再下一个等待2秒
+    assert abs(bucket.reserve(1, now) - 1.0) < 1e-6
+    assert abs(bucket.reserve(1, now) - 2.0) < 1e-6
+    # 1秒后补充1个（余额-1），退还2个后余额为1
+    bucket.refund(2, now + 1)
+    assert abs(bucket.level - 1) < 1e-6
+    print("✓ 令牌桶等待时间计算正确")
+
+
+def test_rate_limiter_shared():
+    """测试限流器按服务共享、最小间隔和TPM限制"""
+    assert get_rate_limiter("http://a", "k") is get_rate_limiter("http://a", "k")
+    assert get_rate_limiter("http://a", "k") is not get_rate_limiter("http://b", "k")
+
+    limiter = RateLimiter()
+    assert not limiter.enabled
+    assert limiter.reserve(10 ** 6) == 0
+
+    limiter.configure(min_interval=0.1)
+    assert limiter.enabled
+
+    async def burst():
+        start = time.monotonic()
+        await asyncio.gather(*[limiter.acquire(1) for _ in range(3)])
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(burst())
+    assert elapsed >= 0.18, elapsed
+
+    limiter.configure(tokens_per_minute=600)  # 每秒10个token
+    assert limiter.reserve(600) == 0
+    assert abs(limiter.reserve(10) - 1.0) < 0.05
+    # 退还多预约的token后无需等待
+    limiter.refund(20)
+    assert limiter.reserve(5) == 0
+    print("✓ 限流器共享额度、最小间隔与TPM限制正确")
+
+
+if __name__ == "__main__":
+    test_token_bucket_wait()
+    test_rate_limiter_shared()
+    print("所有测试通过")
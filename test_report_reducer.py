@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.report_reducer import ReportReducer
+from utils.llm_client import LLMClient
+from utils.llm_result_cache import LLMResultCache
+from utils.report_store import ReportStore
+
+
+def _make_client(calls, partial_text="阶段性综合分析"):
+    client = LLMClient("http://localhost:1/v1", "test-report", max_tokens=256)
+    client.set_context_window(1500)
+    merge_system = client.prompt_manager.get_prompt("overall_report_merge")["system"]
+    state = {'in_flight': 0, 'peak': 0}
+
+    async def create(**kwargs):
+        kind = 'merge' if kwargs['messages'][0]['content'] == merge_system else 'report'
+        calls.append(kind)
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        await asyncio.sleep(0.001)
+        state['in_flight'] -= 1
+        # 不同分组的综合分析内容不同
+        digest = hashlib.md5(kwargs['messages'][1]['content'].encode('utf-8')).hexdigest()
+        content = f"{digest} {partial_text}" if kind == 'merge' else "# 总体报告"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')],
+            usage=None
+        )
+
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return client, state
+
+
+def test_small_corpus_single_call():
+    """测试摘要能放入一次调用时不分组归并"""
+    calls = []
+    client, _ = _make_client(calls)
+    reducer = ReportReducer(client)
+    report = asyncio.run(reducer.generate(["摘要一", "摘要二", "摘要三"]))
+    assert report == "# 总体报告"
+    assert calls == ['report']
+    assert reducer.levels == 0
+    print("✓ 小规模总报告单次调用")
+
+
+def test_large_corpus_tree_reduce():
+    """测试大量摘要分组并发归并、每组不超过预算，层数随数量对数增长"""
+    calls = []
+    client, state = _make_client(calls, partial_text="综合分析内容 " * 150)
+    reducer = ReportReducer(client, concurrency=4)
+    summaries = [f"文献 {i} 的摘要：" + "研究内容 " * 40 for i in range(300)]
+
+    batches = reducer.pack_batches(summaries)
+    assert sum(len(batch) for batch in batches) == len(summaries)
+    assert all(sum(reducer._tokens(item) for item in batch) <= reducer.budget for batch in batches)
+
+    report = asyncio.run(reducer.generate(summaries))
+    assert report == "# 总体报告"
+    assert calls[-1] == 'report' and calls.count('report') == 1
+    assert 2 <= reducer.levels <= 10
+    # 每层至少减半，归并调用数不超过文献数
+    assert calls.count('merge') < len(summaries)
+    assert 1 < state['peak'] <= 4
+    print(f"✓ 分层归并: {reducer.levels} 层, {calls.count('merge')} 次归并调用")
+
+
+def test_partials_cached():
+    """测试再次生成总报告时复用缓存的阶段性综合分析"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        client, _ = _make_client(calls)
+        client.set_result_cache(LLMResultCache(os.path.join(tmp, 'llm_results.db')))
+        summaries = [f"文献 {i} 的摘要：" + "研究内容 " * 40 for i in range(100)]
+
+        asyncio.run(ReportReducer(client).generate(summaries))
+        assert calls.count('merge') > 0
+        calls.clear()
+        asyncio.run(ReportReducer(client).generate(summaries))
+        assert calls == ['report']
+        print("✓ 阶段性综合分析缓存复用")
+
+
+def test_incremental_report():
+    """测试新增少量文献时只重新归并受影响的分组，文献不变时不调用 LLM"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        client, _ = _make_client(calls, partial_text="综合分析内容 " * 150)
+        store = ReportStore(os.path.join(tmp, 'report_tree.db'))
+        summaries = [f"文献 {i} 的摘要：" + "研究内容 " * 40 for i in range(300)]
+
+        reducer = ReportReducer(client, store=store)
+        asyncio.run(reducer.generate(summaries))
+        full_calls = reducer.calls
+        assert full_calls == len(calls) and reducer.reused == 0
+
+        # 分组与文献顺序无关
+        asyncio.run(reducer.generate(list(reversed(summaries))))
+        assert reducer.calls == 0 and reducer.reused > 0
+
+        # 新增两篇文献只重新生成其所在分组及上层
+        asyncio.run(reducer.generate(summaries + ["新文献 A 的摘要：新方法", "新文献 B 的摘要：新数据集"]))
+        assert 0 < reducer.calls <= 2 * (reducer.levels + 1)
+        assert reducer.calls < full_calls / 3
+        print(f"✓ 增量总报告: 全量 {full_calls} 次调用，新增两篇后 {reducer.calls} 次")
+
+
+def test_store_bounded_by_lru():
+    """测试多次重新生成后归并节点存储不超过容量上限，且最近一次生成的节点仍可全部复用"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        client, _ = _make_client(calls, partial_text="综合分析内容 " * 150)
+        store = ReportStore(os.path.join(tmp, 'report_tree.db'))
+        summaries = [f"文献 {i} 的摘要：" + "研究内容 " * 40 for i in range(300)]
+
+        reducer = ReportReducer(client, store=store)
+        asyncio.run(reducer.generate(summaries))
+        store.max_size_bytes = store.total_size() * 3 // 2
+
+        # 每轮替换一批文献，旧分支不再被使用
+        for round_index in range(5):
+            summaries[:60] = [f"第 {round_index} 轮新文献 {i} 的摘要：" + "新内容 " * 40 for i in range(60)]
+            asyncio.run(reducer.generate(summaries))
+            assert reducer.calls > 0
+            assert store.total_size() <= store.max_size_bytes
+
+        asyncio.run(reducer.generate(summaries))
+        assert reducer.calls == 0
+        print(f"✓ 归并节点存储按 LRU 淘汰（{store.total_size()} 字节）")
+
+
+if __name__ == "__main__":
+    test_small_corpus_single_call()
+    test_large_corpus_tree_reduce()
+    test_partials_cached()
+    test_incremental_report()
+    test_store_bounded_by_lru()
+    print("所有总报告归并测试通过")
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.llm_client import LLMClient
+from utils.retry_policy import RetryPolicy, is_retryable_error, retry_after_seconds, track_retries
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def test_retry_policy_delay():
+    """测试可重试错误判断、Retry-After 解析和退避上限"""
+    assert is_retryable_error(_StatusError(429))
+    assert is_retryable_error(_StatusError(502))
+    assert not is_retryable_error(_StatusError(401))
+    assert not is_retryable_error(ValueError("bad"))
+
+    assert retry_after_seconds(_StatusError(429, {'retry-after': '7'})) == 7
+    assert retry_after_seconds(_StatusError(429, {'retry-after-ms': '1500'})) == 1.5
+    assert retry_after_seconds(_StatusError(429)) is None
+
+    policy = RetryPolicy(max_retries=2, base_delay=1.0, max_delay=5.0)
+    assert policy.delay(_StatusError(429, {'retry-after': '30'}), 0) == 5.0
+    for retries in range(6):
+        assert 0 <= policy.delay(_StatusError(503), retries) <= min(5.0, 2 ** retries)
+    assert policy.should_retry(_StatusError(503), 1)
+    assert not policy.should_retry(_StatusError(503), 2)
+    assert not policy.should_retry(_StatusError(400), 0)
+    print("✓ 重试策略判断与退避时间正确")
+
+
+def test_chat_completion_retries():
+    """测试暂时性错误重试后成功，并按任务统计重试次数"""
+    client = LLMClient("http://localhost:1/v1", "test-retry", max_tokens=16)
+    client.set_retry_policy(max_retries=3, max_delay=0)
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) < 3:
+            raise _StatusError(429, {'retry-after': '0'})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))], usage=None)
+
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def run():
+        with track_retries() as retries:
+            result = await client.call_with_prompt_type("extract_metadata", "text")
+        return result, retries.count
+
+    result, count = asyncio.run(run())
+    assert result == "ok"
+    assert count == 2 and len(calls) == 3
+    print("✓ LLM 请求自动重试并统计重试次数")
+
+
+if __name__ == "__main__":
+    test_retry_policy_delay()
+    test_chat_completion_retries()
+    print("所有测试通过")
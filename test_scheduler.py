@@ -0,0 +1,162 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.pipeline import Pipeline, Stage
+from core.processor import LiteratureProcessor
+from core.scheduler import JobScheduler
+
+
+def _make_files(tmp):
+    """创建大小和修改时间不同的文件：a 最大最旧，c 最小最新"""
+    paths = []
+    now = time.time()
+    for i, (name, size) in enumerate([('a.pdf', 300), ('b.pdf', 200), ('c.pdf', 100)]):
+        path = os.path.join(tmp, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        os.utime(path, (now + i, now + i))
+        paths.append(path)
+    return paths
+
+
+def test_policies():
+    """测试调度策略和显式优先级"""
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b, c = _make_files(tmp)
+        names = lambda scheduler: [os.path.basename(p) for p in scheduler]
+
+        scheduler = JobScheduler('fifo')
+        for path in (a, b, c):
+            scheduler.add(path)
+        assert names(scheduler) == ['a.pdf', 'b.pdf', 'c.pdf']
+
+        scheduler = JobScheduler('shortest_first')
+        for path in (a, b, c):
+            scheduler.add(path)
+        assert names(scheduler) == ['c.pdf', 'b.pdf', 'a.pdf']
+
+        scheduler = JobScheduler('recent_first')
+        for path in (a, b, c):
+            scheduler.add(path)
+        scheduler.add(a, priority=5)
+        assert len(scheduler) == 3
+        assert names(scheduler) == ['a.pdf', 'c.pdf', 'b.pdf']
+
+        try:
+            JobScheduler('random')
+            assert False, "未知策略应抛出异常"
+        except ValueError:
+            pass
+        print("✓ 调度策略和显式优先级正确")
+
+
+def test_prioritize_folder():
+    """测试调整文件夹下待处理文件的优先级"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'urgent'))
+        scheduler = JobScheduler()
+        paths = [os.path.join(tmp, f'{i}.pdf') for i in range(5)]
+        paths.append(os.path.join(tmp, 'urgent', 'x.pdf'))
+        for path in paths:
+            scheduler.add(path)
+        assert scheduler.prioritize_folder(os.path.join(tmp, 'urgent'), 10) == 1
+        assert scheduler.pop() == paths[-1]
+        assert not scheduler.set_priority(paths[-1], 10)
+        assert scheduler.set_priority(paths[3], 1)
+        assert [scheduler.pop() for _ in range(4)] == [paths[3], paths[0], paths[1], paths[2]]
+        print("✓ 文件夹优先级调整正确")
+
+
+def test_bump_during_run():
+    """测试流水线运行中提高优先级的文件在下一个空位开始处理"""
+    scheduler = JobScheduler()
+    for i in range(20):
+        scheduler.add(f'/papers/{i}.pdf')
+    order = []
+
+    async def handle(path):
+        order.append(path)
+        if len(order) == 1:
+            scheduler.set_priority('/papers/19.pdf', 10)
+        await asyncio.sleep(0.001)
+        return path
+
+    async def run():
+        pipeline = Pipeline([Stage('work', handle, workers=1)], queue_size=1)
+        return [result async for result in pipeline.run(scheduler)]
+
+    results = asyncio.run(run())
+    assert len(results) == 20
+    # 已进入流水线队列的文件（最多 queue_size + 1 个）之后立即处理被提前的文件
+    assert order.index('/papers/19.pdf') <= 3
+    print(f"✓ 运行中调整优先级生效: 第 {order.index('/papers/19.pdf') + 1} 个处理")
+
+
+def _counting(paths, reads):
+    """逐个产出 (路径, 路径) 并记录已读取的数量"""
+    for path in paths:
+        reads.append(path)
+        yield path, path
+
+
+def test_lazy_source():
+    """测试 fifo 策略出队时才逐个读取任务序列，其他策略和调整优先级时读取全部"""
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b, c = _make_files(tmp)
+
+        reads = []
+        scheduler = JobScheduler('fifo')
+        scheduler.extend(_counting([a, b, c], reads))
+        assert scheduler.pop() == a and reads == [a]
+        # 调整尚未读取的文件的优先级
+        assert scheduler.set_priority(c, 5) and reads == [a, b, c]
+        assert [scheduler.pop() for _ in range(3)] == [c, b, None]
+
+        reads = []
+        scheduler = JobScheduler('shortest_first')
+        scheduler.extend(_counting([a, b, c], reads))
+        assert scheduler.pop() == c and len(reads) == 3
+    print("✓ 任务序列惰性读取正确")
+
+
+def test_fifo_run_streams_scan():
+    """测试 fifo 策略下流水线不等遍历完扫描结果就开始处理"""
+    processor = LiteratureProcessor()
+    reads = []
+    first_extract_at = []
+
+    async def fake_extract_stage(item):
+        if not first_extract_at:
+            first_extract_at.append(len(reads))
+        return {'pdf_path': item['pdf_path'], 'status': 'skipped'}
+
+    processor._extract_stage = fake_extract_stage
+
+    def scan():
+        for i in range(500):
+            reads.append(i)
+            yield f'/papers/{i}.pdf'
+
+    async def run():
+        async for result in processor.iter_process_pdfs(scan(), stage_workers={'extract': 1}):
+            return result
+
+    asyncio.run(run())
+    assert first_extract_at[0] <= 5, first_extract_at
+    assert len(reads) < 500
+    print(f"✓ fifo 调度流式读取扫描结果（读取 {first_extract_at[0]} 个后开始处理）")
+
+
+if __name__ == "__main__":
+    test_policies()
+    test_prioritize_folder()
+    test_bump_during_run()
+    test_lazy_source()
+    test_fifo_run_streams_scan()
+    print("所有调度测试通过")
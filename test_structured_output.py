@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.processor import LiteratureProcessor
+from utils.structured_output import StructuredOutputError, parse_json_object, validate_combined_analysis
+
+
+def test_validate_combined_analysis():
+    """测试合并调用结果的解析与字段校验"""
+    raw = '好的：\n```json\n{"summary": "# 标题", "title": "T", "keywords": ["a", "b"], ' \
+          '"is_english": "true", "record_summary": "概要"}\n```'
+    result = validate_combined_analysis(parse_json_object(raw))
+    assert result['keywords'] == 'a, b'
+    assert result['is_english'] is True
+    assert result['abstract'] == '' and result['abstract_cn'] == ''
+
+    for bad in ('不是JSON', '{"summary": "", "record_summary": "x"}', '{"summary": "x"}',
+                '{"summary": "x", "record_summary": "y", "is_english": "maybe"}'):
+        try:
+            validate_combined_analysis(parse_json_object(bad))
+            assert False, bad
+        except StructuredOutputError:
+            pass
+    print("✓ 合并调用结果校验正确")
+
+
+class _FakeLLM:
+    def __init__(self, combined_result, fits=True):
+        self.combined_result = combined_result
+        self.fits = fits
+        self.calls = []
+
+    def fits_combined_analysis(self, text):
+        return self.fits
+
+    async def generate_combined_analysis(self, text):
+        self.calls.append('combined')
+        if isinstance(self.combined_result, Exception):
+            raise self.combined_result
+        return self.combined_result
+
+    async def generate_summary(self, text):
+        self.calls.append('summary')
+        return "分步摘要"
+
+    async def call_with_prompt_type(self, prompt_type, text, temperature=0.3):
+        self.calls.append(prompt_type)
+        if prompt_type == 'extract_metadata':
+            return '{"title": "分步标题", "keywords": "k", "abstract": "abs", "is_english": false}'
+        return "分步概要"
+
+
+def _run(tmp, llm, name):
+    processor = LiteratureProcessor()
+    processor.llm_client = llm
+    processor.initialize_database(os.path.join(tmp, f'{name}.db'))
+    processor.enable_auto_record(True)
+    processor.enable_combined_analysis(True)
+
+    async def fake_extract(file_path, use_cache=True, max_chars=None):
+        return f"{name} 正文内容 " * 50, 'pdf'
+
+    processor.extraction_pool.extract = fake_extract
+    pdf_path = os.path.join(tmp, f'{name}.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(b'%PDF-fake ' + name.encode())
+    result = asyncio.run(processor.process_single_pdf(pdf_path))
+    assert result['status'] == 'success', result
+    with open(result['summary_path'], 'r', encoding='utf-8') as f:
+        summary = f.read()
+    return summary, processor.db_manager.get_all_records()
+
+
+def test_combined_analysis_single_call():
+    """测试合并调用只请求一次 LLM，结果无效时改为分步调用"""
+    with tempfile.TemporaryDirectory() as tmp:
+        llm = _FakeLLM({'summary': '合并摘要', 'title': '合并标题', 'keywords': 'k1, k2', 'abstract': 'abs',
+                        'is_english': True, 'abstract_cn': '摘要译文', 'record_summary': '合并概要'})
+        summary, records = _run(tmp, llm, 'combined')
+        assert llm.calls == ['combined']
+        assert summary == '合并摘要'
+        assert records[0]['title'] == '合并标题'
+        assert records[0]['abstract_cn'] == '摘要译文'
+        assert records[0]['summary'] == '合并概要'
+
+        llm = _FakeLLM(StructuredOutputError("缺少字段 summary"))
+        summary, records = _run(tmp, llm, 'fallback')
+        assert llm.calls[:2] == ['combined', 'summary']
+        assert sorted(llm.calls[2:]) == ['extract_metadata', 'generate_record_summary']
+        assert summary == '分步摘要'
+        assert records[0]['title'] == '分步标题'
+
+        # 全文放不进合并调用时直接分步调用，摘要覆盖全文
+        llm = _FakeLLM(StructuredOutputError("不应调用"), fits=False)
+        summary, records = _run(tmp, llm, 'too_long')
+        assert llm.calls[0] == 'summary' and 'combined' not in llm.calls
+        assert summary == '分步摘要'
+        print("✓ 合并调用与分步回退正确")
+
+
+if __name__ == "__main__":
+    test_validate_combined_analysis()
+    test_combined_analysis_single_call()
+    print("所有测试通过")
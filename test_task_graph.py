@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.task_graph import TaskGraph
+
+
+def test_independent_tasks_run_concurrently():
+    """测试互不依赖的任务并发执行，依赖任务拿到上游结果"""
+    async def slow(value, delay):
+        await asyncio.sleep(delay)
+        return value
+
+    async def metadata(_):
+        return await slow({'abstract': 'abs'}, 0.1)
+
+    async def translate(deps):
+        return await slow(deps['metadata']['abstract'] + '-cn', 0.1)
+
+    async def summary(_):
+        return await slow('summary', 0.2)
+
+    graph = TaskGraph()
+    graph.add('metadata', metadata)
+    graph.add('abstract_cn', translate, deps=['metadata'])
+    graph.add('summary', summary)
+
+    start = time.monotonic()
+    results = asyncio.run(graph.run())
+    elapsed = time.monotonic() - start
+    assert results == {'metadata': {'abstract': 'abs'}, 'abstract_cn': 'abs-cn', 'summary': 'summary'}
+    # 总耗时取决于最长路径（0.2 秒），而不是所有调用之和（0.4 秒）
+    assert elapsed < 0.35, elapsed
+    print("✓ 任务图并发执行正确")
+
+
+def test_error_cancels_other_tasks():
+    """测试任一任务出错时取消其他任务并抛出异常"""
+    finished = []
+
+    async def fail(_):
+        raise ValueError("元数据解析失败")
+
+    async def slow(_):
+        await asyncio.sleep(1)
+        finished.append('slow')
+
+    graph = TaskGraph()
+    graph.add('metadata', fail)
+    graph.add('summary', slow)
+    try:
+        asyncio.run(graph.run())
+        assert False, "应抛出异常"
+    except ValueError:
+        pass
+    assert finished == []
+
+    try:
+        TaskGraph().add('abstract_cn', slow, deps=['metadata'])
+        assert False, "应拒绝不存在的依赖"
+    except ValueError:
+        pass
+    print("✓ 任务图错误处理正确")
+
+
+if __name__ == "__main__":
+    test_independent_tasks_run_concurrently()
+    test_error_cancels_other_tasks()
+    print("所有测试通过")
@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.text_cache import TextCache
+from utils.text_extractor import TextExtractor
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def test_same_name_files_do_not_collide():
+    """测试不同目录下的同名文件使用各自的缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TextCache(os.path.join(tmp, 'cache'))
+        path_a = os.path.join(tmp, 'a', 'paper.md')
+        path_b = os.path.join(tmp, 'b', 'paper.md')
+        _write(path_a, 'first paper')
+        _write(path_b, 'second paper')
+
+        cache.put(path_a, 'text a')
+        cache.put(path_b, 'text b')
+
+        assert cache.get(path_a) == 'text a'
+        assert cache.get(path_b) == 'text b'
+        print("✓ 同名文件缓存互不覆盖")
+
+
+def test_extractor_uses_cache():
+    """测试 TextExtractor 命中缓存时不再读取文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        extractor = TextExtractor(TextCache(os.path.join(tmp, 'cache')))
+        path = os.path.join(tmp, 'doc.md')
+        _write(path, 'original content')
+
+        assert extractor.extract(path) == ('original content', 'md')
+        extractor._extract_md = lambda file_path, max_chars=None: 'parsed again'
+        assert extractor.extract(path) == ('original content', 'md')
+
+        # 文件内容变化后缓存失效
+        _write(path, 'changed content, different size')
+        assert extractor.extract(path) == ('parsed again', 'md')
+        print("✓ 文本提取器正确使用缓存")
+
+
+def test_partial_text_only_serves_smaller_budgets():
+    """测试按预算截断的缓存文本只满足不超过其长度的请求"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TextCache(os.path.join(tmp, 'cache'))
+        path = os.path.join(tmp, 'doc.md')
+        _write(path, 'content')
+
+        cache.put(path, 'x' * 100, complete=False)
+        assert cache.get(path, min_chars=50) == 'x' * 100
+        assert cache.get(path, min_chars=200) is None
+        assert cache.get(path) is None
+
+        cache.put(path, 'y' * 300, complete=True)
+        cache.put(path, 'z' * 10, complete=False)
+        assert cache.get(path) == 'y' * 300
+        print("✓ 截断文本缓存命中规则正确")
+
+
+def test_lru_eviction():
+    """测试超过容量上限时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TextCache(os.path.join(tmp, 'cache'), max_size_mb=0)
+        path = os.path.join(tmp, 'doc.md')
+        _write(path, 'content')
+
+        cache.put(path, 'x' * 1000)
+        assert cache.get(path) is None
+        assert cache.total_size() == 0
+        print("✓ 缓存容量淘汰正常")
+
+
+def test_concurrent_put_same_file():
+    """测试同一进程内多个线程同时写入同一条目不会互相破坏临时文件"""
+    from concurrent.futures import ThreadPoolExecutor
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TextCache(os.path.join(tmp, 'cache'))
+        path = os.path.join(tmp, 'doc.md')
+        _write(path, 'content')
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: cache.put(path, 'text ' * 20000), range(32)))
+        assert cache.get(path) == 'text ' * 20000
+        blob_dir = os.path.dirname(cache._blob_path(cache.get_key(path)[2]))
+        assert not [name for name in os.listdir(blob_dir) if name.endswith('.tmp')]
+        print("✓ 并发写入同一条目正常")
+
+
+if __name__ == "__main__":
+    test_same_name_files_do_not_collide()
+    test_extractor_uses_cache()
+    test_partial_text_only_serves_smaller_budgets()
+    test_lru_eviction()
+    test_concurrent_put_same_file()
+    print("\n所有测试通过!")
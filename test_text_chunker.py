@@ -0,0 +1,159 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.llm_client import LLMClient
+from utils.text_chunker import chunk_text, is_heading, split_sections
+
+
+def _count(text: str) -> int:
+    return len(text) // 4
+
+
+def _paper(paragraphs_per_section: int = 20) -> str:
+    sections = ["Abstract", "1 Introduction", "2 Method", "2.1 Model", "3 Experiments", "4 Conclusion"]
+    text = "A Study of Something\n\n"
+    for title in sections:
+        body = "\n\n".join(f"{title} paragraph {i}: " + "words " * 30 for i in range(paragraphs_per_section))
+        text += f"{title}\n{body}\n\n"
+    return text
+
+
+def test_headings():
+    """测试章节标题识别"""
+    for line in ["1 Introduction", "2.1 Model Architecture", "## 方法", "三、实验结果", "References", "结论"]:
+        assert is_heading(line), line
+    for line in ["1.5 times faster than", "the results show that", "x" * 100]:
+        assert not is_heading(line), line
+    print("✓ 章节标题识别正确")
+
+
+def test_section_aligned_chunks():
+    """测试分块不超过预算、在章节边界切分且拼接后与原文一致"""
+    text = _paper(paragraphs_per_section=5)
+    sections = split_sections(text)
+    assert len(sections) == 7
+    assert ''.join(sections) == text
+
+    budget = _count(sections[1]) * 2 + 10
+    chunks = chunk_text(text, budget, _count)
+    assert ''.join(chunks) == text
+    assert all(_count(chunk) <= budget for chunk in chunks)
+    # 每块都从章节标题开始（章节都短于预算时）
+    assert all(is_heading(chunk.splitlines()[0]) or chunk is chunks[0] for chunk in chunks)
+
+    # 单个章节超过预算时按段落切分
+    small = _count(sections[1]) // 3
+    chunks = chunk_text(text, small, _count)
+    assert ''.join(chunks) == text
+    assert all(_count(chunk) <= small for chunk in chunks)
+    print("✓ 按章节分块正确")
+
+
+def test_long_document_map_reduce():
+    """测试超长文献分块并发摘要后合并，短文献单次调用"""
+    client = LLMClient("http://localhost:1/v1", "test-chunk", max_tokens=256)
+    client.set_context_window(2000)
+    chunk_system = client.prompt_manager.get_prompt("summary_chunk")["system"]
+    calls = []
+
+    async def create(**kwargs):
+        if kwargs['messages'][0]['content'] == chunk_system:
+            kind = 'chunk'
+        elif "各部分要点" in kwargs['messages'][1]['content']:
+            kind = 'merge'
+        else:
+            kind = 'summary'
+        calls.append(kind)
+        await asyncio.sleep(0.001)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"{kind} 要点"), finish_reason='stop')],
+            usage=None
+        )
+
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    short_text = "Title\n\nshort paper"
+    assert not client.needs_chunking(short_text)
+    assert asyncio.run(client.generate_summary(short_text)) == "summary 要点"
+    assert calls == ['summary']
+
+    calls.clear()
+    long_text = _paper()
+    assert client.needs_chunking(long_text)
+    assert asyncio.run(client.generate_summary(long_text)) == "merge 要点"
+    assert calls[-1] == 'merge' and calls.count('merge') == 1
+    assert calls.count('chunk') >= 2
+    print(f"✓ 超长文献分块摘要: {calls.count('chunk')} 块")
+
+
+def test_chunk_fan_out_is_bounded():
+    """测试单篇文献的分块调用数不超过 chunk_concurrency，启用自适应并发时不超过当前上限的一半"""
+    client = LLMClient("http://localhost:1/v1", "test-fan-out", max_tokens=256)
+    client.set_context_window(2000)
+    state = {'in_flight': 0, 'peak': 0}
+
+    async def create(**kwargs):
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        await asyncio.sleep(0.01)
+        state['in_flight'] -= 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="要点"), finish_reason='stop')],
+            usage=None
+        )
+
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    client.set_chunk_concurrency(3)
+    asyncio.run(client.generate_summary(_paper()))
+    assert state['peak'] == 3, state
+
+    state['peak'] = 0
+    client.set_adaptive_concurrency(True, initial=2, max_limit=2)
+    asyncio.run(client.generate_summary(_paper()))
+    assert state['peak'] == 1, state
+    print("✓ 分块摘要并发数受限")
+
+
+def test_combined_prompt_sends_full_text():
+    """测试长于单篇调用字符上限、但无需分块的文献，合并调用收到的是全文"""
+    client = LLMClient("http://localhost:1/v1", "test-combined", max_tokens=2048)
+    prompts = []
+
+    async def create(**kwargs):
+        prompts.append(kwargs['messages'][1]['content'])
+        content = ('{"summary": "# 摘要", "title": "T", "keywords": "k", "abstract": "a", '
+                   '"is_english": true, "abstract_cn": "", "record_summary": "R"}')
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')],
+            usage=None
+        )
+
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    text = _paper(paragraphs_per_section=20) + "END OF PAPER"
+    assert len(text) > client.summary_text_budget()
+    assert not client.needs_chunking(text) and client.fits_combined_analysis(text)
+    asyncio.run(client.generate_combined_analysis(text))
+    assert text in prompts[0]
+
+    # 超过合并调用预算时（调用方应改为分步调用）按预算截断，不超出上下文窗口
+    client.set_context_window(4000)
+    assert not client.fits_combined_analysis(text)
+    messages = client._combined_analysis_messages(text)
+    assert client._count_tokens(messages) + client.max_tokens <= client.context_window
+    print("✓ 合并调用发送全文")
+
+
+if __name__ == "__main__":
+    test_headings()
+    test_section_aligned_chunks()
+    test_long_document_map_reduce()
+    test_chunk_fan_out_is_bounded()
+    test_combined_prompt_sends_full_text()
+    print("所有分块摘要测试通过")
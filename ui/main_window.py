@@ -10,7 +10,10 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QFormLayout, QApplication, QFileDialog, QListWidget, QMessageBox, QComboBox,
                              QListWidgetItem)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from core.processor import LiteratureProcessor
+from core.folder_watcher import FolderWatcher
+from core.pipeline import CancellationToken
+from core.processor import LiteratureProcessor, configure_processor
+from core.progress import ProgressTracker
 from core.record_worker import RecordWorker
 from utils.config_manager import ConfigManager
 from utils.llm_client import LLMClient
@@ -20,6 +23,8 @@ class ProcessWorker(QThread):
     # 定义信号
     log_signal = pyqtSignal(str)
     progress_signal = pyqtSignal(int)
+    result_signal = pyqtSignal(dict)  # 单个文件处理完成
+    status_signal = pyqtSignal(str)   # 进度、吞吐量和预计剩余时间
     finished_signal = pyqtSignal(list)
     error_signal = pyqtSignal(str)
     
@@ -27,36 +32,68 @@ class ProcessWorker(QThread):
         super().__init__()
         self.processor = processor
         self.config = config
+        self.cancel_token = CancellationToken()
+
+    def cancel(self):
+        """请求停止：不再开始新的文献，进行中的文献处理完后结束"""
+        self.cancel_token.cancel()
+
+    async def _run_pipeline(self, pdf_files):
+        """运行摘要流水线，每完成一个文件立即通知界面并更新进度、吞吐量和预计剩余时间"""
+        results = []
+        progress = ProgressTracker(len(pdf_files))
+        async for result in self.processor.iter_process_pdfs(
+            pdf_files,
+            self.config['concurrency'],
+            self.config['cache_text'],
+            progress=progress,
+            cancel_token=self.cancel_token,
+            force=self.config.get('force_refresh', False)
+        ):
+            # 只保留轻量结果，摘要内容在生成总报告时再从文件读取
+            result.pop('summary', None)
+            results.append(result)
+            self.result_signal.emit(result)
+            self.progress_signal.emit(progress.percent)
+            status = progress.format_status()
+            metrics = self.processor.concurrency_snapshot()
+            if metrics is not None:
+                status += f"，LLM并发 {metrics['in_flight']}/{metrics['limit']}"
+            self.status_signal.emit(status)
+
+            filename = os.path.basename(result['pdf_path'])
+            retry_note = f"（LLM重试 {result['retries']} 次）" if result.get('retries') else ""
+            if result['status'] in ('success', 'skipped'):
+                self.log_signal.emit(
+                    f"[{progress.completed}/{progress.total}] {result['status']} - {filename}{retry_note}"
+                )
+            else:
+                self.log_signal.emit(
+                    f"[{progress.completed}/{progress.total}] 处理失败 [{result['status']}] - {filename}{retry_note}"
+                )
+        return results
         
     def run(self):
         try:
-            # 初始化LLM客户端
-            self.processor.initialize_llm_client(
-                self.config['base_url'],
-                self.config['api_key'],
-                self.config['max_tokens'],
-                self.config['model']
-            )
-            
-            # 设置API请求间隔
-            if 'api_request_delay' in self.config:
-                self.processor.set_api_request_delay(self.config['api_request_delay'])
-
-            # 初始化数据库并启用自动记录
-            if self.config.get('auto_record', False):
-                self.processor.initialize_database()
-                self.processor.enable_auto_record(True)
-            
-            # 扫描PDF文件
+            configure_processor(self.processor, self.config)
+
+            # 增量扫描PDF文件（只处理新增、已变化或上次失败的文件）
             self.log_signal.emit("正在扫描PDF文件...")
-            pdf_files = self.processor.scan_pdfs(self.config['folder_path'])
+            if self.config.get('force_refresh'):
+                # 强制刷新：所有PDF重新生成摘要
+                pdf_files, unchanged_files = self.processor.scan_pdfs(self.config['folder_path']), []
+            else:
+                pdf_files, unchanged_files = self.processor.scan_pending_pdfs(self.config['folder_path'])
             
-            if not pdf_files:
+            if not pdf_files and not unchanged_files:
                 self.log_signal.emit("未找到PDF文件")
                 self.finished_signal.emit([])
                 return
                 
-            self.log_signal.emit(f"找到 {len(pdf_files)} 个PDF文件: {', '.join([os.path.basename(f) for f in pdf_files])}")
+            if unchanged_files:
+                self.log_signal.emit(f"{len(unchanged_files)} 个PDF文件未变化且已处理，跳过")
+            if pdf_files:
+                self.log_signal.emit(f"找到 {len(pdf_files)} 个待处理PDF文件: {', '.join([os.path.basename(f) for f in pdf_files])}")
             
             # 更新文献列表
             # 这里需要通过信号传递给主线程更新UI
@@ -68,39 +105,52 @@ class ProcessWorker(QThread):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             
-            results = loop.run_until_complete(
-                self.processor.process_pdfs(
-                    pdf_files, 
-                    self.config['concurrency'], 
-                    self.config['cache_text']
-                )
-            )
+            results = loop.run_until_complete(self._run_pipeline(pdf_files))
             
             loop.close()
+
+            if self.cancel_token.cancelled:
+                self.log_signal.emit(
+                    f"处理已停止: {len(pdf_files) - len(results)} 个文件尚未开始，下次运行将从此处继续"
+                )
+
+            # 未变化的文件按已跳过处理，摘要在需要时再读取
+            results.extend({
+                'pdf_path': pdf_path,
+                'summary_path': pdf_path.replace('.pdf', '.summary.md'),
+                'status': 'skipped'
+            } for pdf_path in unchanged_files)
             
-            # 处理完成
+            # 处理完成（超时/内存超限/已隔离的文件计入失败）
             success_count = sum(1 for r in results if r['status'] == 'success')
             skip_count = sum(1 for r in results if r['status'] == 'skipped')
-            fail_count = sum(1 for r in results if r['status'] == 'failed')
+            fail_count = len(results) - success_count - skip_count
             
             self.log_signal.emit(f"处理完成: 成功 {success_count}, 跳过 {skip_count}, 失败 {fail_count}")
             
             # 显示失败详情
             for result in results:
-                if result['status'] == 'failed':
+                if result['status'] not in ('success', 'skipped'):
                     filename = os.path.basename(result['pdf_path'])
-                    self.log_signal.emit(f"处理失败 - {filename}: {result['error']}")
+                    self.log_signal.emit(f"处理失败 [{result['status']}] - {filename}: {result['error']}")
             
-            # 如果需要生成总报告
-            if self.config['generate_overall_report']:
+            # 如果需要生成总报告（手动停止时不生成）
+            if self.config['generate_overall_report'] and not self.cancel_token.cancelled:
                 self.log_signal.emit("正在生成总报告...")
-                summaries = [r['summary'] for r in results if r['status'] in ['success', 'skipped']]
+                summaries = []
+                for r in results:
+                    # 近似重复而跳过的文献没有摘要（结果中不含 summary_path）
+                    if r['status'] in ['success', 'skipped'] and 'summary_path' in r:
+                        try:
+                            summaries.append(self.processor.load_summary(r))
+                        except OSError as e:
+                            self.log_signal.emit(f"无法读取摘要 {r['summary_path']}: {str(e)}")
                 if summaries:
                     try:
                         loop = asyncio.new_event_loop()
                         asyncio.set_event_loop(loop)
                         report = loop.run_until_complete(
-                            self.processor.generate_overall_report(summaries)
+                            self.processor.generate_overall_report(summaries, self.config['concurrency'])
                         )
                         loop.close()
                         self.log_signal.emit("总报告已生成: overall_report.md")
@@ -117,6 +167,63 @@ class ProcessWorker(QThread):
             self.error_signal.emit(error_details)
 
 
+class WatchWorker(QThread):
+    """监视模式工作线程：持续处理文件夹中新放入的文献"""
+    log_signal = pyqtSignal(str)
+    result_signal = pyqtSignal(dict)
+    finished_signal = pyqtSignal()
+    error_signal = pyqtSignal(str)
+
+    def __init__(self, processor, config):
+        super().__init__()
+        self.processor = processor
+        self.config = config
+        self.watcher = FolderWatcher(
+            config['folder_path'],
+            config.get('watch_settle_seconds', 2),
+            config.get('watch_poll_interval', 5)
+        )
+
+    def stop(self):
+        """停止监视，正在处理的文件完成后线程退出"""
+        self.watcher.stop()
+
+    async def _handle_file(self, file_path, file_type, semaphore):
+        async with semaphore:
+            result = await self.processor.process_new_file(file_path, file_type, self.config['cache_text'])
+        self.result_signal.emit(result)
+
+    async def _watch(self):
+        semaphore = asyncio.Semaphore(self.config['concurrency'])
+        tasks = set()
+        async for file_path, file_type in self.watcher.watch():
+            self.log_signal.emit(f"检测到新文件: {os.path.basename(file_path)}")
+            task = asyncio.ensure_future(self._handle_file(file_path, file_type, semaphore))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run(self):
+        try:
+            configure_processor(self.processor, self.config)
+            self.log_signal.emit(
+                f"监视模式已启动（{self.watcher.mode}）: {self.config['folder_path']}"
+            )
+
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self._watch())
+            finally:
+                loop.close()
+
+            self.finished_signal.emit()
+        except Exception as e:
+            error_details = f"{str(e)}\n{traceback.format_exc()}"
+            self.error_signal.emit(error_details)
+
+
 class APIConnectionTestWorker(QThread):
     """API连接测试工作线程"""
     log_signal = pyqtSignal(str)
@@ -160,6 +267,7 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.processor = LiteratureProcessor()
         self.worker = None
+        self.watch_worker = None
         self.api_test_worker = None
         self.config_manager = ConfigManager()
         self.config = self.config_manager.load_config()
@@ -216,10 +324,20 @@ class MainWindow(QMainWindow):
         folder_layout.addWidget(self.folder_path_input)
         folder_layout.addWidget(folder_browse_btn)
         
-        # 并发数
+        # 并发数（启用自适应并发时为初始并发，实际并发在 1 到 max_concurrency 之间自动调整）
+        concurrency_layout = QHBoxLayout()
         self.concurrency_spin = QSpinBox()
         self.concurrency_spin.setMinimum(1)
         self.concurrency_spin.setMaximum(20)
+        self.adaptive_concurrency_check = QCheckBox("自适应并发（以并发数为初始值自动调整）")
+        concurrency_layout.addWidget(self.concurrency_spin)
+        concurrency_layout.addWidget(self.adaptive_concurrency_check)
+        
+        # 文本提取进程数（0 表示使用CPU核数）
+        self.extract_workers_spin = QSpinBox()
+        self.extract_workers_spin.setMinimum(0)
+        self.extract_workers_spin.setMaximum(64)
+        self.extract_workers_spin.setSpecialValueText("自动")
         
         # 最大token数
         self.max_token_spin = QSpinBox()
@@ -234,7 +352,7 @@ class MainWindow(QMainWindow):
         
         # 选项
         self.generate_overall_report_check = QCheckBox("生成总报告")
-        self.cache_text_check = QCheckBox("保留原始文本缓存")
+        self.cache_text_check = QCheckBox("启用提取文本缓存")
         self.stream_output_check = QCheckBox("启用流式输出")
         self.stream_output_check.setChecked(False)  # 默认关闭流式输出
         self.auto_record_check = QCheckBox("自动记录到数据库")
@@ -243,7 +361,8 @@ class MainWindow(QMainWindow):
         config_layout.addRow("API Key:", self.api_key_input)
         config_layout.addRow("模型:", self.model_combo)
         config_layout.addRow("文件夹路径:", folder_layout)
-        config_layout.addRow("并发数:", self.concurrency_spin)
+        config_layout.addRow("并发数:", concurrency_layout)
+        config_layout.addRow("文本提取进程数:", self.extract_workers_spin)
         config_layout.addRow("最大Token数:", self.max_token_spin)
         config_layout.addRow("API请求间隔:", self.api_delay_spin)
         config_layout.addRow(self.generate_overall_report_check)
@@ -261,6 +380,11 @@ class MainWindow(QMainWindow):
         self.stop_btn = QPushButton("停止")
         self.stop_btn.setEnabled(False)
         self.stop_btn.clicked.connect(self.stop_processing)
+        self.prioritize_btn = QPushButton("优先处理文件夹")
+        self.prioritize_btn.clicked.connect(self.prioritize_folder)
+        self.watch_btn = QPushButton("监视模式")
+        self.watch_btn.setCheckable(True)
+        self.watch_btn.clicked.connect(self.toggle_watch_mode)
         self.refresh_btn = QPushButton("强制刷新")
         self.refresh_btn.clicked.connect(self.refresh_processing)
         self.test_api_btn = QPushButton("测试API连接")
@@ -270,6 +394,8 @@ class MainWindow(QMainWindow):
         
         control_layout.addWidget(self.start_btn)
         control_layout.addWidget(self.stop_btn)
+        control_layout.addWidget(self.prioritize_btn)
+        control_layout.addWidget(self.watch_btn)
         control_layout.addWidget(self.refresh_btn)
         control_layout.addWidget(self.test_api_btn)
         control_layout.addWidget(self.save_config_btn)
@@ -279,6 +405,8 @@ class MainWindow(QMainWindow):
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
         main_layout.addWidget(self.progress_bar)
+        self.status_label = QLabel("")
+        main_layout.addWidget(self.status_label)
         
         # 日志区域
         self.log_display = QTextEdit()
@@ -319,6 +447,8 @@ class MainWindow(QMainWindow):
         self.model_combo.setCurrentText(self.config.get('model', 'gpt-3.5-turbo'))
         self.folder_path_input.setText(self.config.get('folder_path', ''))
         self.concurrency_spin.setValue(self.config.get('concurrency', 5))
+        self.adaptive_concurrency_check.setChecked(self.config.get('adaptive_concurrency', False))
+        self.extract_workers_spin.setValue(self.config.get('extract_workers', 0))
         self.max_token_spin.setValue(self.config.get('max_tokens', 2048))
         self.api_delay_spin.setValue(self.config.get('api_request_delay', 0))
         self.generate_overall_report_check.setChecked(self.config.get('generate_overall_report', True))
@@ -328,17 +458,7 @@ class MainWindow(QMainWindow):
         
     def save_config_from_ui(self):
         """从UI控件保存配置"""
-        self.config['base_url'] = self.base_url_input.text()
-        self.config['api_key'] = self.api_key_input.text()
-        self.config['model'] = self.model_combo.currentText()
-        self.config['folder_path'] = self.folder_path_input.text()
-        self.config['concurrency'] = self.concurrency_spin.value()
-        self.config['max_tokens'] = self.max_token_spin.value()
-        self.config['api_request_delay'] = self.api_delay_spin.value()
-        self.config['generate_overall_report'] = self.generate_overall_report_check.isChecked()
-        self.config['cache_text'] = self.cache_text_check.isChecked()
-        self.config['stream_output'] = self.stream_output_check.isChecked()
-        self.config['auto_record'] = self.auto_record_check.isChecked()
+        self.config.update(self._runtime_config(self.folder_path_input.text()))
         
         self.config_manager.save_config(self.config)
         QMessageBox.information(self, "成功", "配置已保存")
@@ -376,7 +496,30 @@ class MainWindow(QMainWindow):
         if folder_path:
             self.folder_path_input.setText(folder_path)
             
-    def start_processing(self):
+    def _runtime_config(self, folder_path: str) -> dict:
+        """
+        本次运行的配置：config.json 中的全部设置（缺省项已由 ConfigManager 补全），界面控件的当前值优先
+
+        摘要、监视模式和批量入库共用，新增配置项只需加入 ConfigManager.default_config。
+        """
+        return dict(
+            self.config,
+            base_url=self.base_url_input.text().strip(),
+            api_key=self.api_key_input.text().strip(),
+            model=self.model_combo.currentText(),
+            folder_path=folder_path,
+            concurrency=self.concurrency_spin.value(),
+            adaptive_concurrency=self.adaptive_concurrency_check.isChecked(),
+            extract_workers=self.extract_workers_spin.value(),
+            max_tokens=self.max_token_spin.value(),
+            api_request_delay=self.api_delay_spin.value(),
+            generate_overall_report=self.generate_overall_report_check.isChecked(),
+            cache_text=self.cache_text_check.isChecked(),
+            stream_output=self.stream_output_check.isChecked(),
+            auto_record=self.auto_record_check.isChecked()
+        )
+
+    def start_processing(self, force_refresh=False):
         folder_path = self.folder_path_input.text().strip()
         if not folder_path:
             QMessageBox.warning(self, "警告", "请选择文献文件夹路径")
@@ -386,49 +529,117 @@ class MainWindow(QMainWindow):
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.progress_bar.setValue(0)
+        self.status_label.setText("")
+        self.literature_list.clear()
         
         # 获取配置
-        config = {
-            'base_url': self.base_url_input.text(),
-            'api_key': self.api_key_input.text(),
-            'model': self.model_combo.currentText(),
-            'folder_path': folder_path,
-            'concurrency': self.concurrency_spin.value(),
-            'max_tokens': self.max_token_spin.value(),
-            'generate_overall_report': self.generate_overall_report_check.isChecked(),
-            'cache_text': self.cache_text_check.isChecked(),
-            'auto_record': self.auto_record_check.isChecked()
-        }
+        config = self._runtime_config(folder_path)
         
         # 保存当前配置
         self.config.update(config)
         self.config_manager.save_config(self.config)
         
-        # 启动处理线程
-        self.worker = ProcessWorker(self.processor, config)
+        # 启动处理线程（强制刷新只对本次运行生效，不写入配置文件）
+        self.worker = ProcessWorker(self.processor, dict(config, force_refresh=force_refresh))
         self.worker.log_signal.connect(self.log)
         self.worker.progress_signal.connect(self.update_progress)
+        self.worker.result_signal.connect(self.processing_result)
+        self.worker.status_signal.connect(self.status_label.setText)
         self.worker.finished_signal.connect(self.processing_finished)
         self.worker.error_signal.connect(self.processing_error)
         self.worker.start()
         
     def stop_processing(self):
         if self.worker and self.worker.isRunning():
-            self.worker.terminate()
-            self.worker.wait()
-            self.log("处理已停止")
-            self.start_btn.setEnabled(True)
+            # 协作式停止：进行中的LLM调用照常完成并保存，结束后由 processing_finished 恢复按钮
+            self.worker.cancel()
+            self.log("正在停止，等待进行中的文献处理完成...")
             self.stop_btn.setEnabled(False)
         if hasattr(self, 'record_worker') and self.record_worker and self.record_worker.isRunning():
+            # 协作式停止：进行中的文件处理完后结束，由 batch_record_finished 恢复按钮
             self.record_worker.stop()
-            self.record_worker.wait()
-            self.log("批量入库已停止")
-            self.batch_record_btn.setEnabled(True)
+            self.log("正在停止批量入库，等待进行中的文件处理完成...")
             self.stop_btn.setEnabled(False)
         
+    def prioritize_folder(self):
+        """把选中文件夹下尚未开始的文件提到处理队列最前（处理中立即生效，也用于之后的处理）"""
+        folder_path = QFileDialog.getExistingDirectory(self, "选择优先处理的文件夹", self.folder_path_input.text())
+        if not folder_path:
+            return
+        count = self.processor.prioritize(folder_path)
+        if hasattr(self, 'record_worker') and self.record_worker and self.record_worker.isRunning():
+            count += self.record_worker.processor.prioritize(folder_path)
+        self.log(f"已设置优先处理: {folder_path}（当前队列中 {count} 个文件）")
+
+    def toggle_watch_mode(self, checked):
+        """启动或停止监视模式"""
+        if not checked:
+            if self.watch_worker and self.watch_worker.isRunning():
+                self.log("正在停止监视模式...")
+                self.watch_btn.setEnabled(False)
+                self.watch_worker.stop()
+            return
+
+        if self.worker and self.worker.isRunning():
+            QMessageBox.warning(self, "警告", "请等待当前批处理完成后再启动监视模式")
+            self.watch_btn.setChecked(False)
+            return
+
+        folder_path = self.folder_path_input.text().strip()
+        if not folder_path or not os.path.isdir(folder_path):
+            QMessageBox.warning(self, "警告", "请选择有效的文献文件夹路径")
+            self.watch_btn.setChecked(False)
+            return
+
+        config = self._runtime_config(folder_path)
+
+        # 监视期间与批处理共用处理器，禁止同时开始批处理
+        self.start_btn.setEnabled(False)
+        self.watch_btn.setText("停止监视")
+
+        self.watch_worker = WatchWorker(self.processor, config)
+        self.watch_worker.log_signal.connect(self.log)
+        self.watch_worker.result_signal.connect(self.watch_result)
+        self.watch_worker.finished_signal.connect(self.watch_finished)
+        self.watch_worker.error_signal.connect(self.watch_error)
+        self.watch_worker.start()
+
+    def watch_result(self, result):
+        """监视模式下单个文件处理完成"""
+        filename = os.path.basename(result['pdf_path'])
+        if result['status'] == 'success':
+            if result['file_type'] == 'pdf':
+                self.add_literature_item(result)
+                self.log(f"已生成摘要: {filename}")
+            else:
+                self.log(f"已记录到数据库: {filename}")
+        elif result['status'] == 'skipped':
+            self.log(f"跳过: {filename}")
+        else:
+            self.log(f"处理失败 [{result['status']}] - {filename}: {result.get('error', '')}")
+
+    def _reset_watch_ui(self):
+        self.watch_btn.setEnabled(True)
+        self.watch_btn.setChecked(False)
+        self.watch_btn.setText("监视模式")
+        self.start_btn.setEnabled(True)
+
+    def watch_finished(self):
+        self._reset_watch_ui()
+        self.log("监视模式已停止")
+
+    def watch_error(self, error_msg):
+        self._reset_watch_ui()
+        QMessageBox.critical(self, "错误", f"监视模式发生错误:\n{error_msg}")
+        self.log(f"监视模式错误: {error_msg}")
+
     def refresh_processing(self):
+        """强制刷新：重新生成所有文献的摘要（不使用 LLM 结果缓存中的旧结果）"""
+        if (self.worker and self.worker.isRunning()) or (self.watch_worker and self.watch_worker.isRunning()):
+            QMessageBox.warning(self, "警告", "请等待当前处理完成（或停止监视模式）后再强制刷新")
+            return
         self.log("强制刷新处理...")
-        # 在实际应用中，这里应该设置一个标志位，让处理过程跳过已存在的文件检查
+        self.start_processing(force_refresh=True)
         
     def regenerate_single(self):
         self.log("重新生成选中文献...")
@@ -482,25 +693,36 @@ class MainWindow(QMainWindow):
         self.stop_btn.setEnabled(False)
         self.progress_bar.setValue(100)
         
-        # 更新文献列表
-        self.literature_list.clear()
+        # 新处理的文献已在完成时逐个加入列表，这里补充未变化而跳过的文献
+        listed = {self.literature_list.item(i).data(Qt.UserRole)['pdf_path']
+                  for i in range(self.literature_list.count())}
         for result in results:
-            if result['status'] in ['success', 'skipped']:
-                filename = os.path.basename(result['pdf_path'])
-                summary_filename = filename.replace('.pdf', '.summary.md')
-                # 在列表项中同时显示PDF文件名和摘要文件位置
-                display_text = f"{filename} → {summary_filename}"
-                item = QListWidgetItem(display_text)
-                # 将完整路径信息存储在item的data中
-                item.setData(Qt.UserRole, {
-                    'pdf_path': result['pdf_path'],
-                    'summary_path': result['summary_path'] if 'summary_path' in result else result['pdf_path'].replace('.pdf', '.summary.md')
-                })
-                self.literature_list.addItem(item)
+            if result['status'] in ['success', 'skipped'] and 'summary_path' in result \
+                    and result['pdf_path'] not in listed:
+                self.add_literature_item(result)
         
         self.log("所有处理已完成")
         self.log("摘要文件已保存在对应的PDF文件同目录下，文件名后缀为.summary.md")
         
+    def processing_result(self, result):
+        """单个文件处理完成后立即加入文献列表"""
+        if result['status'] in ['success', 'skipped'] and 'summary_path' in result:
+            self.add_literature_item(result)
+
+    def add_literature_item(self, result):
+        """将处理成功的PDF添加到文献列表"""
+        filename = os.path.basename(result['pdf_path'])
+        summary_filename = filename.replace('.pdf', '.summary.md')
+        # 在列表项中同时显示PDF文件名和摘要文件位置
+        display_text = f"{filename} → {summary_filename}"
+        item = QListWidgetItem(display_text)
+        # 将完整路径信息存储在item的data中
+        item.setData(Qt.UserRole, {
+            'pdf_path': result['pdf_path'],
+            'summary_path': result['summary_path'] if 'summary_path' in result else result['pdf_path'].replace('.pdf', '.summary.md')
+        })
+        self.literature_list.addItem(item)
+
     def processing_error(self, error_msg):
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
@@ -550,16 +772,10 @@ class MainWindow(QMainWindow):
         self.batch_record_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
 
-        config = {
-            'base_url': base_url,
-            'api_key': api_key,
-            'model': self.model_combo.currentText(),
-            'max_tokens': self.max_token_spin.value(),
-            'folder_path': folder_path,
-            'api_request_delay': self.api_delay_spin.value(),
-        }
+        config = self._runtime_config(folder_path)
 
-        self.record_worker = RecordWorker(config)
+        # 与摘要流程共用同一个提取进程池（文本缓存、LLM 结果缓存按内容共享）
+        self.record_worker = RecordWorker(config, self.processor.extraction_pool)
         self.record_worker.log_signal.connect(self.log)
         self.record_worker.progress_signal.connect(self.update_progress)
         self.record_worker.finished_signal.connect(self.batch_record_finished)
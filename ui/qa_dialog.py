@@ -8,7 +8,8 @@ import json
 import threading
 from datetime import datetime
 from utils.llm_client import LLMClient
-from utils.pdf_reader import PDFReader
+from utils.text_cache import TextCache
+from utils.text_extractor import TextExtractor
 
 
 class QADialog(QDialog):
@@ -24,7 +25,8 @@ class QADialog(QDialog):
         self.stream_output = stream_output
         self.qa_file = pdf_path.replace('.pdf', '.qa.md')
         self.summary_file = pdf_path.replace('.pdf', '.summary.md')  # 修正摘要文件路径
-        self.pdf_reader = PDFReader()
+        # 多轮问答复用提取文本缓存，避免每次提问都重新解析PDF
+        self.text_extractor = TextExtractor(TextCache())
         self.llm_client = None
         # 限制内存中的对话历史长度，保留最近20轮对话（40条消息）
         self.conversation_history = []
@@ -204,7 +206,8 @@ class QADialog(QDialog):
 
         # 获取文献内容
         try:
-            text = self.pdf_reader.extract_text(self.pdf_path)
+            # 只解析问答提示词能容纳的部分
+            text, _ = self.text_extractor.extract(self.pdf_path, self.llm_client.qa_text_budget())
         except Exception as e:
             QMessageBox.critical(self, "错误", f"无法读取文献内容: {str(e)}")
             return
@@ -266,58 +269,28 @@ class QADialog(QDialog):
         else:
             self.log_signal.emit(assistant_header)
         
-        # 获取问答提示词
-        qa_prompt = self.llm_client.prompt_manager.get_prompt("question_answer")
-
-        messages = [
-            {"role": "system", "content": qa_prompt["system"]},
-        ]
-
-        # 添加历史对话（如果存在）
-        if self.conversation_history:
-            messages.extend(self.conversation_history)
-
-        # 添加当前文献内容和问题
-        formatted_user_prompt = qa_prompt["user"].format(text=text[:self.llm_client.max_tokens*2], question=question)
-        messages.append({"role": "user", "content": formatted_user_prompt})
-
-        # 检查并修剪对话历史以适应token限制
-        total_tokens = self.llm_client._count_tokens(messages)
-        if total_tokens > self.llm_client.max_tokens:  # 如果超过最大token数，则进行修剪
-            # 为响应留出一些空间（20%的max_tokens）
-            max_allowed_tokens = int(self.llm_client.max_tokens * 0.8)
-            messages = self.llm_client._trim_history(messages, max_allowed_tokens)
+        def show_delta(content):
+            # 实时显示内容
+            if threading.current_thread() is threading.main_thread():
+                # 直接插入文本，不添加额外的换行符
+                self.history_display.insertPlainText(content)
+                # 滚动到最新内容
+                cursor = self.history_display.textCursor()
+                cursor.movePosition(cursor.End)
+                self.history_display.setTextCursor(cursor)
+                self.history_display.ensureCursorVisible()
+                # 强制更新界面
+                self.history_display.repaint()
+            else:
+                # 使用信号在主线程中更新UI
+                self.log_signal.emit(content)
 
         try:
-            # 流式获取回答
-            response = await self.llm_client.client.chat.completions.create(
-                model=self.llm_client.model,
-                messages=messages,
-                max_tokens=self.llm_client.max_tokens,
-                temperature=0.7,
-                stream=True
+            # 流式获取回答（经过共享限流、重试和并发控制）
+            full_response = await self.llm_client.ask_question(
+                text, question, self.conversation_history, on_delta=show_delta
             )
-            
-            full_response = ""
-            async for chunk in response:
-                if chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    full_response += content
-                    # 实时显示内容
-                    if threading.current_thread() is threading.main_thread():
-                        # 直接插入文本，不添加额外的换行符
-                        self.history_display.insertPlainText(content)
-                        # 滚动到最新内容
-                        cursor = self.history_display.textCursor()
-                        cursor.movePosition(cursor.End)
-                        self.history_display.setTextCursor(cursor)
-                        self.history_display.ensureCursorVisible()
-                        # 强制更新界面
-                        self.history_display.repaint()
-                    else:
-                        # 使用信号在主线程中更新UI
-                        self.log_signal.emit(content)
-            
+
             # 添加换行和空行（只添加一次）
             if threading.current_thread() is threading.main_thread():
                 self.history_display.insertPlainText("\n\n")
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """判断异常是否表示服务过载：HTTP 429、5xx 或请求超时"""
+    status_code = getattr(error, 'status_code', None)
+    if isinstance(status_code, int) and (status_code == 429 or status_code >= 500):
+        return True
+    return isinstance(error, (asyncio.TimeoutError, TimeoutError)) or 'Timeout' in type(error).__name__
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 自适应并发控制器
+
+    在并发上限被用满且延迟正常时，每完成 limit 个请求上限加 1（加性增）；
+    遇到 429/5xx/超时时上限减半，最近一个窗口的 p95 延迟超过基线的 latency_tolerance 倍时
+    上限乘以 0.9（乘性减）。同一次降低之前发出的请求再报错不会重复降低。
+    基线为历次完整窗口中最低的 p95 延迟；比基线高出不到 min_latency_increase 秒的波动不视为延迟升高。
+    使用线程锁保护，可被不同线程中的不同事件循环共享。
+    """
+
+    def __init__(self, initial: int = 5, max_limit: int = 32, min_limit: int = 1, window: int = 20,
+                 latency_tolerance: float = 2.0, backoff: float = 0.5, latency_backoff: float = 0.9,
+                 min_latency_increase: float = 0.05):
+        """
+        Args:
+            initial: 初始并发上限
+            max_limit: 并发上限的最大值
+            min_limit: 并发上限的最小值
+            window: 计算 p95 延迟的样本窗口大小
+            latency_tolerance: p95 延迟超过基线的倍数时降低上限
+            backoff: 遇到过载错误时上限乘以的系数
+            latency_backoff: 延迟升高时上限乘以的系数
+            min_latency_increase: 视为延迟升高的最小增量（秒），避免毫秒级的计时抖动降低上限
+        """
+        self._lock = threading.Lock()
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.initial = initial
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.latency_backoff = latency_backoff
+        self.min_latency_increase = min_latency_increase
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self._latencies: deque = deque(maxlen=window)
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self.overload_errors = 0
+
+    def configure(self, initial: int, max_limit: int):
+        """更新初始值和最大值；初始值改变时从新的初始值重新开始调整"""
+        with self._lock:
+            self.max_limit = max(self.min_limit, max_limit)
+            if initial != self.initial:
+                self.initial = initial
+                self._limit = float(initial)
+            self._limit = min(max(self._limit, self.min_limit), self.max_limit)
+            self._wake_locked()
+
+    @property
+    def limit(self) -> int:
+        """当前并发上限"""
+        return int(self._limit)
+
+    def _p95(self) -> Optional[float]:
+        if len(self._latencies) < self.window:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def snapshot(self) -> Dict:
+        """返回当前指标：并发上限、进行中请求数、p95 延迟、基线延迟、过载错误数"""
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'p95_latency': self._p95(),
+                'baseline_latency': self._baseline,
+                'overload_errors': self.overload_errors,
+            }
+
+    def _wake_locked(self):
+        """把空出的并发槽交给等待中的请求（需持有锁）"""
+        while self._waiters and self.in_flight < self.limit:
+            loop, future = self._waiters.popleft()
+            self.in_flight += 1
+            loop.call_soon_threadsafe(self._grant, future)
+
+    def _grant(self, future: asyncio.Future):
+        if future.done():
+            # 等待方已取消，归还并发槽
+            self._release_slot()
+        else:
+            future.set_result(None)
+
+    def _release_slot(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake_locked()
+
+    async def acquire(self) -> float:
+        """等待一个并发槽，返回请求开始时间（交给 release）"""
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                return time.monotonic()
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append((asyncio.get_running_loop(), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((asyncio.get_running_loop(), future))
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted and future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+        return time.monotonic()
+
+    def _decrease_locked(self, factor: float, started: float, now: float):
+        # 上次降低之后发出的请求才能再次触发降低
+        if started < self._last_decrease:
+            return
+        self._limit = max(self.min_limit, self._limit * factor)
+        self._last_decrease = now
+        self._latencies.clear()
+
+    def release(self, started: float, error: BaseException = None):
+        """
+        请求结束后归还并发槽，并根据结果调整上限
+
+        Args:
+            started: acquire 返回的开始时间
+            error: 请求抛出的异常，成功时为 None
+        """
+        now = time.monotonic()
+        with self._lock:
+            saturated = self.in_flight >= self.limit
+            self.in_flight -= 1
+            if error is not None:
+                if is_overload_error(error):
+                    self.overload_errors += 1
+                    self._decrease_locked(self.backoff, started, now)
+            else:
+                self._latencies.append(now - started)
+                p95 = self._p95()
+                if p95 is not None:
+                    if self._baseline is None or p95 < self._baseline:
+                        self._baseline = p95
+                if (p95 is not None and p95 > self._baseline * self.latency_tolerance
+                        and p95 - self._baseline > self.min_latency_increase):
+                    self._decrease_locked(self.latency_backoff, started, now)
+                elif saturated:
+                    self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self._wake_locked()
+
+
+# 进程内共享的并发控制器，按 (base_url, api_key) 区分不同的服务
+_controllers: Dict[Tuple[str, str], AdaptiveConcurrency] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_concurrency_controller(base_url: str, api_key: str) -> AdaptiveConcurrency:
+    """获取指定服务的共享并发控制器"""
+    key = (str(base_url), api_key or '')
+    with _controllers_lock:
+        controller = _controllers.get(key)
+        if controller is None:
+            controller = AdaptiveConcurrency()
+            _controllers[key] = controller
+        return controller
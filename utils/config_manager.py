@@ -11,11 +11,39 @@ class ConfigManager:
             "api_key": "",
             "model": "gpt-3.5-turbo",
             "concurrency": 5,
+            "adaptive_concurrency": False,  # 根据429/5xx错误和延迟自动调整LLM并发（并发数作为初始值）
+            "max_concurrency": 32,  # 自适应并发的上限
+            "extract_workers": 0,    # 文本提取进程数（0 表示使用CPU核数）
             "max_tokens": 2048,
             "generate_overall_report": True,
             "cache_text": True,
+            "text_cache_max_mb": 1024,  # 提取文本缓存容量上限（MB）
+            "extract_timeout": 300,     # 单个文件提取超时（秒，0 表示不限制）
+            "extract_memory_limit_mb": 2048,  # 单个文件提取内存上限（MB，0 表示不限制）
             "folder_path": "",
+            "incremental_scan": True,  # 基于文件清单的增量扫描
+            "max_failures": 3,         # 连续失败多少次后隔离文件
+            "near_duplicate_threshold": 0.9,  # 近似重复判定的相似度阈值（0 表示关闭）
+            "near_duplicate_action": "link",  # 近似重复的处理方式：skip 跳过 / link 关联到已有记录
+            "combined_analysis": False,  # 自动记录时用一次JSON结构化调用同时生成摘要、元数据和入库概要
+            "cache_llm_results": True,  # 缓存文档分析类LLM结果，摘要流程与批量入库对同一文档只付费一次
+            "llm_cache_max_mb": 256,  # LLM结果缓存容量上限（MB），超过时按LRU淘汰
+            "context_window": 16000,  # 模型上下文窗口（token 数），总报告超过时分组归并
+            "chunk_concurrency": 2,  # 单篇超长文献分块摘要时同时进行的调用数上限
+            "incremental_report": True,  # 保存总报告的分组归并结果，再次生成时只重新生成有变化的分组
+            "report_cache_max_mb": 64,  # 总报告归并节点存储容量上限（MB），超过时按LRU淘汰
+            "schedule_policy": "fifo",  # 处理顺序：fifo 扫描顺序 / shortest_first 短文献优先 / recent_first 最近修改优先
+            "server_host": "127.0.0.1",  # 共享服务（python -m cli serve）监听地址
+            "server_port": 8765,         # 共享服务端口
+            "server_max_connections": 64,  # 共享服务同时处理的连接数上限，超过时返回 503
+            "server_qa_concurrency": 4,    # 共享服务同时进行的问答数（其余排队等待）
+            "watch_settle_seconds": 2,  # 监视模式：文件保持不变多少秒后视为复制完成
+            "watch_poll_interval": 5,   # 监视模式：未安装 watchdog 时的轮询间隔（秒）
             "api_request_delay": 0,  # API请求间隔（秒）
+            "rate_limit_rpm": 0,  # 每分钟最大LLM请求数，0表示不限制（摘要、入库、问答共享）
+            "rate_limit_tpm": 0,  # 每分钟最大token数，0表示不限制
+            "llm_max_retries": 3,  # LLM请求遇到429/5xx/连接失败/超时时的最大重试次数（指数退避+随机抖动）
+            "llm_retry_max_delay": 60,  # 单次重试等待上限（秒），服务端返回Retry-After时优先按其等待
             "stream_output": True,   # 是否启用流式输出
             "auto_record": True      # 自动记录到数据库
         }
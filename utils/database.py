@@ -1,6 +1,6 @@
 import sqlite3
 import os
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 
@@ -11,7 +11,8 @@ class DatabaseManager:
         self.db_path = db_path
 
     def _get_connection(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        # 多个 worker 进程共用数据库文件时，写锁冲突最多等待 30 秒
+        conn = sqlite3.connect(self.db_path, timeout=30)
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -25,6 +26,8 @@ class DatabaseManager:
                     file_path    TEXT NOT NULL,
                     file_type    TEXT NOT NULL,
                     content_hash TEXT NOT NULL UNIQUE,
+                    file_hash    TEXT,
+                    minhash      BLOB,
                     title        TEXT,
                     keywords     TEXT,
                     abstract     TEXT,
@@ -34,10 +37,74 @@ class DatabaseManager:
                     updated_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            # 旧版数据库升级：增加文件原始字节哈希列，用于提取文本前去重
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(literature_records)")]
+            if 'file_hash' not in columns:
+                conn.execute("ALTER TABLE literature_records ADD COLUMN file_hash TEXT")
+            if 'minhash' not in columns:
+                conn.execute("ALTER TABLE literature_records ADD COLUMN minhash BLOB")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON literature_records(content_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_hash ON literature_records(file_hash)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_title ON literature_records(title)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_file_type ON literature_records(file_type)")
 
+            # MinHash LSH 分段索引：(band, bucket) 相同的记录为近似重复候选
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS minhash_bands (
+                    band       INTEGER NOT NULL,
+                    bucket     INTEGER NOT NULL,
+                    record_id  INTEGER NOT NULL,
+                    PRIMARY KEY (band, bucket, record_id)
+                ) WITHOUT ROWID
+            """)
+            # 与已有记录高度相似、关联到该记录而不单独入库的文件
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS record_links (
+                    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                    record_id   INTEGER NOT NULL,
+                    file_path   TEXT NOT NULL,
+                    file_hash   TEXT,
+                    similarity  REAL,
+                    created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_link_record ON record_links(record_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_link_file_hash ON record_links(file_hash)")
+
+            # 文件原始字节哈希 → 记录：同一记录可对应多个文件（重新导出的副本、近似重复的版本），
+            # 每个见过的文件哈希都保存，下次遇到任一文件均无需提取文本
+            has_file_hashes = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'file_hashes'"
+            ).fetchone() is not None
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    file_hash  TEXT PRIMARY KEY,
+                    record_id  INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_hashes_record ON file_hashes(record_id)")
+            if not has_file_hashes:
+                # 旧版数据库升级：导入记录和关联文件上已有的文件哈希
+                conn.execute("""
+                    INSERT OR IGNORE INTO file_hashes (file_hash, record_id)
+                    SELECT file_hash, id FROM literature_records WHERE file_hash IS NOT NULL
+                """)
+                conn.execute("""
+                    INSERT OR IGNORE INTO file_hashes (file_hash, record_id)
+                    SELECT file_hash, record_id FROM record_links WHERE file_hash IS NOT NULL
+                """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS literature_file_hashes_ad AFTER DELETE ON literature_records BEGIN
+                    DELETE FROM file_hashes WHERE record_id = old.id;
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS literature_minhash_ad AFTER DELETE ON literature_records BEGIN
+                    DELETE FROM minhash_bands WHERE record_id = old.id;
+                    DELETE FROM record_links WHERE record_id = old.id;
+                END
+            """)
+
             # FTS5 全文检索虚拟表（title, keywords, abstract, abstract_cn, summary, file_path）
             conn.execute("""
                 CREATE VIRTUAL TABLE IF NOT EXISTS literature_fts USING fts5(
@@ -86,21 +153,34 @@ class DatabaseManager:
         try:
             cursor = conn.execute("""
                 INSERT INTO literature_records
-                    (file_path, file_type, content_hash, title, keywords,
+                    (file_path, file_type, content_hash, file_hash, minhash, title, keywords,
                      abstract, abstract_cn, summary)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 record['file_path'],
                 record['file_type'],
                 record['content_hash'],
+                record.get('file_hash'),
+                record.get('minhash'),
                 record.get('title', ''),
                 record.get('keywords', ''),
                 record.get('abstract', ''),
                 record.get('abstract_cn', ''),
                 record.get('summary', ''),
             ))
+            record_id = cursor.lastrowid
+            if record.get('file_hash'):
+                conn.execute(
+                    "INSERT OR REPLACE INTO file_hashes (file_hash, record_id) VALUES (?, ?)",
+                    (record['file_hash'], record_id)
+                )
+            if record.get('minhash_bands'):
+                conn.executemany(
+                    "INSERT OR IGNORE INTO minhash_bands (band, bucket, record_id) VALUES (?, ?, ?)",
+                    [(band, bucket, record_id) for band, bucket in record['minhash_bands']]
+                )
             conn.commit()
-            return cursor.lastrowid
+            return record_id
         finally:
             conn.close()
 
@@ -116,26 +196,110 @@ class DatabaseManager:
         finally:
             conn.close()
 
-    def get_all_records(self, file_type: str = None) -> List[Dict]:
-        """获取所有记录，可按文件类型筛选"""
+    def check_file_duplicate(self, file_hash: str) -> Optional[Dict]:
+        """
+        按文件原始字节哈希检查是否已入库（无需提取文本），返回已有记录或 None
+
+        入库的文件、内容相同的其他副本和作为近似重复关联到某条记录的文件均视为已入库。
+        """
+        conn = self._get_connection()
+        try:
+            row = conn.execute("""
+                SELECT r.* FROM file_hashes h
+                JOIN literature_records r ON r.id = h.record_id
+                WHERE h.file_hash = ?
+            """, (file_hash,)).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def find_minhash_candidates(self, band_keys: List[Tuple[int, int]]) -> List[Dict]:
+        """返回与任一 LSH 分段桶相同的记录（id, title, file_path, minhash）"""
+        if not band_keys:
+            return []
+        conn = self._get_connection()
+        try:
+            conditions = ' OR '.join(['(b.band = ? AND b.bucket = ?)'] * len(band_keys))
+            params = [value for key in band_keys for value in key]
+            rows = conn.execute(f"""
+                SELECT DISTINCT r.id, r.title, r.file_path, r.minhash
+                FROM minhash_bands b
+                JOIN literature_records r ON r.id = b.record_id
+                WHERE {conditions}
+            """, params).fetchall()
+            return [dict(row) for row in rows if row['minhash']]
+        finally:
+            conn.close()
+
+    def link_file(self, record_id: int, file_path: str, file_hash: str = None, similarity: float = None):
+        """将近似重复的文件关联到已有记录"""
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                "INSERT INTO record_links (record_id, file_path, file_hash, similarity) VALUES (?, ?, ?, ?)",
+                (record_id, file_path, file_hash, similarity)
+            )
+            if file_hash:
+                conn.execute(
+                    "INSERT OR REPLACE INTO file_hashes (file_hash, record_id) VALUES (?, ?)",
+                    (file_hash, record_id)
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_linked_files(self, record_id: int) -> List[Dict]:
+        """获取关联到记录的近似重复文件"""
+        conn = self._get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM record_links WHERE record_id = ? ORDER BY created_at",
+                (record_id,)
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def set_file_hash(self, record_id: int, file_hash: str):
+        """
+        记录文件哈希对应的记录（旧记录或内容相同的另一份文件命中时），
+        每个文件哈希都保存，记录本身的 file_hash 列只在为空时补充
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (file_hash, record_id) VALUES (?, ?)",
+                (file_hash, record_id)
+            )
+            conn.execute(
+                "UPDATE literature_records SET file_hash = ? WHERE id = ? AND file_hash IS NULL",
+                (file_hash, record_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_all_records(self, file_type: str = None, limit: int = None) -> List[Dict]:
+        """获取所有记录，可按文件类型筛选；limit 为最多返回的记录数（None 表示不限制）"""
+        sql_limit = -1 if limit is None else limit  # SQLite 中 LIMIT -1 表示不限制
         conn = self._get_connection()
         try:
             if file_type:
                 rows = conn.execute(
-                    "SELECT * FROM literature_records WHERE file_type = ? ORDER BY created_at DESC",
-                    (file_type,)
+                    "SELECT * FROM literature_records WHERE file_type = ? ORDER BY created_at DESC LIMIT ?",
+                    (file_type, sql_limit)
                 ).fetchall()
             else:
                 rows = conn.execute(
-                    "SELECT * FROM literature_records ORDER BY created_at DESC"
+                    "SELECT * FROM literature_records ORDER BY created_at DESC LIMIT ?", (sql_limit,)
                 ).fetchall()
             return [dict(row) for row in rows]
         finally:
             conn.close()
 
-    def search_records(self, query: str) -> List[Dict]:
+    def search_records(self, query: str, limit: int = None) -> List[Dict]:
         """
-        使用 FTS5 + BM25 全文检索，按相关性排序
+        使用 FTS5 + BM25 全文检索，按相关性排序，limit 为最多返回的记录数（None 表示不限制）
 
         支持的查询语法：
         - 简单词: "神经网络" → 匹配包含这些字的记录
@@ -144,7 +308,7 @@ class DatabaseManager:
         - OR: "graph OR network" → 包含任一词
         """
         if not query.strip():
-            return self.get_all_records()
+            return self.get_all_records(limit=limit)
 
         conn = self._get_connection()
         try:
@@ -157,11 +321,12 @@ class DatabaseManager:
                 JOIN literature_fts fts ON r.id = fts.rowid
                 WHERE literature_fts MATCH ?
                 ORDER BY bm25(literature_fts)
-            """, (safe_query,)).fetchall()
+                LIMIT ?
+            """, (safe_query, -1 if limit is None else limit)).fetchall()
             return [dict(row) for row in rows]
         except sqlite3.OperationalError:
             # FTS 查询语法失败时回退到 LIKE 搜索
-            return self._fallback_search(query)
+            return self._fallback_search(query, limit)
         finally:
             conn.close()
 
@@ -187,7 +352,7 @@ class DatabaseManager:
         fts_terms = [f'"{t}"' for t in terms]
         return ' AND '.join(fts_terms)
 
-    def _fallback_search(self, query: str) -> List[Dict]:
+    def _fallback_search(self, query: str, limit: int = None) -> List[Dict]:
         """FTS 不可用时的 LIKE 回退搜索"""
         conn = self._get_connection()
         try:
@@ -197,8 +362,9 @@ class DatabaseManager:
                 WHERE title LIKE ? OR keywords LIKE ? OR abstract LIKE ?
                    OR abstract_cn LIKE ? OR summary LIKE ? OR file_path LIKE ?
                 ORDER BY created_at DESC
+                LIMIT ?
             """, (like_pattern, like_pattern, like_pattern,
-                  like_pattern, like_pattern, like_pattern)).fetchall()
+                  like_pattern, like_pattern, like_pattern, -1 if limit is None else limit)).fetchall()
             return [dict(row) for row in rows]
         finally:
             conn.close()
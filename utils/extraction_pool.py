@@ -0,0 +1,141 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from utils.quarantine import QuarantineList
+from utils.text_cache import TextCache
+from utils.text_extractor import ExtractionError, TextExtractor
+
+
+# 每个工作进程（或监管线程）按配置复用提取器实例
+_worker_extractors: Dict[tuple, TextExtractor] = {}
+
+
+def _extract_in_worker(file_path: str, cache_config: Optional[Tuple[str, int]],
+                       max_chars: Optional[int] = None,
+                       isolation: Tuple[float, int] = (0, 0)) -> Tuple[str, str]:
+    """在工作进程（或监管线程）中提取文本"""
+    key = (cache_config, isolation)
+    extractor = _worker_extractors.get(key)
+    if extractor is None:
+        text_cache = TextCache(*cache_config) if cache_config else None
+        extractor = TextExtractor(text_cache, *isolation)
+        _worker_extractors[key] = extractor
+    return extractor.extract(file_path, max_chars)
+
+
+class ExtractionPool:
+    """
+    文本提取阶段
+
+    PDF 解析是 CPU 密集型操作，放到子进程中执行，
+    使 asyncio 事件循环只等待网络 I/O，解析则可利用多核并行。
+
+    配置了超时或内存上限时，每个 PDF/Word 文件在独立的受监管子进程中解析
+    （线程池中的线程只负责监管），超限的文件会被终止并加入隔离名单，
+    单个异常文件不会拖住整个批次。
+    """
+
+    def __init__(self, max_workers: int = 0, cache_dir: str = os.path.join("cache", "texts"),
+                 cache_max_mb: int = 1024, timeout: float = 300, memory_limit_mb: int = 2048,
+                 quarantine: QuarantineList = None):
+        """
+        Args:
+            max_workers: 并行提取数量，<= 0 表示使用 CPU 核数
+            cache_dir: 文本缓存目录
+            cache_max_mb: 文本缓存容量上限（MB）
+            timeout: 单个文件提取超时（秒），0 表示不限制
+            memory_limit_mb: 单个文件提取的内存上限（MB），0 表示不限制
+            quarantine: 隔离名单，默认使用 cache/quarantine.json
+        """
+        self.max_workers = self._resolve_workers(max_workers)
+        self.cache_dir = cache_dir
+        self.cache_max_mb = cache_max_mb
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.quarantine = quarantine or QuarantineList()
+        self._executor: Optional[Executor] = None
+
+    @staticmethod
+    def _resolve_workers(max_workers: int) -> int:
+        if max_workers and max_workers > 0:
+            return max_workers
+        return os.cpu_count() or 1
+
+    @property
+    def isolated(self) -> bool:
+        return self.timeout > 0 or self.memory_limit_mb > 0
+
+    def set_max_workers(self, max_workers: int):
+        """调整并行提取数量（下次提交任务时生效）"""
+        workers = self._resolve_workers(max_workers)
+        if workers != self.max_workers:
+            self.shutdown()
+            self.max_workers = workers
+
+    def set_text_cache(self, cache_max_mb: int, cache_dir: str = None):
+        """设置文本缓存容量上限和目录"""
+        self.cache_max_mb = cache_max_mb
+        if cache_dir:
+            self.cache_dir = cache_dir
+
+    def set_isolation(self, timeout: float, memory_limit_mb: int):
+        """设置单个文件提取的超时（秒）和内存上限（MB），均为 0 时关闭子进程隔离"""
+        was_isolated = self.isolated
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        if was_isolated != self.isolated:
+            self.shutdown()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.isolated:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def extract(self, file_path: str, use_cache: bool = True,
+                      max_chars: Optional[int] = None) -> Tuple[str, str]:
+        """
+        在进程池中提取文件文本
+
+        Args:
+            file_path: 文件路径
+            use_cache: 是否读写文本缓存
+            max_chars: 字符预算，达到后停止解析；None 表示提取全文
+
+        Returns:
+            (text_content, file_type) 元组
+
+        Raises:
+            ExtractionError: 提取超时、内存超限、子进程崩溃或文件已被隔离
+        """
+        entry = self.quarantine.get(file_path)
+        if entry is not None:
+            raise ExtractionError(
+                f"文件已被隔离（{entry['quarantined_at']} 提取失败: {entry['reason']}）", 'quarantined'
+            )
+
+        loop = asyncio.get_running_loop()
+        cache_config = (self.cache_dir, self.cache_max_mb) if use_cache else None
+        isolation = (self.timeout, self.memory_limit_mb)
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), _extract_in_worker, file_path, cache_config, max_chars, isolation
+            )
+        except ExtractionError as e:
+            self.quarantine.add(file_path, e.status, str(e))
+            raise
+        except BrokenProcessPool:
+            # 子进程异常退出后进程池不可再用，重建后交给调用方按失败处理
+            self.shutdown()
+            raise Exception(f"文本提取子进程异常退出: {file_path}")
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
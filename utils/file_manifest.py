@@ -0,0 +1,211 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from utils.text_extractor import compute_file_hash, iter_supported_files
+
+
+class FileManifest:
+    """
+    持久化文件清单（SQLite），用于增量扫描
+
+    记录每个文件的路径、大小、mtime、inode、内容哈希和上次处理状态。
+    扫描时只产出新增、已变化或上次失败的文件；连续失败达到上限
+    （或提取超时/内存超限）的文件会被隔离，直到文件发生变化。
+    不同处理任务（如 'summary' 摘要、'record' 入库）分别记录状态。
+    """
+
+    # 视为处理完成的状态
+    DONE_STATUSES = ('success', 'skipped')
+    # 出现即隔离的状态（重试也无法成功）
+    HARD_FAILURE_STATUSES = ('timeout', 'oom', 'crashed', 'quarantined')
+
+    def __init__(self, db_path: str = os.path.join("cache", "manifest.db"), task: str = "summary",
+                 max_failures: int = 3):
+        """
+        Args:
+            db_path: 清单数据库路径
+            task: 处理任务名
+            max_failures: 连续失败多少次后隔离
+        """
+        self.db_path = db_path
+        self.task = task
+        self.max_failures = max_failures
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.init_db()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_db(self):
+        """创建清单表"""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_manifest (
+                    task          TEXT NOT NULL,
+                    file_path     TEXT NOT NULL,
+                    file_size     INTEGER NOT NULL,
+                    mtime_ns      INTEGER NOT NULL,
+                    inode         INTEGER NOT NULL,
+                    content_hash  TEXT,
+                    status        TEXT NOT NULL,
+                    fail_count    INTEGER NOT NULL DEFAULT 0,
+                    quarantined   INTEGER NOT NULL DEFAULT 0,
+                    last_error    TEXT,
+                    updated_at    TIMESTAMP,
+                    PRIMARY KEY (task, file_path)
+                )
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _load_rows(self, folder_path: str) -> Dict[str, sqlite3.Row]:
+        """一次性读取文件夹下的全部清单记录，避免逐个文件查询"""
+        prefix = os.path.join(os.path.abspath(folder_path), '')
+        conn = self._get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM file_manifest WHERE task = ? AND substr(file_path, 1, ?) = ?",
+                (self.task, len(prefix), prefix)
+            ).fetchall()
+            return {row['file_path']: row for row in rows}
+        finally:
+            conn.close()
+
+    def scan(self, folder_path: str, supported: Dict[str, str] = None,
+             include_unchanged: bool = False) -> Iterator[Tuple[str, str, str]]:
+        """
+        增量扫描文件夹
+
+        Args:
+            folder_path: 文件夹路径
+            supported: 扩展名 → 文件类型映射，默认支持 pdf/docx/md
+            include_unchanged: 是否同时产出未变化且已处理完成的文件
+
+        Yields:
+            (file_path, file_type, state) 元组，state 为
+            'new' / 'changed' / 'failed' / 'unchanged'
+        """
+        rows = self._load_rows(folder_path)
+        touched = []
+
+        for entry, file_type in iter_supported_files(folder_path, supported):
+            file_path = os.path.abspath(entry.path)
+            row = rows.get(file_path)
+            if row is None:
+                yield file_path, file_type, 'new'
+                continue
+
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            same_stat = (row['file_size'] == stat.st_size and row['mtime_ns'] == stat.st_mtime_ns
+                         and row['inode'] == stat.st_ino)
+            if not same_stat:
+                # 仅 mtime/inode 变化（如被复制或 touch）时用内容哈希确认是否真的改变
+                if row['content_hash'] and row['file_size'] == stat.st_size:
+                    try:
+                        same_stat = compute_file_hash(file_path) == row['content_hash']
+                    except OSError:
+                        same_stat = False
+                    if same_stat:
+                        touched.append((stat.st_mtime_ns, stat.st_ino, file_path))
+                if not same_stat:
+                    yield file_path, file_type, 'changed'
+                    continue
+
+            if row['quarantined']:
+                continue
+            if row['status'] in self.DONE_STATUSES:
+                if include_unchanged:
+                    yield file_path, file_type, 'unchanged'
+            else:
+                yield file_path, file_type, 'failed'
+
+        if touched:
+            conn = self._get_connection()
+            try:
+                conn.executemany(
+                    "UPDATE file_manifest SET mtime_ns = ?, inode = ? WHERE task = ? AND file_path = ?",
+                    [(mtime_ns, inode, self.task, path) for mtime_ns, inode, path in touched]
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def mark(self, file_path: str, status: str, error: str = None, content_hash: str = None):
+        """
+        记录文件的处理结果
+
+        Args:
+            file_path: 文件路径
+            status: 处理状态（success/skipped/failed/timeout/oom 等）
+            error: 错误信息
+            content_hash: 文件原始字节的 SHA-256（已知时传入，避免重复计算）
+        """
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT * FROM file_manifest WHERE task = ? AND file_path = ?",
+                (self.task, file_path)
+            ).fetchone()
+
+            same_file = row is not None and row['file_size'] == stat.st_size and row['mtime_ns'] == stat.st_mtime_ns
+            if content_hash is None and same_file:
+                content_hash = row['content_hash']
+
+            if status in self.DONE_STATUSES:
+                fail_count, quarantined = 0, 0
+            else:
+                fail_count = (row['fail_count'] if same_file else 0) + 1
+                quarantined = int(status in self.HARD_FAILURE_STATUSES or fail_count >= self.max_failures)
+
+            conn.execute("""
+                INSERT OR REPLACE INTO file_manifest
+                    (task, file_path, file_size, mtime_ns, inode, content_hash,
+                     status, fail_count, quarantined, last_error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                self.task, file_path, stat.st_size, stat.st_mtime_ns, stat.st_ino, content_hash,
+                status, fail_count, quarantined, error, datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            ))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_entry(self, file_path: str) -> Optional[Dict]:
+        """获取文件的清单记录"""
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT * FROM file_manifest WHERE task = ? AND file_path = ?",
+                (self.task, os.path.abspath(file_path))
+            ).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def release(self, file_path: str):
+        """解除文件隔离并清零失败计数"""
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                "UPDATE file_manifest SET quarantined = 0, fail_count = 0 WHERE task = ? AND file_path = ?",
+                (self.task, os.path.abspath(file_path))
+            )
+            conn.commit()
+        finally:
+            conn.close()
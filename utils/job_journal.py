@@ -0,0 +1,150 @@
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+
+# 新建文件的默认权限（mkstemp 创建的临时文件只有属主可读写，替换前恢复为常规权限）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write_text(file_path: str, text: str):
+    """
+    先写临时文件再替换，保证目标文件要么是旧内容要么是完整的新内容
+
+    临时文件名唯一，多个写入方（如监视模式和批量处理）同时写同一文件时互不覆盖临时文件。
+    """
+    directory = os.path.dirname(file_path) or '.'
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode = stat.S_IMODE(os.stat(file_path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class JobJournal:
+    """
+    摘要任务日志（SQLite）
+
+    记录每个文档在流水线中已完成的阶段：LLM 返回摘要后立即保存（'summarized'），
+    摘要文件写出后标记为 'written'，入库完成后删除记录。
+    停止或崩溃后重新处理时，已付费生成的摘要直接从日志恢复，
+    已写出摘要但尚未入库的文档只补做入库。
+    文件发生变化（大小或修改时间不同）后日志记录失效。
+    """
+
+    STAGE_SUMMARIZED = 'summarized'
+    STAGE_WRITTEN = 'written'
+
+    def __init__(self, db_path: str = os.path.join("cache", "jobs.db")):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.init_db()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_db(self):
+        """创建日志表"""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_journal (
+                    file_path   TEXT PRIMARY KEY,
+                    file_size   INTEGER NOT NULL,
+                    mtime_ns    INTEGER NOT NULL,
+                    stage       TEXT NOT NULL,
+                    summary     TEXT,
+                    analysis    TEXT,
+                    updated_at  TIMESTAMP
+                )
+            """)
+            # 兼容旧版日志表：补充合并调用结果列
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(job_journal)")}
+            if 'analysis' not in columns:
+                conn.execute("ALTER TABLE job_journal ADD COLUMN analysis TEXT")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, file_path: str) -> Optional[Dict]:
+        """返回文件的日志记录；没有记录或文件已变化时返回 None"""
+        file_path = os.path.abspath(file_path)
+        conn = self._get_connection()
+        try:
+            row = conn.execute("SELECT * FROM job_journal WHERE file_path = ?", (file_path,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if stat.st_size != row['file_size'] or stat.st_mtime_ns != row['mtime_ns']:
+            return None
+        entry = dict(row)
+        entry['analysis'] = json.loads(entry['analysis']) if entry.get('analysis') else None
+        return entry
+
+    def pending_paths(self) -> Set[str]:
+        """返回仍有未完成阶段的文件路径"""
+        conn = self._get_connection()
+        try:
+            return {row['file_path'] for row in conn.execute("SELECT file_path FROM job_journal")}
+        finally:
+            conn.close()
+
+    def _save(self, file_path: str, stage: str, summary: str = None, analysis: Dict = None):
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO job_journal (file_path, file_size, mtime_ns, stage, summary, analysis, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (file_path, stat.st_size, stat.st_mtime_ns, stage, summary,
+                  json.dumps(analysis, ensure_ascii=False) if analysis else None,
+                  datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def save_summary(self, file_path: str, summary: str, analysis: Dict = None):
+        """LLM 返回摘要（合并调用时连同元数据和入库概要）后立即保存，避免写出前崩溃导致重复付费"""
+        self._save(file_path, self.STAGE_SUMMARIZED, summary, analysis)
+
+    def mark_written(self, file_path: str, analysis: Dict = None):
+        """摘要文件已写出，只剩入库（保留合并调用的入库字段）"""
+        self._save(file_path, self.STAGE_WRITTEN, analysis=analysis)
+
+    def finish(self, file_path: str):
+        """文档全部阶段完成，删除日志记录"""
+        conn = self._get_connection()
+        try:
+            conn.execute("DELETE FROM job_journal WHERE file_path = ?", (os.path.abspath(file_path),))
+            conn.commit()
+        finally:
+            conn.close()
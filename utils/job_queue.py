@@ -0,0 +1,280 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 任务类型：summary 生成摘要（并按设置入库），record 只入库
+JOB_TASKS = ('summary', 'record')
+
+
+class JobQueue:
+    """
+    多进程 / 多机共享的任务队列（SQLite）
+
+    任务表与文献记录保存在同一个数据库文件中（放在共享存储上即可被多台机器的 worker 共用）。
+    worker 领取任务时获得一段时间的租约，处理期间定期续约（心跳）；worker 崩溃或失联后租约过期，
+    任务可被其他 worker 重新领取。只有持有租约的 worker 才能提交结果，过期后被重新领取的任务不会被重复提交。
+    领取在 BEGIN IMMEDIATE 事务中完成，多个进程同时领取不会拿到同一个任务。
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    def __init__(self, db_path: str = "literature_records.db", max_attempts: int = 3):
+        """
+        Args:
+            db_path: 数据库文件路径（与 DatabaseManager 相同的文件）
+            max_attempts: 每个任务最多领取的次数，超过后标记为失败
+        """
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        self.init_db()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # isolation_level=None：由代码显式控制事务（领取任务时使用 BEGIN IMMEDIATE）
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_db(self):
+        """创建任务表和索引"""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_queue (
+                    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task          TEXT NOT NULL,
+                    file_path     TEXT NOT NULL,
+                    file_type     TEXT NOT NULL,
+                    priority      INTEGER NOT NULL DEFAULT 0,
+                    status        TEXT NOT NULL,
+                    attempts      INTEGER NOT NULL DEFAULT 0,
+                    worker_id     TEXT,
+                    lease_expires REAL,
+                    result        TEXT,
+                    error         TEXT,
+                    created_at    TIMESTAMP,
+                    updated_at    TIMESTAMP,
+                    UNIQUE (task, file_path)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_job_queue_claim ON job_queue (task, status, priority, id)"
+            )
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def enqueue(self, files: Iterable[Tuple[str, str]], task: str = 'summary', priority: int = 0,
+                requeue: bool = False) -> int:
+        """
+        加入任务
+
+        Args:
+            files: (文件路径, 文件类型) 序列
+            task: 任务类型，见 JOB_TASKS
+            priority: 优先级，越大越先被领取
+            requeue: 已存在的任务（包括已完成、已失败的）是否重新设为待处理
+
+        Returns:
+            新加入或重新设为待处理的任务数
+        """
+        if task not in JOB_TASKS:
+            raise ValueError(f"未知的任务类型: {task}")
+        now = self._now()
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN")
+            count = 0
+            for file_path, file_type in files:
+                file_path = os.path.abspath(file_path)
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO job_queue (task, file_path, file_type, priority, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (task, file_path, file_type, priority, self.STATUS_PENDING, now, now)
+                )
+                if cursor.rowcount == 0 and requeue:
+                    # 正在处理的任务不打断，只重置其余状态
+                    cursor = conn.execute(
+                        "UPDATE job_queue SET status = ?, priority = ?, attempts = 0, worker_id = NULL, "
+                        "lease_expires = NULL, result = NULL, error = NULL, updated_at = ? "
+                        "WHERE task = ? AND file_path = ? AND status != ?",
+                        (self.STATUS_PENDING, priority, now, task, file_path, self.STATUS_RUNNING)
+                    )
+                count += cursor.rowcount
+            conn.execute("COMMIT")
+            return count
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, task: str = 'summary', lease_seconds: float = 300,
+              limit: int = 1) -> List[Dict]:
+        """
+        领取待处理的任务（以及租约已过期的任务），按优先级从高到低、加入顺序从早到晚
+
+        Returns:
+            任务列表，每项包含 id、file_path、file_type、attempts
+        """
+        now = time.time()
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # 租约过期且已用完领取次数的任务直接标记为失败
+            conn.execute(
+                "UPDATE job_queue SET status = ?, error = ?, worker_id = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE task = ? AND status = ? AND lease_expires < ? AND attempts >= ?",
+                (self.STATUS_FAILED, '处理超时或 worker 异常退出', self._now(), task, self.STATUS_RUNNING,
+                 now, self.max_attempts)
+            )
+            rows = conn.execute(
+                "SELECT id, file_path, file_type, attempts FROM job_queue "
+                "WHERE task = ? AND (status = ? OR (status = ? AND lease_expires < ?)) "
+                "ORDER BY priority DESC, id LIMIT ?",
+                (task, self.STATUS_PENDING, self.STATUS_RUNNING, now, limit)
+            ).fetchall()
+            jobs = []
+            for row in rows:
+                conn.execute(
+                    "UPDATE job_queue SET status = ?, worker_id = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE id = ?",
+                    (self.STATUS_RUNNING, worker_id, now + lease_seconds, self._now(), row['id'])
+                )
+                jobs.append({
+                    'id': row['id'],
+                    'file_path': row['file_path'],
+                    'file_type': row['file_type'],
+                    'attempts': row['attempts'] + 1
+                })
+            conn.execute("COMMIT")
+            return jobs
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def heartbeat(self, worker_id: str, job_ids: Iterable[int], lease_seconds: float = 300) -> int:
+        """为仍由该 worker 持有的任务续约，返回续约成功的任务数"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        placeholders = ','.join('?' * len(job_ids))
+        conn = self._get_connection()
+        try:
+            cursor = conn.execute(
+                f"UPDATE job_queue SET lease_expires = ? WHERE worker_id = ? AND status = ? "
+                f"AND id IN ({placeholders})",
+                [time.time() + lease_seconds, worker_id, self.STATUS_RUNNING] + job_ids
+            )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int, worker_id: str, result: Dict = None, error: str = None) -> bool:
+        """
+        提交任务结果（error 不为空表示失败，未用完领取次数时重新设为待处理）
+
+        Returns:
+            False 表示该 worker 已不再持有任务（租约过期后被其他 worker 领取），结果未提交
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts FROM job_queue WHERE id = ? AND worker_id = ? AND status = ?",
+                (job_id, worker_id, self.STATUS_RUNNING)
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return False
+            if error is None:
+                status = self.STATUS_DONE
+            elif row['attempts'] >= self.max_attempts:
+                status = self.STATUS_FAILED
+            else:
+                status = self.STATUS_PENDING
+            conn.execute(
+                "UPDATE job_queue SET status = ?, worker_id = NULL, lease_expires = NULL, result = ?, error = ?, "
+                "updated_at = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error[:1000] if error else None, self._now(), job_id)
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def release(self, worker_id: str, job_ids: Iterable[int]) -> int:
+        """归还尚未开始处理的任务（不计入领取次数），返回归还的任务数"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        placeholders = ','.join('?' * len(job_ids))
+        conn = self._get_connection()
+        try:
+            cursor = conn.execute(
+                f"UPDATE job_queue SET status = ?, worker_id = NULL, lease_expires = NULL, "
+                f"attempts = MAX(attempts - 1, 0) WHERE worker_id = ? AND status = ? AND id IN ({placeholders})",
+                [self.STATUS_PENDING, worker_id, self.STATUS_RUNNING] + job_ids
+            )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_job(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """返回任务记录（result 已解析为字典）"""
+        conn = self._get_connection()
+        try:
+            row = conn.execute("SELECT * FROM job_queue WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._row_to_job(row)
+
+    def get_by_path(self, file_path: str, task: str = 'summary') -> Optional[Dict]:
+        """按文件路径返回任务记录"""
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT * FROM job_queue WHERE task = ? AND file_path = ?", (task, os.path.abspath(file_path))
+            ).fetchone()
+        finally:
+            conn.close()
+        return self._row_to_job(row)
+
+    def stats(self, task: str = None) -> Dict[str, int]:
+        """按状态统计任务数"""
+        conn = self._get_connection()
+        try:
+            if task is None:
+                rows = conn.execute("SELECT status, COUNT(*) AS n FROM job_queue GROUP BY status").fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT status, COUNT(*) AS n FROM job_queue WHERE task = ? GROUP BY status", (task,)
+                ).fetchall()
+            counts = {status: 0 for status in (self.STATUS_PENDING, self.STATUS_RUNNING,
+                                               self.STATUS_DONE, self.STATUS_FAILED)}
+            counts.update({row['status']: row['n'] for row in rows})
+            return counts
+        finally:
+            conn.close()
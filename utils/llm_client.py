@@ -1,9 +1,21 @@
 import openai
 import asyncio
-from typing import List, Dict
+import inspect
+import time
+from typing import Awaitable, Callable, List, Dict, Optional, Union
 import traceback
+from types import SimpleNamespace
 import tiktoken  # 用于计算token数量
 from utils.prompt_manager import PromptManager
+from utils.rate_limiter import get_rate_limiter
+from utils.adaptive_concurrency import get_concurrency_controller
+from utils.retry_policy import RetryPolicy, count_retry
+from utils.llm_result_cache import LLMResultCache, result_cache_bypassed
+from utils.structured_output import StructuredOutputError, parse_json_object, validate_combined_analysis
+from utils.text_chunker import chunk_text
+
+# 总报告中各篇摘要（或分组综合分析）之间的分隔符
+REPORT_SEPARATOR = "\n\n---\n\n"
 
 
 class LLMClient:
@@ -18,9 +30,11 @@ class LLMClient:
             model: 要使用的模型名称
             stream_output: 是否启用流式输出
         """
+        # 重试由 RetryPolicy 统一处理（每次尝试都经过限流和并发控制），关闭 SDK 自带的重试
         self.client = openai.AsyncOpenAI(
             base_url=base_url,
-            api_key=api_key
+            api_key=api_key,
+            max_retries=0
         )
         self.max_tokens = max_tokens
         self.model = model
@@ -45,6 +59,165 @@ class LLMClient:
         # 初始化提示词管理器
         self.prompt_manager = PromptManager()
 
+        # 同一服务的所有客户端（摘要、批量入库、问答）共享限流额度
+        self.rate_limiter = get_rate_limiter(base_url, api_key)
+        # 自适应并发控制（同一服务共享），未启用时为 None
+        self.concurrency = None
+        self._base_url = base_url
+        self._api_key = api_key
+        self.retry_policy = RetryPolicy()
+        # 文档分析类请求（摘要、元数据、概要、合并调用）的结果缓存，未启用时为 None
+        self.result_cache = None
+        # 模型上下文窗口（token 数），总报告按此分批归并，超长文献按此分块摘要
+        self.context_window = 16000
+        # 单篇文献分块摘要时同时进行的调用数上限
+        self.chunk_concurrency = 2
+
+    def set_rate_limits(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                        min_interval: float = 0):
+        """
+        设置该服务在整个进程内共享的限流额度，0 表示不限制
+
+        Args:
+            requests_per_minute: 每分钟最大请求数（RPM）
+            tokens_per_minute: 每分钟最大 token 数（TPM）
+            min_interval: 相邻两次请求的最小间隔（秒），对应原来的 API 请求间隔
+        """
+        self.rate_limiter.configure(requests_per_minute, tokens_per_minute, min_interval)
+
+    def set_adaptive_concurrency(self, enabled: bool, initial: int = 5, max_limit: int = 32):
+        """
+        启用或关闭自适应并发控制
+
+        Args:
+            enabled: 是否启用
+            initial: 初始并发上限
+            max_limit: 并发上限的最大值
+        """
+        if not enabled:
+            self.concurrency = None
+            return
+        self.concurrency = get_concurrency_controller(self._base_url, self._api_key)
+        self.concurrency.configure(initial, max_limit)
+
+    def set_retry_policy(self, max_retries: int = 3, max_delay: float = 60.0):
+        """
+        设置暂时性错误（429、5xx、连接失败、超时）的重试策略
+
+        Args:
+            max_retries: 最大重试次数，0 表示不重试
+            max_delay: 单次重试等待的上限（秒）
+        """
+        self.retry_policy = RetryPolicy(max_retries, max_delay=max_delay)
+
+    def set_result_cache(self, cache: LLMResultCache = None):
+        """设置文档分析类请求的结果缓存（None 表示不缓存）"""
+        self.result_cache = cache
+
+    def set_context_window(self, tokens: int):
+        """设置模型上下文窗口的 token 数（输入与输出合计）"""
+        self.context_window = tokens
+
+    def set_chunk_concurrency(self, concurrency: int):
+        """设置单篇文献分块摘要时同时进行的调用数上限"""
+        self.chunk_concurrency = max(1, concurrency)
+
+    def _chunk_fan_out(self) -> int:
+        """单篇文献分块摘要的并发数：启用自适应并发时最多占用当前并发上限的一半，其余槽留给其他文献"""
+        fan_out = self.chunk_concurrency
+        if self.concurrency is not None:
+            fan_out = min(fan_out, self.concurrency.limit // 2)
+        return max(1, fan_out)
+
+    def _cache_key(self, messages: List[Dict], temperature: float) -> str:
+        return LLMResultCache.make_key(self.model, messages, temperature, self.max_tokens)
+
+    async def _chat_completion(self, messages: List[Dict], temperature: float, stream: bool = False,
+                               cache_kind: str = None):
+        """
+        发送聊天补全请求，暂时性错误按重试策略退避后重试
+
+        重试次数计入当前任务的 track_retries()；重试次数用尽或遇到不可重试的错误时抛出最后一次的异常。
+        cache_kind 不为空且启用了结果缓存时，相同请求直接返回缓存的响应（不消耗限流额度），
+        完整返回（未被截断）的非空响应写入缓存；强制刷新（bypass_result_cache）时不读取缓存。
+        缓存读写在线程池中执行，不阻塞事件循环。
+        """
+        cache = self.result_cache if cache_kind and not stream else None
+        loop = asyncio.get_running_loop()
+        if cache is not None:
+            cache_key = self._cache_key(messages, temperature)
+            content = None if result_cache_bypassed() else await loop.run_in_executor(None, cache.get, cache_key)
+            if content is not None:
+                return SimpleNamespace(
+                    choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')],
+                    usage=None
+                )
+
+        response = await self._chat_completion_with_retry(messages, temperature, stream)
+
+        if cache is not None and response.choices:
+            choice = response.choices[0]
+            if choice.message.content and getattr(choice, 'finish_reason', None) != 'length':
+                await loop.run_in_executor(None, cache.put, cache_key, cache_kind, choice.message.content)
+        return response
+
+    async def _chat_completion_with_retry(self, messages: List[Dict], temperature: float, stream: bool = False):
+        retries = 0
+        while True:
+            try:
+                return await self._chat_completion_once(messages, temperature, stream)
+            except Exception as e:
+                if not self.retry_policy.should_retry(e, retries):
+                    raise
+                delay = self.retry_policy.delay(e, retries)
+                retries += 1
+                count_retry()
+                print(f"LLM请求失败（{type(e).__name__}），{delay:.1f}秒后第{retries}次重试")
+                await asyncio.sleep(delay)
+
+    async def _chat_completion_once(self, messages: List[Dict], temperature: float, stream: bool = False):
+        """
+        发送一次聊天补全请求（经过自适应并发控制和共享限流器）
+
+        按提示词 token 数加最大输出 token 数预约额度，非流式响应返回实际用量后退还多预约的部分。
+        启用自适应并发时，先取得限流额度再占用并发槽：等待限流期间不占槽，
+        请求延迟从占到槽开始计算，结果（延迟或过载错误）用于调整并发上限。
+        """
+        reserved = self._count_tokens(messages) + self.max_tokens
+        await self.rate_limiter.acquire(reserved)
+        concurrency = self.concurrency
+        started = None
+        if concurrency is not None:
+            try:
+                # acquire 在占到槽后返回开始时间，限流等待不计入请求延迟
+                started = await concurrency.acquire()
+            except BaseException:
+                # 请求未发出，退还已预约的额度
+                self.rate_limiter.refund(reserved)
+                raise
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=temperature,
+                stream=stream
+            )
+        except Exception as e:
+            if concurrency is not None:
+                concurrency.release(started, e)
+            raise
+        except BaseException:
+            if concurrency is not None:
+                concurrency.release(started)
+            raise
+        if concurrency is not None:
+            concurrency.release(started)
+        usage = getattr(response, 'usage', None)
+        if not stream and usage is not None and usage.total_tokens:
+            self.rate_limiter.refund(reserved - usage.total_tokens)
+        return response
+
     def _estimate_tokens_from_text(self, text: str) -> int:
         """估算文本的token数量"""
         if self.tokenizer is None:
@@ -54,6 +227,46 @@ class LLMClient:
             # 使用tokenizer精确计算
             return len(self.tokenizer.encode(text))
 
+    def summary_text_budget(self) -> int:
+        """元数据、入库概要、合并调用等单篇调用实际使用的文献字符数上限"""
+        return self.max_tokens * 4
+
+    def qa_text_budget(self) -> int:
+        """问答调用实际使用的文献字符数上限"""
+        return self.max_tokens * 2
+
+    def _input_budget(self, prompt_types) -> int:
+        """上下文窗口扣除输出和提示词模板后，可用于输入内容的 token 数（取各提示词中最小的）"""
+        template_tokens = max(
+            self._count_tokens([
+                {"role": "system", "content": prompt["system"]},
+                {"role": "user", "content": prompt["user"]}
+            ])
+            for prompt in (self.prompt_manager.get_prompt(prompt_type) for prompt_type in prompt_types)
+        )
+        # 预留少量余量，避免 token 估算误差导致超出上下文
+        return max(1024, self.context_window - self.max_tokens - template_tokens - 64)
+
+    def report_input_budget(self) -> int:
+        """总报告和分组归并调用中，所有摘要合计可用的 token 数"""
+        return self._input_budget(("overall_report", "overall_report_merge"))
+
+    def summary_input_budget(self) -> int:
+        """单次摘要调用（整篇、分块或合并要点）可用的输入 token 数"""
+        return self._input_budget(("summary", "summary_chunk", "summary_merge"))
+
+    def needs_chunking(self, text: str) -> bool:
+        """文献全文是否超过单次摘要调用的输入预算（需要分块摘要）"""
+        return self._estimate_tokens_from_text(text) > self.summary_input_budget()
+
+    def combined_input_budget(self) -> int:
+        """合并调用可用的输入 token 数"""
+        return self._input_budget(("combined_analysis",))
+
+    def fits_combined_analysis(self, text: str) -> bool:
+        """文献全文能否完整放入一次合并调用（放不下时应改为分步调用，避免摘要只覆盖开头部分）"""
+        return self._estimate_tokens_from_text(text) <= self.combined_input_budget()
+
     def _count_tokens(self, messages: List[Dict]) -> int:
         """计算消息列表的token数量"""
         if self.tokenizer is None:
@@ -136,39 +349,132 @@ class LLMClient:
             print(f"测试连接时发生未知错误: {str(e)}")
             return False
 
+    async def _summary_call(self, prompt_type: str, text: str, **fields) -> str:
+        """按摘要类提示词调用一次 LLM（结果写入结果缓存）"""
+        summary_prompt = self.prompt_manager.get_prompt(prompt_type)
+        response = await self._chat_completion(
+            [
+                {"role": "system", "content": summary_prompt["system"]},
+                {"role": "user", "content": summary_prompt["user"].format(text=text, **fields)}
+            ],
+            temperature=0.3,
+            cache_kind=prompt_type
+        )
+
+        summary_content = response.choices[0].message.content
+
+        # 检查返回的摘要是否为空
+        if not summary_content or not summary_content.strip():
+            raise Exception("LLM返回的摘要内容为空")
+
+        return summary_content
+
+    async def _summarize_chunks(self, text: str) -> str:
+        """
+        分块摘要：按章节切分全文，各块并发提取要点后合并为结构化摘要
+
+        要点合计仍超过输入预算时（极长的文献）对要点再分块提取，最多进行 3 轮。
+        """
+        budget = self.summary_input_budget()
+        semaphore = asyncio.Semaphore(self._chunk_fan_out())
+        notes = text
+        for _ in range(3):
+            chunks = chunk_text(notes, budget, self._estimate_tokens_from_text)
+
+            async def summarize(index: int, chunk: str) -> str:
+                async with semaphore:
+                    return await self._summary_call("summary_chunk", chunk, index=index, total=len(chunks))
+
+            tasks = [asyncio.ensure_future(summarize(index, chunk)) for index, chunk in enumerate(chunks, 1)]
+            try:
+                parts = await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            notes = "\n\n".join(f"## 第 {index} 部分要点\n\n{part}" for index, part in enumerate(parts, 1))
+            if not self.needs_chunking(notes):
+                break
+        else:
+            tokens = self._estimate_tokens_from_text(notes)
+            notes = notes[:len(notes) * budget // tokens]
+        return await self._summary_call("summary_merge", notes)
+
     async def generate_summary(self, text: str) -> str:
         """
         生成单篇文献摘要
 
+        全文能放入一次调用时直接生成；超过上下文窗口时改为分块摘要（见 _summarize_chunks），
+        摘要覆盖全文而不只是开头部分。
+
         Args:
             text: 文献文本内容
 
         Returns:
             Markdown格式的结构化摘要
         """
-        # 获取摘要提示词
-        summary_prompt = self.prompt_manager.get_prompt("summary")
+        try:
+            if self.needs_chunking(text):
+                return await self._summarize_chunks(text)
+            return await self._summary_call("summary", text)
+        except openai.APIError as e:
+            raise Exception(f"调用LLM API错误: {str(e)}")
+        except openai.AuthenticationError as e:
+            raise Exception(f"LLM API认证错误: {str(e)}")
+        except openai.RateLimitError as e:
+            raise Exception(f"LLM API调用频率超限: {str(e)}")
+        except openai.APIConnectionError as e:
+            raise Exception(f"LLM API连接错误: {str(e)}")
+        except Exception as e:
+            raise Exception(f"调用LLM生成摘要时出错: {str(e)}\n{traceback.format_exc()}")
 
-        prompt = summary_prompt["user"].format(text=text[:self.max_tokens*4])
+    def _combined_analysis_messages(self, text: str) -> List[Dict]:
+        combined_prompt = self.prompt_manager.get_prompt("combined_analysis")
+        # 按上下文窗口截断（与分块摘要使用同一预算），能放下的全文完整发送
+        budget = self.combined_input_budget()
+        tokens = self._estimate_tokens_from_text(text)
+        if tokens > budget:
+            text = text[:len(text) * budget // tokens]
+        prompt = combined_prompt["user"].format(text=text)
+        return [
+            {"role": "system", "content": combined_prompt["system"]},
+            {"role": "user", "content": prompt}
+        ]
 
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": summary_prompt["system"]},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=0.3
-            )
+    async def has_cached_combined_analysis(self, text: str) -> bool:
+        """结果缓存中是否已有该文本的合并调用结果（如批量入库时已生成；强制刷新时视为没有）"""
+        if self.result_cache is None or result_cache_bypassed():
+            return False
+        cache_key = self._cache_key(self._combined_analysis_messages(text), 0.3)
+        content = await asyncio.get_running_loop().run_in_executor(None, self.result_cache.get, cache_key)
+        return content is not None
+
+    async def generate_combined_analysis(self, text: str) -> Dict:
+        """
+        一次调用同时生成摘要、元数据和入库概要（替代 generate_summary + 三次入库调用）
+
+        Args:
+            text: 文献文本内容
 
-            summary_content = response.choices[0].message.content
+        Returns:
+            按 COMBINED_ANALYSIS_SCHEMA 校验后的字典：summary、title、keywords、abstract、
+            is_english、abstract_cn、record_summary
 
-            # 检查返回的摘要是否为空
-            if not summary_content or not summary_content.strip():
-                raise Exception("LLM返回的摘要内容为空")
+        Raises:
+            StructuredOutputError: 响应被截断、不是合法 JSON 或字段不符合约定（调用方可改为分步调用）
+        """
+        try:
+            response = await self._chat_completion(
+                self._combined_analysis_messages(text),
+                temperature=0.3,
+                cache_kind="combined_analysis"
+            )
 
-            return summary_content
+            choice = response.choices[0]
+            if getattr(choice, 'finish_reason', None) == 'length':
+                raise StructuredOutputError("输出超过最大token数被截断")
+            return validate_combined_analysis(parse_json_object(choice.message.content))
+        except StructuredOutputError:
+            raise
         except openai.APIError as e:
             raise Exception(f"调用LLM API错误: {str(e)}")
         except openai.AuthenticationError as e:
@@ -178,32 +484,33 @@ class LLMClient:
         except openai.APIConnectionError as e:
             raise Exception(f"LLM API连接错误: {str(e)}")
         except Exception as e:
-            raise Exception(f"调用LLM生成摘要时出错: {str(e)}\n{traceback.format_exc()}")
+            raise Exception(f"调用LLM生成合并分析时出错: {str(e)}\n{traceback.format_exc()}")
+
+    def _report_messages(self, prompt_type: str, summaries: List[str]) -> List[Dict]:
+        report_prompt = self.prompt_manager.get_prompt(prompt_type)
+        prompt = report_prompt["user"].format(summaries=REPORT_SEPARATOR.join(summaries))
+        return [
+            {"role": "system", "content": report_prompt["system"]},
+            {"role": "user", "content": prompt}
+        ]
+
+    def report_request_key(self, prompt_type: str, summaries: List[str]) -> str:
+        """总报告或分组归并请求的键（模型 + 提示词 + 全部输入的哈希，与结果缓存的键相同）"""
+        return self._cache_key(self._report_messages(prompt_type, summaries), 0.3)
 
     async def generate_overall_report(self, summaries: List[str]) -> str:
         """
         生成总体报告
 
         Args:
-            summaries: 所有文献摘要的列表
+            summaries: 所有文献摘要的列表（数量较多时为分组归并后的综合分析）
 
         Returns:
             Markdown格式的总体报告
         """
-        # 获取总体报告提示词
-        report_prompt = self.prompt_manager.get_prompt("overall_report")
-
-        combined_summaries = "\n\n---\n\n".join(summaries)
-        prompt = report_prompt["user"].format(summaries=combined_summaries)
-
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": report_prompt["system"]},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.max_tokens,
+            response = await self._chat_completion(
+                self._report_messages("overall_report", summaries),
                 temperature=0.3
             )
 
@@ -219,6 +526,40 @@ class LLMClient:
         except Exception as e:
             raise Exception(f"调用LLM生成总体报告时出错: {str(e)}\n{traceback.format_exc()}")
 
+    async def generate_report_partial(self, summaries: List[str]) -> str:
+        """
+        将一组摘要（或上一层的综合分析）归并为一份阶段性综合分析
+
+        结果写入 LLM 结果缓存（相同分组再次生成总报告时直接复用）。
+
+        Args:
+            summaries: 同一分组内的摘要列表
+
+        Returns:
+            阶段性综合分析文本
+        """
+        try:
+            response = await self._chat_completion(
+                self._report_messages("overall_report_merge", summaries),
+                temperature=0.3,
+                cache_kind="overall_report_merge"
+            )
+
+            if not response.choices or not response.choices[0].message.content:
+                raise Exception("LLM返回了空响应")
+
+            return response.choices[0].message.content
+        except openai.APIError as e:
+            raise Exception(f"调用LLM API错误: {str(e)}")
+        except openai.AuthenticationError as e:
+            raise Exception(f"LLM API认证错误: {str(e)}")
+        except openai.RateLimitError as e:
+            raise Exception(f"LLM API调用频率超限: {str(e)}")
+        except openai.APIConnectionError as e:
+            raise Exception(f"LLM API连接错误: {str(e)}")
+        except Exception as e:
+            raise Exception(f"调用LLM归并摘要时出错: {str(e)}\n{traceback.format_exc()}")
+
     async def call_with_prompt_type(self, prompt_type: str, text: str, temperature: float = 0.3) -> str:
         """
         通用 LLM 调用方法，按提示词类型名调用
@@ -232,17 +573,16 @@ class LLMClient:
             LLM 响应文本
         """
         prompt = self.prompt_manager.get_prompt(prompt_type)
-        formatted = prompt["user"].format(text=text[:self.max_tokens * 4])
+        formatted = prompt["user"].format(text=text[:self.summary_text_budget()])
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            response = await self._chat_completion(
+                [
                     {"role": "system", "content": prompt["system"]},
                     {"role": "user", "content": formatted}
                 ],
-                max_tokens=self.max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                cache_kind=prompt_type
             )
 
             if not response.choices or not response.choices[0].message.content:
@@ -260,7 +600,8 @@ class LLMClient:
         except Exception as e:
             raise Exception(f"调用LLM时出错: {str(e)}\n{traceback.format_exc()}")
 
-    async def ask_question(self, text: str, question: str, history: List[Dict] = None) -> str:
+    async def ask_question(self, text: str, question: str, history: List[Dict] = None,
+                           on_delta: Callable[[str], Union[Optional[bool], Awaitable[Optional[bool]]]] = None) -> str:
         """
         针对文献内容回答问题
 
@@ -268,6 +609,8 @@ class LLMClient:
             text: 文献原文
             question: 用户问题
             history: 对话历史
+            on_delta: 流式输出时每收到一段回答调用 on_delta(文本片段)；可以是协程函数（等待其完成后再读取下一段，
+                      由调用方施加背压），返回 False 时停止生成（如客户端已断开），返回已收到的部分回答
 
         Returns:
             问题的回答
@@ -284,7 +627,7 @@ class LLMClient:
             messages.extend(history)
 
         # 添加当前文献内容和问题
-        formatted_user_prompt = qa_prompt["user"].format(text=text[:self.max_tokens*2], question=question)
+        formatted_user_prompt = qa_prompt["user"].format(text=text[:self.qa_text_budget()], question=question)
         messages.append({"role": "user", "content": formatted_user_prompt})
 
         # 检查并修剪对话历史以适应token限制
@@ -297,29 +640,29 @@ class LLMClient:
         try:
             if self.stream_output:
                 # 流式输出
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    max_tokens=self.max_tokens,
-                    temperature=0.7,
-                    stream=True
-                )
+                response = await self._chat_completion(messages, temperature=0.7, stream=True)
 
                 full_response = ""
-                async for chunk in response:
-                    if chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        full_response += content
+                try:
+                    async for chunk in response:
+                        if chunk.choices[0].delta.content:
+                            content = chunk.choices[0].delta.content
+                            full_response += content
+                            if on_delta is None:
+                                continue
+                            proceed = on_delta(content)
+                            if inspect.isawaitable(proceed):
+                                proceed = await proceed
+                            if proceed is False:
+                                break
+                finally:
+                    # 提前停止时关闭连接，不再继续生成
+                    await response.close()
 
                 return full_response
             else:
                 # 非流式输出
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    max_tokens=self.max_tokens,
-                    temperature=0.7,
-                )
+                response = await self._chat_completion(messages, temperature=0.7)
 
                 return response.choices[0].message.content
         except openai.APIError as e:
@@ -0,0 +1,137 @@
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class LLMResultCache:
+    """
+    LLM 结果缓存（SQLite）
+
+    以"模型 + 完整消息 + 采样参数"的哈希为键保存响应文本：
+    摘要流程和批量入库对同一文档发出的相同请求（摘要、元数据、概要、合并调用）只付费一次，
+    删除记录后重新入库等重复运行也直接复用。提示词或模型改变时键随之改变，不会误用旧结果。
+    总大小超过上限时按最近最少使用（LRU）淘汰；强制刷新时（见 bypass_result_cache）不读取缓存。
+    """
+
+    def __init__(self, db_path: str = os.path.join("cache", "llm_results.db"), max_size_mb: int = 256):
+        self.db_path = db_path
+        self.max_size_bytes = max(0, max_size_mb) * 1024 * 1024
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.init_db()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_db(self):
+        """创建缓存表"""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_results (
+                    cache_key    TEXT PRIMARY KEY,
+                    kind         TEXT,
+                    content      TEXT NOT NULL,
+                    created_at   TIMESTAMP,
+                    stored_size  INTEGER NOT NULL DEFAULT 0,
+                    last_access  REAL NOT NULL DEFAULT 0
+                )
+            """)
+            # 兼容旧版缓存：补充 LRU 淘汰所需的列
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_results)").fetchall()}
+            if 'stored_size' not in columns:
+                conn.execute("ALTER TABLE llm_results ADD COLUMN stored_size INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE llm_results SET stored_size = LENGTH(CAST(content AS BLOB))")
+            if 'last_access' not in columns:
+                conn.execute("ALTER TABLE llm_results ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_results_last_access ON llm_results(last_access)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+        """计算请求的缓存键"""
+        payload = json.dumps([model, messages, temperature, max_tokens], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """返回缓存的响应文本，未命中时返回 None"""
+        conn = self._get_connection()
+        try:
+            row = conn.execute("SELECT content FROM llm_results WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE llm_results SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key))
+            conn.commit()
+            return row['content']
+        finally:
+            conn.close()
+
+    def put(self, cache_key: str, kind: str, content: str):
+        """保存响应文本，并在超过容量上限时淘汰最久未使用的条目"""
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_results "
+                "(cache_key, kind, content, created_at, stored_size, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key, kind, content, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                 len(content.encode('utf-8')), time.time())
+            )
+            conn.commit()
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """按 LRU 顺序删除缓存，直到总大小不超过上限"""
+        total = conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM llm_results").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        rows = conn.execute("SELECT cache_key, stored_size FROM llm_results ORDER BY last_access ASC").fetchall()
+        for row in rows:
+            if total <= self.max_size_bytes:
+                break
+            conn.execute("DELETE FROM llm_results WHERE cache_key = ?", (row['cache_key'],))
+            total -= row['stored_size']
+        conn.commit()
+
+    def total_size(self) -> int:
+        """返回缓存的响应文本总字节数"""
+        conn = self._get_connection()
+        try:
+            return conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM llm_results").fetchone()[0]
+        finally:
+            conn.close()
+
+
+_bypass: contextvars.ContextVar = contextvars.ContextVar('llm_result_cache_bypass', default=False)
+
+
+@contextmanager
+def bypass_result_cache(enabled: bool = True):
+    """
+    在当前异步任务中跳过 LLM 结果缓存的读取（强制刷新），新结果仍写入缓存覆盖旧结果
+
+    用法：
+        with bypass_result_cache():
+            await llm_client.generate_summary(text)
+    """
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def result_cache_bypassed() -> bool:
+    """当前异步任务是否跳过结果缓存的读取"""
+    return _bypass.get()
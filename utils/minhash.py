@@ -0,0 +1,167 @@
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# 英文/数字按词切分，中文按字切分
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]')
+_SHINGLE_BASE = 1000003
+_BLOCK_SIZE = 4096
+
+
+class MinHasher:
+    """
+    MinHash 签名计算（基于 NumPy 向量化）
+
+    文本按词（中文按字）切分后取连续 shingle_size 个词组成的片段，
+    用 num_perm 个 multiply-shift 哈希函数分别取最小值得到签名，
+    两个签名中相同位置取值相等的比例即为 Jaccard 相似度的估计。
+    签名按 bands 个分段计算 LSH 桶，用于快速查找候选相似文献。
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 8, shingle_size: int = 5, seed: int = 1):
+        """
+        Args:
+            num_perm: 哈希函数个数（签名长度）
+            bands: LSH 分段数，需整除 num_perm；bands=8、每段16行时约在相似度0.88处区分
+            shingle_size: 每个片段包含的词数
+            seed: 随机种子，已入库的签名依赖它，修改后需重新计算
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("请安装 numpy: pip install numpy")
+        if num_perm % bands != 0:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2 ** 64, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 64, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str):
+        """将文本转换为去重后的 32 位片段哈希数组"""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if not tokens:
+            return np.zeros(0, dtype=np.uint64)
+        token_hashes = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in tokens),
+                                   dtype=np.uint64, count=len(tokens))
+
+        k = min(self.shingle_size, len(token_hashes))
+        count = len(token_hashes) - k + 1
+        shingles = token_hashes[:count].copy()
+        for j in range(1, k):
+            # uint64 乘加自然溢出回绕，等价于对 2^64 取模
+            shingles = shingles * np.uint64(_SHINGLE_BASE) + token_hashes[j:j + count]
+        shingles = (shingles ^ (shingles >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+        return np.unique(shingles)
+
+    def signature(self, text: str):
+        """计算文本的 MinHash 签名（长度 num_perm 的 uint32 数组）"""
+        shingles = self._shingles(text)
+        signature = np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint64)
+        a = self._a[:, None]
+        b = self._b[:, None]
+        # 分块计算，避免长文献生成过大的中间矩阵
+        for start in range(0, len(shingles), _BLOCK_SIZE):
+            block = shingles[None, start:start + _BLOCK_SIZE]
+            hashed = (a * block + b) >> np.uint64(32)
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def band_keys(self, signature) -> List[Tuple[int, int]]:
+        """计算签名各分段的 LSH 桶，返回 (band, bucket) 列表"""
+        rows = signature.reshape(self.bands, -1)
+        keys = []
+        for band, row in enumerate(rows):
+            digest = hashlib.blake2b(row.tobytes(), digest_size=8).digest()
+            keys.append((band, int.from_bytes(digest, 'little', signed=True)))
+        return keys
+
+    @staticmethod
+    def similarity(signature_a, signature_b) -> float:
+        """由签名估计 Jaccard 相似度"""
+        return float(np.mean(signature_a == signature_b))
+
+    @staticmethod
+    def to_bytes(signature) -> bytes:
+        return signature.astype('<u4').tobytes()
+
+    @staticmethod
+    def from_bytes(data: bytes):
+        return np.frombuffer(data, dtype='<u4')
+
+
+class NearDuplicateIndex:
+    """
+    基于 MinHash + LSH 的近似重复文献检测
+
+    对新文献计算签名后，只与 LSH 桶相同的已有记录比较签名，
+    估计相似度达到阈值即视为同一文献的不同版本（如 arXiv v1/v2、预印本与正式版、重新 OCR 的版本）。
+    """
+
+    ACTIONS = ('skip', 'link')
+
+    def __init__(self, db_manager, threshold: float = 0.9, action: str = 'link', hasher: MinHasher = None):
+        """
+        Args:
+            db_manager: 数据库管理器
+            threshold: 相似度阈值
+            action: 发现近似重复时的处理方式，'skip' 直接跳过，'link' 将文件关联到已有记录
+            hasher: MinHash 签名计算器，默认 128 个哈希函数、8 个分段
+        """
+        if action not in self.ACTIONS:
+            raise ValueError(f"不支持的近似重复处理方式: {action}")
+        self.db_manager = db_manager
+        self.threshold = threshold
+        self.action = action
+        self.hasher = hasher or MinHasher()
+
+    def signature(self, text: str):
+        return self.hasher.signature(text)
+
+    def find(self, signature) -> Optional[Dict]:
+        """
+        查找与签名高度相似的已有记录
+
+        Returns:
+            相似度最高且达到阈值的记录（附带 'similarity' 字段），没有时返回 None
+        """
+        best = None
+        for record in self.db_manager.find_minhash_candidates(self.hasher.band_keys(signature)):
+            similarity = self.hasher.similarity(signature, self.hasher.from_bytes(record['minhash']))
+            if similarity >= self.threshold and (best is None or similarity > best['similarity']):
+                best = dict(record, similarity=similarity)
+        return best
+
+    def record_fields(self, signature) -> Dict:
+        """返回插入记录时需附带的签名字段"""
+        return {
+            'minhash': self.hasher.to_bytes(signature),
+            'minhash_bands': self.hasher.band_keys(signature),
+        }
+
+    def check(self, text: str, file_path: str, file_hash: str = None) -> Tuple[Optional[Dict], Dict]:
+        """
+        检查文本是否与已有记录近似重复
+
+        找到且处理方式为 'link' 时，将文件关联到该记录。
+
+        Returns:
+            (相似的已有记录或 None, 插入新记录时需附带的签名字段)
+        """
+        return self.check_signature(self.signature(text), file_path, file_hash)
+
+    def check_signature(self, signature, file_path: str, file_hash: str = None) -> Tuple[Optional[Dict], Dict]:
+        """与 check 相同，使用已计算的签名（提取后先检查一次，入库前再用同一签名复查）"""
+        existing = self.find(signature)
+        if existing is not None and self.action == 'link':
+            self.db_manager.link_file(existing['id'], file_path, file_hash, existing['similarity'])
+        return existing, self.record_fields(signature)
@@ -1,45 +1,70 @@
 import PyPDF2
 import os
-from typing import Optional
+from typing import Iterator, Optional
 
 
 class PDFReader:
     def __init__(self):
         pass
-    
-    def extract_text(self, pdf_path: str) -> str:
+
+    def iter_pages(self, pdf_path: str) -> Iterator[str]:
+        """
+        按需逐页提取PDF文本
+
+        Args:
+            pdf_path: PDF文件路径
+
+        Yields:
+            每一页的文本内容（跳过无文本或提取失败的页）
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
+
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page_num, page in enumerate(pdf_reader.pages):
+                try:
+                    page_text = page.extract_text()
+                except Exception as e:
+                    print(f"警告: 无法提取第{page_num+1}页的文本: {str(e)}")
+                    continue
+                if page_text:
+                    yield page_text
+
+    def extract_text(self, pdf_path: str, max_chars: Optional[int] = None) -> str:
         """
         从PDF文件中提取文本
-        
+
         Args:
             pdf_path: PDF文件路径
-            
+            max_chars: 字符预算，累计文本达到该长度后停止解析后续页面；None 表示提取全部页面
+
         Returns:
             提取的文本内容
         """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
-            
-        text = ""
+
+        parts = []
+        total_chars = 0
+        pages = self.iter_pages(pdf_path)
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                    except Exception as e:
-                        print(f"警告: 无法提取第{page_num+1}页的文本: {str(e)}")
-                        continue
-                        
+            for page_text in pages:
+                parts.append(page_text + "\n")
+                total_chars += len(page_text) + 1
+                if max_chars is not None and total_chars >= max_chars:
+                    break
+            text = "".join(parts)
+
             # 检查提取的文本是否为空
             if not text.strip():
                 raise ValueError("PDF文件中未提取到任何文本内容")
-                
+
         except PyPDF2.errors.PdfReadError as e:
             raise Exception(f"PDF文件读取错误: {str(e)}")
         except Exception as e:
             raise Exception(f"解析PDF文件时出错: {str(e)}")
-            
-        return text
\ No newline at end of file
+        finally:
+            pages.close()
+
+        return text
@@ -21,6 +21,32 @@ class PromptManager:
 5. 局限性
 
 文献内容：
+{text}"""
+            },
+            "summary_chunk": {
+                "system": "你是一位专业的学术文献分析师，能够准确提取文献片段中的关键信息。",
+                "user": """以下是一篇学术文献的第 {index}/{total} 部分，请提取这一部分的要点，使用Markdown格式输出：
+- 研究背景与目标
+- 方法与技术细节
+- 实验设置、数据与主要结果（保留关键数字）
+- 结论与局限性
+
+只总结这一部分中出现的内容，没有的条目直接省略。
+
+文献片段：
+{text}"""
+            },
+            "summary_merge": {
+                "system": "你是一位专业的学术文献分析师，能够准确提取和总结文献的核心内容。",
+                "user": """以下是同一篇学术文献各部分的要点（按原文顺序），请据此为整篇文献生成一个结构化摘要，使用Markdown格式输出：
+这里请给出文章标题：
+1. 研究背景与目标
+2. 方法论
+3. 主要发现
+4. 结论与意义
+5. 局限性
+
+各部分要点：
 {text}"""
             },
             "overall_report": {
@@ -31,6 +57,19 @@ class PromptManager:
 3. 方法对比
 4. 待解决问题
 
+文献摘要：
+{summaries}"""
+            },
+            "overall_report_merge": {
+                "system": "你是一位专业的学术研究报告撰写专家，能够将一组文献摘要归纳为阶段性综合分析。",
+                "user": """以下是一组文献摘要（也可能是上一轮归纳得到的阶段性综合分析），请将它们归纳为一份阶段性综合分析，之后将与其他分组的结果合并生成总体报告。请包括：
+1. 研究主题分布（注明涉及的文献标题）
+2. 共性结论
+3. 方法对比
+4. 待解决问题
+
+请保留关键的文献标题、方法名称和实验数据，不要遗漏只有少数文献涉及的研究方向，篇幅尽量精炼。
+
 文献摘要：
 {summaries}"""
             },
@@ -75,6 +114,23 @@ class PromptManager:
 
 请用学术性语言，确保信息量充足、条理清晰。
 
+文献内容：
+{text}"""
+            },
+            "combined_analysis": {
+                "system": "你是一位专业的学术文献分析师，能够一次性完成文献摘要、元数据提取和中文概要撰写。请严格按照JSON格式输出。",
+                "user": """请阅读以下文献内容，输出一个JSON对象，包含以下字段：
+
+1. "summary": Markdown格式的结构化摘要（字符串），先给出文章标题，再依次包括：研究背景与目标、方法论、主要发现、结论与意义、局限性
+2. "title": 文章标题（如无法确定则输出"未知"）
+3. "keywords": 关键词，用逗号分隔的字符串（如无法提取则输出"未知"）
+4. "abstract": 原文摘要（如原文有摘要部分则直接提取；如无则基于全文内容生成200字以内的摘要）
+5. "is_english": 布尔值，判断文献是否主要为英文（true/false）
+6. "abstract_cn": 如果是英文文献，给出abstract的中文翻译（保持学术风格）；否则输出空字符串
+7. "record_summary": 详细的中文概要（800-1200字），包含研究背景与动机、研究目标、方法与技术、实验与结果、主要贡献与创新点、局限性与未来工作
+
+请严格输出合法JSON，字符串中的换行使用\\n转义，不要添加任何额外说明文字。
+
 文献内容：
 {text}"""
             }
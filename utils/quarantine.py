@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class QuarantineList:
+    """
+    隔离名单：记录提取时超时、内存超限或导致子进程崩溃的文件
+
+    文件被隔离后不再尝试提取，直到其大小或修改时间发生变化（例如被替换为修复后的版本）。
+    """
+
+    def __init__(self, file_path: str = os.path.join("cache", "quarantine.json")):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.file_path):
+            return {}
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"加载隔离名单出错: {e}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.file_path)
+
+    def get(self, file_path: str) -> Optional[Dict]:
+        """返回文件的隔离记录；文件不在名单中或已发生变化时返回 None"""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return None
+        if stat.st_size != entry.get('size') or stat.st_mtime_ns != entry.get('mtime_ns'):
+            return None
+        return entry
+
+    def add(self, file_path: str, status: str, reason: str):
+        """将文件加入隔离名单"""
+        key = os.path.abspath(file_path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return
+        with self._lock:
+            self.entries[key] = {
+                'status': status,
+                'reason': reason,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'quarantined_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self._save()
+
+    def remove(self, file_path: str):
+        """将文件移出隔离名单"""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            if self.entries.pop(key, None) is not None:
+                self._save()
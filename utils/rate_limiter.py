@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    令牌桶（预约式）
+
+    每次预约立即扣减令牌，余额不足时返回需要等待的秒数，余额可以为负（代表排队中的预约）。
+    只做计算、不做等待，因此可以被不同线程中的不同事件循环共享。
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        """
+        Args:
+            rate_per_minute: 每分钟补充的令牌数
+            capacity: 桶容量（允许的突发量），默认等于一分钟的补充量
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """预约 amount 个令牌，返回需要等待的秒数"""
+        self._refill(now)
+        # 单次预约超过容量时按容量计，避免永远无法满足
+        self.level -= min(amount, self.capacity)
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate
+
+    def refund(self, amount: float, now: float):
+        """退还预约多扣的令牌"""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    LLM 请求限流器：同时限制每分钟请求数（RPM）、每分钟 token 数（TPM）和最小请求间隔
+
+    请求前按估算的 token 数（提示词 + 最大输出）预约额度，响应返回实际用量后退还多预约的部分。
+    使用线程锁保护，同一进程内所有线程、所有事件循环共享同一组额度。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._request_buckets: List[TokenBucket] = []
+        self._token_bucket: Optional[TokenBucket] = None
+
+    def configure(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                  min_interval: float = 0):
+        """
+        设置限流参数，0 表示不限制
+
+        Args:
+            requests_per_minute: 每分钟最大请求数
+            tokens_per_minute: 每分钟最大 token 数
+            min_interval: 相邻两次请求的最小间隔（秒）
+        """
+        with self._lock:
+            buckets = []
+            if requests_per_minute > 0:
+                buckets.append(TokenBucket(requests_per_minute))
+            if min_interval > 0:
+                buckets.append(TokenBucket(60.0 / min_interval, capacity=1))
+            self._request_buckets = buckets
+            self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._request_buckets) or self._token_bucket is not None
+
+    def reserve(self, tokens: int) -> float:
+        """预约一次请求及 tokens 个 token，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            for bucket in self._request_buckets:
+                wait = max(wait, bucket.reserve(1, now))
+            if self._token_bucket is not None:
+                wait = max(wait, self._token_bucket.reserve(tokens, now))
+            return wait
+
+    async def acquire(self, tokens: int):
+        """等待直到可以发送一次消耗 tokens 个 token 的请求"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def refund(self, tokens: int):
+        """退还多预约的 token"""
+        if tokens <= 0:
+            return
+        with self._lock:
+            if self._token_bucket is not None:
+                self._token_bucket.refund(tokens, time.monotonic())
+
+
+# 进程内共享的限流器，按 (base_url, api_key) 区分不同的服务额度
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(base_url: str, api_key: str) -> RateLimiter:
+    """获取指定服务的共享限流器"""
+    key = (str(base_url), api_key or '')
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter()
+            _limiters[key] = limiter
+        return limiter
@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class ReportStore:
+    """
+    总报告归并树的节点存储（SQLite）
+
+    每个节点保存一次归并调用（阶段性综合分析或最终总报告）的结果、所在层级和覆盖的摘要哈希集合，
+    以该次请求的键（模型 + 提示词 + 全部输入）为主键：文件夹中只增加或修改少量文献时，
+    只有包含这些摘要的分组及其上层需要重新生成，其余节点直接复用。
+    每次重新生成都会留下不再使用的旧节点，总大小超过上限时按最近最少使用（LRU）淘汰；
+    本次生成读取或写入的节点总是最近使用的，不会被淘汰。
+    """
+
+    def __init__(self, db_path: str = os.path.join("cache", "report_tree.db"), max_size_mb: int = 64):
+        self.db_path = db_path
+        self.max_size_bytes = max(0, max_size_mb) * 1024 * 1024
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.init_db()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_db(self):
+        """创建节点表"""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS report_nodes (
+                    node_key    TEXT PRIMARY KEY,
+                    level       INTEGER,
+                    covers      TEXT NOT NULL,
+                    content     TEXT NOT NULL,
+                    created_at  TIMESTAMP,
+                    stored_size INTEGER NOT NULL DEFAULT 0,
+                    last_access REAL NOT NULL DEFAULT 0
+                )
+            """)
+            # 兼容旧版存储：补充 LRU 淘汰所需的列
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(report_nodes)").fetchall()}
+            if 'stored_size' not in columns:
+                conn.execute("ALTER TABLE report_nodes ADD COLUMN stored_size INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE report_nodes SET stored_size = "
+                             "LENGTH(CAST(content AS BLOB)) + LENGTH(CAST(covers AS BLOB))")
+            if 'last_access' not in columns:
+                conn.execute("ALTER TABLE report_nodes ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_report_nodes_last_access ON report_nodes(last_access)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, node_key: str) -> Optional[Dict]:
+        """返回节点 {'level', 'covers', 'content'}，不存在时返回 None"""
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT level, covers, content FROM report_nodes WHERE node_key = ?", (node_key,)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE report_nodes SET last_access = ? WHERE node_key = ?", (time.time(), node_key))
+            conn.commit()
+            return {'level': row['level'], 'covers': json.loads(row['covers']), 'content': row['content']}
+        finally:
+            conn.close()
+
+    def put(self, node_key: str, level: int, covers: List[str], content: str):
+        """保存节点，并在超过容量上限时淘汰最久未使用的节点"""
+        covers_json = json.dumps(sorted(covers))
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO report_nodes "
+                "(node_key, level, covers, content, created_at, stored_size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (node_key, level, covers_json, content, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                 len(content.encode('utf-8')) + len(covers_json.encode('utf-8')), time.time())
+            )
+            conn.commit()
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """按 LRU 顺序删除节点，直到总大小不超过上限"""
+        total = conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM report_nodes").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        rows = conn.execute("SELECT node_key, stored_size FROM report_nodes ORDER BY last_access ASC").fetchall()
+        for row in rows:
+            if total <= self.max_size_bytes:
+                break
+            conn.execute("DELETE FROM report_nodes WHERE node_key = ?", (row['node_key'],))
+            total -= row['stored_size']
+        conn.commit()
+
+    def total_size(self) -> int:
+        """返回保存的节点总字节数"""
+        conn = self._get_connection()
+        try:
+            return conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM report_nodes").fetchone()[0]
+        finally:
+            conn.close()
@@ -0,0 +1,111 @@
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# 可重试的 HTTP 状态码：请求超时、冲突、频率超限和服务端错误
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """判断 LLM 请求异常是否为暂时性错误（频率超限、5xx、连接失败或超时）"""
+    status_code = getattr(error, 'status_code', None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    # 没有状态码的连接错误、超时错误
+    name = type(error).__name__
+    return 'Connection' in name or 'Timeout' in name or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """从响应头 retry-after-ms / retry-after（秒数或 HTTP 日期）中读取服务端要求的等待时间"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    LLM 请求重试策略
+
+    暂时性错误按指数退避重试，等待时间在 [0, min(max_delay, base_delay * 2^n)] 内随机（全抖动），
+    避免大量请求同时重试；服务端返回 Retry-After 时按其要求等待（不超过 max_delay）。
+    只重试尚未收到响应内容的请求（流式响应开始后不重试），重复请求不会产生重复的结果。
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        Args:
+            max_retries: 最大重试次数（0 表示不重试）
+            base_delay: 第一次重试的退避基数（秒）
+            max_delay: 单次等待的上限（秒）
+        """
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, error: BaseException, retries: int) -> bool:
+        """已重试 retries 次后是否继续重试"""
+        return retries < self.max_retries and is_retryable_error(error)
+
+    def delay(self, error: BaseException, retries: int) -> float:
+        """第 retries + 1 次重试前的等待时间（秒）"""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retries)))
+
+
+class RetryCounter:
+    """统计一段调用过程中发生的重试次数"""
+
+    def __init__(self):
+        self.count = 0
+
+
+_retry_counter: contextvars.ContextVar = contextvars.ContextVar('llm_retry_counter', default=None)
+
+
+@contextmanager
+def track_retries():
+    """
+    在当前异步任务中统计 LLM 重试次数
+
+    用法：
+        with track_retries() as counter:
+            await llm_client.generate_summary(text)
+        counter.count  # 本次调用的重试次数
+    """
+    counter = RetryCounter()
+    token = _retry_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _retry_counter.reset(token)
+
+
+def count_retry():
+    """记录一次重试（计入当前任务中的 track_retries）"""
+    counter = _retry_counter.get()
+    if counter is not None:
+        counter.count += 1
@@ -0,0 +1,81 @@
+import json
+import re
+from typing import Dict
+
+
+class StructuredOutputError(Exception):
+    """LLM 返回的结构化结果无法解析或不符合约定的字段格式"""
+    pass
+
+
+# 合并调用结果的字段约定：字段名 -> (类型, 是否必须非空)
+COMBINED_ANALYSIS_SCHEMA = {
+    'summary': (str, True),          # Markdown 结构化摘要
+    'title': (str, False),           # 文章标题
+    'keywords': (str, False),        # 关键词，逗号分隔
+    'abstract': (str, False),        # 原文摘要
+    'is_english': (bool, False),     # 是否主要为英文
+    'abstract_cn': (str, False),     # 摘要中文翻译（中文文献为空）
+    'record_summary': (str, True),   # 入库用的详细中文概要
+}
+
+
+def parse_json_object(raw: str) -> Dict:
+    """从 LLM 响应中解析 JSON 对象（兼容 markdown 代码块包裹和前后多余文字）"""
+    if not raw:
+        raise StructuredOutputError("响应为空")
+    candidates = [raw.strip()]
+    match = re.search(r'```(?:json)?\s*(.*?)```', raw, re.DOTALL)
+    if match:
+        candidates.append(match.group(1).strip())
+    start, end = raw.find('{'), raw.rfind('}')
+    if start != -1 and end > start:
+        candidates.append(raw[start:end + 1])
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict):
+            return data
+    raise StructuredOutputError("响应不是合法的JSON对象")
+
+
+def _normalize_field(name: str, value, expected: type):
+    if expected is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+            return value.strip().lower() == 'true'
+        raise StructuredOutputError(f"字段 {name} 应为布尔值")
+    if isinstance(value, list) and name == 'keywords':
+        return ', '.join(str(v) for v in value)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise StructuredOutputError(f"字段 {name} 应为字符串")
+    return value.strip()
+
+
+def validate_combined_analysis(data: Dict) -> Dict:
+    """
+    按 COMBINED_ANALYSIS_SCHEMA 校验并规范化合并调用的结果
+
+    Returns:
+        只包含约定字段的新字典（关键词列表转为逗号分隔字符串，缺失的可选字段取默认值）
+
+    Raises:
+        StructuredOutputError: 缺少必需字段或字段类型不符
+    """
+    result = {}
+    for name, (expected, required) in COMBINED_ANALYSIS_SCHEMA.items():
+        if name not in data:
+            if required:
+                raise StructuredOutputError(f"缺少字段 {name}")
+            result[name] = False if expected is bool else ''
+            continue
+        value = _normalize_field(name, data[name], expected)
+        if required and not value:
+            raise StructuredOutputError(f"字段 {name} 为空")
+        result[name] = value
+    return result
@@ -0,0 +1,204 @@
+import gzip
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Optional, Tuple
+
+from utils.text_extractor import compute_file_hash
+
+
+class TextCache:
+    """
+    内容寻址的提取文本缓存
+
+    - 以文件原始字节的 SHA-256 作为缓存键，不同目录下的同名文件互不覆盖
+    - 记录 (路径, 大小, mtime) → SHA-256 的映射，文件未变化时无需重新计算哈希
+    - 文本以 gzip 压缩存储，总大小超过上限时按最近最少使用（LRU）淘汰
+    """
+
+    def __init__(self, cache_dir: str = os.path.join("cache", "texts"), max_size_mb: int = 1024):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max(0, max_size_mb) * 1024 * 1024
+        self.index_path = os.path.join(cache_dir, "index.db")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_index()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # 多个提取子进程可能同时访问索引，设置较长的锁等待时间
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    def _init_index(self):
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_keys (
+                    file_path  TEXT PRIMARY KEY,
+                    file_size  INTEGER NOT NULL,
+                    mtime_ns   INTEGER NOT NULL,
+                    sha256     TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256       TEXT PRIMARY KEY,
+                    stored_size  INTEGER NOT NULL,
+                    last_access  REAL NOT NULL,
+                    char_count   INTEGER NOT NULL DEFAULT 0,
+                    complete     INTEGER NOT NULL DEFAULT 1
+                )
+            """)
+            # 兼容旧版索引：补充按预算提取所需的列
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(blobs)").fetchall()}
+            if 'char_count' not in columns:
+                conn.execute("ALTER TABLE blobs ADD COLUMN char_count INTEGER NOT NULL DEFAULT 0")
+            if 'complete' not in columns:
+                conn.execute("ALTER TABLE blobs ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs(last_access)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, sha256[:2], f"{sha256}.txt.gz")
+
+    def get_key(self, file_path: str) -> Tuple[int, int, str]:
+        """
+        获取文件的缓存键 (大小, mtime_ns, SHA-256)
+
+        大小与 mtime 均未变化时直接复用已记录的哈希，否则重新计算。
+        """
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT file_size, mtime_ns, sha256 FROM file_keys WHERE file_path = ?",
+                (abs_path,)
+            ).fetchone()
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                return row[0], row[1], row[2]
+
+            sha256 = compute_file_hash(abs_path)
+            conn.execute(
+                "INSERT OR REPLACE INTO file_keys (file_path, file_size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (abs_path, stat.st_size, stat.st_mtime_ns, sha256)
+            )
+            conn.commit()
+            return stat.st_size, stat.st_mtime_ns, sha256
+        finally:
+            conn.close()
+
+    def get(self, file_path: str, min_chars: Optional[int] = None) -> Optional[str]:
+        """
+        读取缓存文本，未命中返回 None
+
+        Args:
+            file_path: 文件路径
+            min_chars: 所需的最少字符数；缓存的是按预算截断的文本时，
+                       仅当其长度满足该要求才算命中。None 表示需要全文
+        """
+        _, _, sha256 = self.get_key(file_path)
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT char_count, complete FROM blobs WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        char_count, complete = row
+        if not complete and (min_chars is None or char_count < min_chars):
+            return None
+
+        blob_path = self._blob_path(sha256)
+        try:
+            with gzip.open(blob_path, 'rt', encoding='utf-8') as f:
+                text = f.read()
+        except (OSError, EOFError):
+            return None
+
+        conn = self._get_connection()
+        try:
+            conn.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (time.time(), sha256))
+            conn.commit()
+        finally:
+            conn.close()
+        return text
+
+    def put(self, file_path: str, text: str, complete: bool = True):
+        """
+        写入缓存文本，并在超过容量上限时淘汰最久未使用的条目
+
+        Args:
+            file_path: 文件路径
+            text: 提取的文本
+            complete: 是否为全文（按预算截断的文本为 False）
+        """
+        _, _, sha256 = self.get_key(file_path)
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT char_count, complete FROM blobs WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        finally:
+            conn.close()
+        # 不用更短的截断文本覆盖已有的全文或更长的缓存
+        if row is not None and not complete and (row[1] or row[0] >= len(text)):
+            return
+
+        blob_path = self._blob_path(sha256)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+
+        # 先写临时文件再原子替换，避免并发读取到不完整内容；
+        # 临时文件名唯一，同一进程内多个线程同时写入同一条目也互不干扰
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(blob_path))
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, blob_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, stored_size, last_access, char_count, complete) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sha256, os.path.getsize(blob_path), time.time(), len(text), int(complete))
+            )
+            conn.commit()
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """按 LRU 顺序删除缓存，直到总大小不超过上限"""
+        total = conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        rows = conn.execute("SELECT sha256, stored_size FROM blobs ORDER BY last_access ASC").fetchall()
+        for sha256, stored_size in rows:
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(self._blob_path(sha256))
+            except FileNotFoundError:
+                pass
+            conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+            total -= stored_size
+        conn.commit()
+
+    def total_size(self) -> int:
+        """返回缓存占用的字节数（压缩后）"""
+        conn = self._get_connection()
+        try:
+            return conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+        finally:
+            conn.close()
@@ -0,0 +1,94 @@
+import re
+from typing import Callable, List
+
+# 章节标题行：Markdown 标题、编号标题（1 / 2.1 / IV.）、中文编号标题和常见的章节名
+_HEADING_PATTERNS = [
+    re.compile(r'^#{1,6}\s+\S'),
+    re.compile(r'^(\d+(\.\d+)*\.?|[IVX]+\.)\s+[A-Z\u4e00-\u9fff]'),
+    re.compile(r'^([一二三四五六七八九十]+[、.．]|第[一二三四五六七八九十\d]+[章节])\s*\S'),
+    re.compile(r'^(abstract|introduction|related\s+work|background|methods?|methodology|approach|'
+               r'experiments?|results?|discussion|conclusions?|references|bibliography|'
+               r'acknowledge?ments?|appendix)\b', re.IGNORECASE),
+    re.compile(r'^(摘\s*要|引\s*言|绪\s*论|相关工作|研究方法|方法|实验|结果|讨论|结\s*论|参考文献|致\s*谢|附\s*录)\s*$'),
+]
+
+# 标题行的最大长度，超过的视为正文
+_MAX_HEADING_LENGTH = 80
+
+# 超长章节依次尝试的切分位置：段落、行、句子
+_SEPARATORS = ['\n\n', '\n', '。', '. ']
+
+
+def is_heading(line: str) -> bool:
+    """判断一行文本是否为章节标题"""
+    line = line.strip()
+    if not line or len(line) > _MAX_HEADING_LENGTH:
+        return False
+    return any(pattern.match(line) for pattern in _HEADING_PATTERNS)
+
+
+def split_sections(text: str) -> List[str]:
+    """按章节标题把文本切分为章节（每个章节以其标题行开头，标题前的内容为第一个章节）"""
+    sections, current = [], []
+    for line in text.splitlines(keepends=True):
+        if is_heading(line) and any(part.strip() for part in current):
+            sections.append(''.join(current))
+            current = []
+        current.append(line)
+    if any(part.strip() for part in current):
+        sections.append(''.join(current))
+    return sections
+
+
+def _split_long(text: str, budget: int, count_tokens: Callable[[str], int], level: int = 0) -> List[str]:
+    """把超过预算的文本依次按段落、行、句子切开，仍超过时按字符数截断"""
+    if count_tokens(text) <= budget:
+        return [text]
+    if level >= len(_SEPARATORS):
+        tokens = count_tokens(text)
+        size = max(1, len(text) * budget // tokens - 1)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    separator = _SEPARATORS[level]
+    parts = text.split(separator)
+    if len(parts) == 1:
+        return _split_long(text, budget, count_tokens, level + 1)
+    # 切开后保留分隔符，拼接后与原文一致
+    parts = [part + separator for part in parts[:-1]] + [parts[-1]]
+    pieces = []
+    for part in parts:
+        pieces.extend(_split_long(part, budget, count_tokens, level + 1))
+    return _pack(pieces, budget, count_tokens)
+
+
+def _pack(pieces: List[str], budget: int, count_tokens: Callable[[str], int]) -> List[str]:
+    """按顺序合并相邻片段，每块不超过预算"""
+    chunks, current, used = [], '', 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if current and used + tokens > budget:
+            chunks.append(current)
+            current, used = '', 0
+        current += piece
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_text(text: str, budget: int, count_tokens: Callable[[str], int]) -> List[str]:
+    """
+    把长文本切分为不超过 token 预算的块
+
+    尽量在章节边界切分（相邻的短章节合并为一块），单个章节超过预算时再按段落、行、句子切分。
+    所有块按顺序拼接后与原文一致。
+
+    Args:
+        text: 文献全文
+        budget: 每块的 token 上限
+        count_tokens: 计算文本 token 数的函数
+    """
+    pieces = []
+    for section in split_sections(text):
+        pieces.extend(_split_long(section, budget, count_tokens))
+    return _pack(pieces, budget, count_tokens)
@@ -1,16 +1,81 @@
 import hashlib
+import multiprocessing
 import os
-from typing import List, Tuple
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from utils.pdf_reader import PDFReader
 
 
+class ExtractionError(Exception):
+    """
+    受监管子进程中的提取失败
+
+    status 取值：'timeout'（超时）、'oom'（内存超限）、'crashed'（子进程异常退出）、
+    'quarantined'（文件此前已被隔离）
+    """
+
+    def __init__(self, message: str, status: str):
+        super().__init__(message)
+        self.status = status
+
+    def __reduce__(self):
+        # 保证跨进程传递时保留 status
+        return self.__class__, (str(self), self.status)
+
+
 def compute_content_hash(text: str) -> str:
     """计算文本内容的 SHA-256 哈希值，用于去重"""
     normalized = text.strip().lower()
     return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
 
 
+def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """按块流式计算文件原始字节的 SHA-256 哈希值"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+# 支持的文件扩展名 → 文件类型
+SUPPORTED_TYPES = {'.pdf': 'pdf', '.docx': 'docx', '.md': 'md'}
+
+
+def iter_supported_files(folder_path: str, supported: Dict[str, str] = None) -> Iterator[Tuple[os.DirEntry, str]]:
+    """
+    基于 os.scandir 递归遍历文件夹，逐个产出支持的文件
+
+    DirEntry 自带的类型信息和 stat 缓存可减少系统调用（在网络文件系统上尤其明显）。
+    与 os.walk 默认行为一致，不跟随目录符号链接，无权限的目录直接跳过。
+
+    Yields:
+        (DirEntry, file_type) 元组
+    """
+    supported = supported or SUPPORTED_TYPES
+    pending_dirs = [folder_path]
+    while pending_dirs:
+        current = pending_dirs.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_dirs.append(entry.path)
+                            continue
+                        ext = os.path.splitext(entry.name)[1].lower()
+                        if ext in supported and entry.is_file():
+                            yield entry, supported[ext]
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
 def scan_all_files(folder_path: str) -> List[Tuple[str, str]]:
     """
     扫描文件夹中所有支持的文件类型（pdf, docx, md）
@@ -18,25 +83,71 @@ def scan_all_files(folder_path: str) -> List[Tuple[str, str]]:
     Returns:
         (file_path, file_type) 元组列表，file_type 为 'pdf'/'docx'/'md'
     """
-    supported = {'.pdf': 'pdf', '.docx': 'docx', '.md': 'md'}
-    results = []
-    for root, dirs, files in os.walk(folder_path):
-        for file in files:
-            ext = os.path.splitext(file)[1].lower()
-            if ext in supported:
-                results.append((os.path.join(root, file), supported[ext]))
-    return results
+    return [(entry.path, file_type) for entry, file_type in iter_supported_files(folder_path)]
+
+
+def _isolated_extract_worker(conn, file_path: str, max_chars: Optional[int]):
+    """在受监管子进程中执行提取，并通过管道返回结果"""
+    try:
+        text, _ = TextExtractor().extract(file_path, max_chars)
+        conn.send(('ok', text))
+    except MemoryError:
+        conn.send(('oom', "文本提取时内存不足"))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+
+def _read_rss_mb(pid: int) -> Optional[float]:
+    """读取子进程的常驻内存（MB），仅支持 Linux，其他平台返回 None"""
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _get_mp_context():
+    """优先使用 forkserver（避免在多线程进程中直接 fork），Windows 下使用 spawn"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
 
 
 class TextExtractor:
     """统一文本提取器，支持 PDF、Word、Markdown 三种格式"""
 
-    def __init__(self):
+    # 需要在子进程中隔离解析的文件类型
+    ISOLATED_TYPES = ('pdf', 'docx')
+
+    def __init__(self, text_cache=None, timeout: float = 0, memory_limit_mb: int = 0):
+        """
+        Args:
+            text_cache: 可选的 TextCache 实例，命中时跳过解析
+            timeout: PDF/Word 提取的墙钟超时（秒），0 表示不限制
+            memory_limit_mb: PDF/Word 提取子进程的常驻内存上限（MB），0 表示不限制
+
+        timeout 或 memory_limit_mb 大于 0 时，PDF/Word 在受监管的子进程中解析，
+        超限时终止子进程并抛出 ExtractionError。
+        """
         self.pdf_reader = PDFReader()
+        self.text_cache = text_cache
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+
+    @property
+    def isolated(self) -> bool:
+        return self.timeout > 0 or self.memory_limit_mb > 0
 
-    def extract(self, file_path: str) -> Tuple[str, str]:
+    def extract(self, file_path: str, max_chars: Optional[int] = None) -> Tuple[str, str]:
         """
-        从文件中提取文本
+        从文件中提取文本（优先读取文本缓存）
+
+        Args:
+            file_path: 文件路径
+            max_chars: 字符预算，达到后停止解析；None 表示提取全文
 
         Returns:
             (text_content, file_type) 元组
@@ -46,19 +157,91 @@ class TextExtractor:
         """
         ext = os.path.splitext(file_path)[1].lower()
         if ext == '.pdf':
-            return self._extract_pdf(file_path), 'pdf'
+            extract_func, file_type = self._extract_pdf, 'pdf'
         elif ext == '.docx':
-            return self._extract_docx(file_path), 'docx'
+            extract_func, file_type = self._extract_docx, 'docx'
         elif ext == '.md':
-            return self._extract_md(file_path), 'md'
+            extract_func, file_type = self._extract_md, 'md'
         else:
             raise ValueError(f"不支持的文件类型: {ext}")
 
-    def _extract_pdf(self, file_path: str) -> str:
+        if self.text_cache is not None:
+            cached = self.text_cache.get(file_path, min_chars=max_chars)
+            if cached is not None:
+                return cached, file_type
+
+        if self.isolated and file_type in self.ISOLATED_TYPES:
+            text = self._extract_isolated(file_path, max_chars)
+        else:
+            text = extract_func(file_path, max_chars)
+
+        if self.text_cache is not None:
+            # 未达到预算说明已提取全文
+            complete = max_chars is None or len(text) < max_chars
+            self.text_cache.put(file_path, text, complete=complete)
+        return text, file_type
+
+    def _extract_isolated(self, file_path: str, max_chars: Optional[int] = None) -> str:
+        """
+        在受监管的子进程中提取文本
+
+        Raises:
+            ExtractionError: 超时、内存超限或子进程异常退出
+        """
+        ctx = _get_mp_context()
+        reader, writer = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=_isolated_extract_worker, args=(writer, file_path, max_chars), daemon=True)
+        process.start()
+        writer.close()
+
+        result = None
+        start_time = time.monotonic()
+        try:
+            while result is None:
+                if reader.poll(0.2):
+                    try:
+                        result = reader.recv()
+                    except EOFError:
+                        # 子进程未返回结果就退出
+                        break
+                    continue
+
+                if not process.is_alive() and not reader.poll(0):
+                    break
+
+                if self.timeout > 0 and time.monotonic() - start_time > self.timeout:
+                    raise ExtractionError(f"文本提取超时（超过 {self.timeout} 秒）", 'timeout')
+
+                if self.memory_limit_mb > 0:
+                    rss_mb = _read_rss_mb(process.pid)
+                    if rss_mb is not None and rss_mb > self.memory_limit_mb:
+                        raise ExtractionError(
+                            f"文本提取内存超限（{rss_mb:.0f}MB > {self.memory_limit_mb}MB）", 'oom'
+                        )
+        finally:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            reader.close()
+
+        if result is None:
+            # 被系统 OOM killer 杀死时退出码为 -SIGKILL
+            if process.exitcode == -9:
+                raise ExtractionError("文本提取子进程因内存不足被终止", 'oom')
+            raise ExtractionError(f"文本提取子进程异常退出（退出码 {process.exitcode}）", 'crashed')
+
+        kind, payload = result
+        if kind == 'ok':
+            return payload
+        if kind == 'oom':
+            raise ExtractionError(payload, 'oom')
+        raise Exception(payload)
+
+    def _extract_pdf(self, file_path: str, max_chars: Optional[int] = None) -> str:
         """使用现有 PDFReader 提取 PDF 文本"""
-        return self.pdf_reader.extract_text(file_path)
+        return self.pdf_reader.extract_text(file_path, max_chars)
 
-    def _extract_docx(self, file_path: str) -> str:
+    def _extract_docx(self, file_path: str, max_chars: Optional[int] = None) -> str:
         """提取 Word 文档文本（段落 + 表格）"""
         try:
             from docx import Document
@@ -67,34 +250,39 @@ class TextExtractor:
 
         doc = Document(file_path)
         text_parts = []
+        total_chars = 0
 
         # 提取段落
         for paragraph in doc.paragraphs:
             if paragraph.text.strip():
                 text_parts.append(paragraph.text)
+                total_chars += len(paragraph.text) + 1
+                if max_chars is not None and total_chars >= max_chars:
+                    break
 
-        # 提取表格
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    if cell.text.strip():
-                        row_text.append(cell.text.strip())
-                if row_text:
-                    text_parts.append(' | '.join(row_text))
+        # 提取表格（字符预算尚未用完时）
+        if max_chars is None or total_chars < max_chars:
+            for table in doc.tables:
+                for row in table.rows:
+                    row_text = []
+                    for cell in row.cells:
+                        if cell.text.strip():
+                            row_text.append(cell.text.strip())
+                    if row_text:
+                        text_parts.append(' | '.join(row_text))
 
         text = '\n'.join(text_parts)
         if not text.strip():
             raise ValueError("Word 文档中未提取到任何文本内容")
         return text
 
-    def _extract_md(self, file_path: str) -> str:
+    def _extract_md(self, file_path: str, max_chars: Optional[int] = None) -> str:
         """读取 Markdown 文件内容"""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
 
         with open(file_path, 'r', encoding='utf-8') as f:
-            text = f.read()
+            text = f.read() if max_chars is None else f.read(max_chars)
 
         if not text.strip():
             raise ValueError("Markdown 文件内容为空")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共享任务队列 worker（不依赖 PyQt5，可在无界面的服务器上运行）
+
+用法：
+    python worker.py enqueue 文件夹 [--task summary|record] [--priority N] [--requeue]
+    python worker.py run [--task summary|record] [--concurrency N] [--follow] [--worker-id ID]
+    python worker.py status
+
+任务队列保存在配置的数据库文件（db_path，默认 literature_records.db）中，
+放在共享存储上时可在多个进程或多台机器上同时运行 worker。
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.processor import LiteratureProcessor, configure_processor
+from core.queue_worker import QueueWorker
+from utils.config_manager import ConfigManager
+from utils.job_queue import JOB_TASKS, JobQueue
+from utils.text_extractor import iter_supported_files, scan_all_files
+
+
+def enqueue(config: dict, args) -> int:
+    """扫描文件夹并把文件加入任务队列"""
+    if args.task == 'record':
+        files = scan_all_files(args.folder)
+    else:
+        files = [(entry.path, 'pdf') for entry, _ in iter_supported_files(args.folder, {'.pdf': 'pdf'})]
+    queue = JobQueue(config.get('db_path', 'literature_records.db'), config.get('max_failures', 3))
+    count = queue.enqueue(files, args.task, args.priority, requeue=args.requeue)
+    print(f"找到 {len(files)} 个文件，加入 {count} 个任务")
+    return 0
+
+
+def run(config: dict, args) -> int:
+    """领取并处理任务"""
+    queue = JobQueue(config.get('db_path', 'literature_records.db'), config.get('max_failures', 3))
+    processor = LiteratureProcessor()
+    # 入库任务必须启用自动记录；摘要任务按配置（auto_record）决定是否同时入库
+    if args.task == 'record':
+        config = dict(config, auto_record=True)
+    configure_processor(processor, config)
+    worker = QueueWorker(
+        processor, queue, args.task,
+        worker_id=args.worker_id,
+        concurrency=args.concurrency or config.get('concurrency', 5),
+        lease_seconds=args.lease,
+        cache_text=config.get('cache_text', True)
+    )
+
+    def on_result(result, submitted):
+        name = os.path.basename(result['pdf_path'])
+        note = "" if submitted else "（租约已过期，结果未提交）"
+        if result['status'] in ('success', 'skipped'):
+            print(f"[{worker.worker_id}] {result['status']}: {name}{note}")
+        else:
+            error = (result.get('error') or '').splitlines()[0] if result.get('error') else ''
+            print(f"[{worker.worker_id}] 处理失败 [{result['status']}] {name}: {error}{note}")
+
+    # Ctrl+C：不再领取新任务，进行中的任务处理完后退出
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    print(f"worker {worker.worker_id} 开始领取 {args.task} 任务")
+    try:
+        asyncio.run(worker.run(follow=args.follow, poll_interval=args.poll_interval, on_result=on_result))
+    finally:
+        processor.shutdown()
+    print(f"worker {worker.worker_id} 已结束: {worker.counts}")
+    return 0
+
+
+def status(config: dict, args) -> int:
+    """显示任务队列统计"""
+    queue = JobQueue(config.get('db_path', 'literature_records.db'), config.get('max_failures', 3))
+    for task in JOB_TASKS:
+        counts = queue.stats(task)
+        print(f"{task}: 待处理 {counts['pending']}, 处理中 {counts['running']}, "
+              f"已完成 {counts['done']}, 失败 {counts['failed']}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="文献总结共享任务队列 worker")
+    parser.add_argument('--config', default='config.json', help="配置文件路径")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help="扫描文件夹并加入任务")
+    enqueue_parser.add_argument('folder', help="文献文件夹")
+    enqueue_parser.add_argument('--task', choices=JOB_TASKS, default='summary')
+    enqueue_parser.add_argument('--priority', type=int, default=0, help="优先级，越大越先处理")
+    enqueue_parser.add_argument('--requeue', action='store_true', help="已完成或失败的任务重新处理")
+    enqueue_parser.set_defaults(func=enqueue)
+
+    run_parser = subparsers.add_parser('run', help="领取并处理任务")
+    run_parser.add_argument('--task', choices=JOB_TASKS, default='summary')
+    run_parser.add_argument('--concurrency', type=int, default=0, help="LLM 并发数（默认取配置）")
+    run_parser.add_argument('--worker-id', default=None, help="worker 标识（默认 主机名:进程号）")
+    run_parser.add_argument('--lease', type=float, default=300, help="任务租约时长（秒）")
+    run_parser.add_argument('--follow', action='store_true', help="队列为空后继续等待新任务")
+    run_parser.add_argument('--poll-interval', type=float, default=10, help="等待新任务的轮询间隔（秒）")
+    run_parser.set_defaults(func=run)
+
+    status_parser = subparsers.add_parser('status', help="显示任务队列统计")
+    status_parser.set_defaults(func=status)
+
+    args = parser.parse_args(argv)
+    config = ConfigManager(args.config).load_config()
+    return args.func(config, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())